@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Optional
+
+from demoqa import LoginPage, api_login, get_pool
+
+DEFAULT_BASE_URL = "https://demoqa.com"
+
+# (username, password, base_url) -> storage_state dict
+LoginFunc = Callable[[str, str, str], Awaitable[dict]]
+
+
+async def ui_login(username: str, password: str, base_url: str = DEFAULT_BASE_URL) -> dict:
+    # logs in through the login form on the worker's warm chrome
+    browser = await get_pool().acquire("chrome")
+    context = await browser.new_context()
+    try:
+        lp = LoginPage(context)
+        await lp.navigate(f"{base_url.rstrip('/')}/login")
+        await lp.login(username, password)
+        await lp.expect_text_visible(username, timeout=10000)
+        return await context.storage_state()
+    finally:
+        await context.close()
+
+
+async def api_state_login(username: str, password: str, base_url: str = DEFAULT_BASE_URL) -> dict:
+    # no browser involved: two Account API calls on the worker's driver
+    playwright = await get_pool().playwright()
+    request_context = await playwright.request.new_context()
+    try:
+        return await api_login(request_context, username, password, base_url)
+    finally:
+        await request_context.dispose()
+
+
+class FileLock:
+    # cross-process lock that works the same on Windows and Linux runners
+    def __init__(self, path: str, timeout: float = 120, stale: float = 120, poll: float = 0.1) -> None:
+        self.path = path
+        self.timeout = timeout
+        self.stale = stale
+        self.poll = poll
+
+    async def __aenter__(self) -> "FileLock":
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale:
+                        # holder died without releasing
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not acquire {self.path} within {self.timeout}s")
+            await asyncio.sleep(self.poll)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class AuthStateCache:
+    # storage_state files keyed by (user, base url), shared by all xdist workers
+    # on the machine: exactly one worker logs in, the others reuse the file until
+    # it is older than ttl or one of its cookies expired.
+    def __init__(self, cache_dir: str = ".auth", ttl: float = 1800, login: Optional[LoginFunc] = None) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.login = login or ui_login
+        self.logins = 0
+        self.hits = 0
+
+    def path_for(self, username: str, base_url: str = DEFAULT_BASE_URL) -> str:
+        key = hashlib.sha256(f"{base_url.rstrip('/')}|{username}".encode()).hexdigest()[:16]
+        safe_user = "".join(c if c.isalnum() else "_" for c in username)
+        return os.path.join(self.cache_dir, f"{safe_user}-{key}.json")
+
+    def is_fresh(self, path: str) -> bool:
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return False
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        now = time.time()
+        return not any(0 < cookie.get("expires", -1) < now for cookie in state.get("cookies", []))
+
+    async def get(self, username: str, password: str, base_url: str = DEFAULT_BASE_URL) -> str:
+        path = self.path_for(username, base_url)
+        if self.is_fresh(path):
+            self.hits += 1
+            return path
+        os.makedirs(self.cache_dir, exist_ok=True)
+        async with FileLock(path + ".lock"):
+            # another worker may have logged in while we waited
+            if self.is_fresh(path):
+                self.hits += 1
+                return path
+            state = await self.login(username, password, base_url)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+            self.logins += 1
+        return path
+
+    def stats(self) -> dict:
+        return {
+            "logins": self.logins,
+            "cache hits": self.hits,
+        }
@@ -0,0 +1,85 @@
+#####################
+#
+# python bench_api_clients.py --requests 200
+#
+# Sends the test_w2 GET /api/users/2 call to the local stub server with the
+# old fixture shape (new driver + request context per call) and with the
+# pooled per-worker client, and reports requests/s and how many TCP
+# connections the stub saw.
+#
+#####################
+
+import json
+import time
+import asyncio
+import argparse
+
+from playwright.async_api import async_playwright
+
+from demoqa import BrowserPool, ApiClientPool
+from stub_server import start_stub_server
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'x-api-key': 'reqres-free-v1'
+}
+
+
+async def _get(request_context) -> None:
+    res = await request_context.get("/api/users/2")
+    assert res.status == 200, f"Unexpected status: {res.status}"
+
+
+async def per_call(base_url: str, requests: int) -> None:
+    # what the function-scoped fixtures did for every test
+    for _ in range(requests):
+        async with async_playwright() as pw:
+            request_context = await pw.request.new_context(base_url=base_url, extra_http_headers=HEADERS)
+            await _get(request_context)
+            await request_context.dispose()
+
+
+async def pooled(base_url: str, requests: int) -> None:
+    pool = BrowserPool()
+    clients = ApiClientPool(pool)
+    try:
+        for _ in range(requests):
+            await _get(await clients.get(base_url, HEADERS))
+    finally:
+        await clients.close()
+        await pool.close()
+
+
+def run(name: str, scenario, requests: int) -> dict:
+    server = start_stub_server()
+    try:
+        start = time.perf_counter()
+        asyncio.run(scenario(server.url + "/", requests))
+        elapsed = time.perf_counter() - start
+        return {
+            "mode": name,
+            "requests": requests,
+            "seconds": round(elapsed, 3),
+            "requests/s": round(requests / elapsed, 1),
+            "connections": server.state.connections,
+        }
+    finally:
+        server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-test API drivers with the pooled API clients")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [run("per call", per_call, args.requests), run("pooled", pooled, args.requests)]
+    for result in results:
+        print("  ".join(f"{key}: {value}" for key, value in result.items()))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
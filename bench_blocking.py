@@ -0,0 +1,98 @@
+#####################
+#
+# python bench_blocking.py --browser chrome --runs 3
+#
+# Loads every page object's url with request blocking off and with the
+# page objects' policies, and reports load time, request count and bytes
+# transferred (headers + bodies) for both. The difference is what the
+# policies save; the runtime counters can only count blocked requests,
+# not the size of responses that never arrived.
+#
+#####################
+
+import json
+import time
+import asyncio
+import argparse
+
+from demoqa import (
+    BooksPage,
+    SelectPage,
+    TextBoxPage,
+    DragPage,
+    CheckBoxPage,
+    RadioButtonPage,
+    CalendarPage,
+    AlertPage,
+    FramePage,
+    LoginPage,
+    init_browser,
+    close_browser,
+    shutdown_browsers,
+    get_blocker,
+)
+
+PAGES = [BooksPage, SelectPage, TextBoxPage, DragPage, CheckBoxPage, RadioButtonPage,
+         CalendarPage, AlertPage, FramePage, LoginPage]
+
+
+async def load(page_cls, browser_type: str) -> dict:
+    session = await init_browser(browser_type)
+    transferred = []
+
+    async def on_finished(request) -> None:
+        try:
+            sizes = await request.sizes()
+            transferred.append(sizes["responseBodySize"] + sizes["responseHeadersSize"])
+        except Exception:
+            pass
+
+    session.context.on("requestfinished", on_finished)
+    try:
+        page_object = page_cls(session)
+        started = time.perf_counter()
+        await page_object.navigate(wait_until="load")
+        elapsed = time.perf_counter() - started
+        # let the last requestfinished handlers run
+        await asyncio.sleep(0.5)
+        return {"load s": elapsed, "requests": len(transferred), "bytes": sum(transferred)}
+    finally:
+        await close_browser(session)
+
+
+async def bench(browser_type: str, runs: int) -> list[dict]:
+    blocker = get_blocker()
+    results = []
+    try:
+        for page_cls in PAGES:
+            row = {"page": page_cls.__name__}
+            for label, enabled in (("off", False), ("on", True)):
+                blocker.configure(enabled=enabled)
+                samples = [await load(page_cls, browser_type) for _ in range(runs)]
+                for key in ("load s", "requests", "bytes"):
+                    value = sum(sample[key] for sample in samples) / runs
+                    row[f"{key} {label}"] = round(value, 3) if key == "load s" else int(value)
+            results.append(row)
+    finally:
+        await shutdown_browsers()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure page loads with and without request blocking")
+    parser.add_argument("--browser", default="chrome")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(bench(args.browser, args.runs))
+    for row in results:
+        print("  ".join(f"{key}: {value}" for key, value in row.items()))
+    print(f"blocked: {get_blocker().stats()}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
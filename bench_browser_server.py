@@ -0,0 +1,51 @@
+#####################
+#
+# python bench_browser_server.py test_w1.py -n 5
+#
+# Runs the same pytest selection once per --browser-mode and reports
+# total wall time and peak RSS of the whole process tree
+# (pytest, xdist workers, drivers and browsers). Linux only for RSS.
+#
+#####################
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from demoqa import tree_rss_kb
+
+
+def run(mode: str, pytest_args: list[str], interval: float) -> dict:
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "--browser-mode", mode, *pytest_args]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak = 0
+    while process.poll() is None:
+        peak = max(peak, tree_rss_kb(process.pid))
+        time.sleep(interval)
+    return {
+        "mode": mode,
+        "exit code": process.returncode,
+        "wall time s": round(time.perf_counter() - start, 2),
+        "peak rss mb": round(peak / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-worker browser launch with a shared browser server")
+    parser.add_argument("--interval", type=float, default=0.2, help="RSS sampling interval in seconds")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args, pytest_args = parser.parse_known_args()
+
+    results = [run(mode, pytest_args, args.interval) for mode in ("launch", "server")]
+    for result in results:
+        print("  ".join(f"{key}: {value}" for key, value in result.items()))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#####################
+#
+# python bench_launch.py --runs 5
+# python bench_launch.py chrome chromium-shell --mode headed --url https://demoqa.com/books
+#
+# Launches every given launch profile (default: all of demoqa.LAUNCH_PROFILES)
+# on a fresh driver and reports launch, context + page and first navigation
+# times and launch-to-first-page time (medians over --runs). Without --url the
+# first page is the local stub server's /login page.
+#
+#####################
+
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+from playwright.async_api import async_playwright
+
+from demoqa import LAUNCH_PROFILES, configure_launch, launch_profile
+from stub_server import start_stub_server
+
+
+async def run_once(name: str, url: str) -> dict:
+    profile = launch_profile(name)
+    async with async_playwright() as playwright:
+        started = time.perf_counter()
+        browser = await getattr(playwright, profile.engine).launch(**profile.options())
+        launched = time.perf_counter()
+        try:
+            context = await browser.new_context()
+            page = await context.new_page()
+            opened = time.perf_counter()
+            await page.goto(url, wait_until="load")
+            loaded = time.perf_counter()
+        finally:
+            await browser.close()
+    return {
+        "launch ms": (launched - started) * 1000,
+        "page ms": (opened - launched) * 1000,
+        "navigation ms": (loaded - opened) * 1000,
+        "first page ms": (loaded - started) * 1000,
+    }
+
+
+def bench(name: str, url: str, runs: int) -> dict:
+    row = {"profile": launch_profile(name).describe()}
+    try:
+        samples = [asyncio.run(run_once(name, url)) for _ in range(runs)]
+    except Exception as e:
+        row["error"] = str(e).splitlines()[0]
+        return row
+    for key in samples[0]:
+        row[key] = round(statistics.median(sample[key] for sample in samples), 1)
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure launch-to-first-page time per launch profile")
+    parser.add_argument("profiles", nargs="*", default=list(LAUNCH_PROFILES))
+    parser.add_argument("--mode", choices=["headed", "headless", "shell"], default=None,
+                        help="override every profile's mode")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--url", default=None, help="first page, default: the stub server's /login")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    configure_launch(mode=args.mode)
+    server = None if args.url else start_stub_server()
+    url = args.url or server.url + "/login"
+    try:
+        results = [bench(name, url, args.runs) for name in args.profiles]
+    finally:
+        if server:
+            server.close()
+    for row in results:
+        print("  ".join(f"{key}: {value}" for key, value in row.items()))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#####################
+#
+# python bench_selectors.py --browser chrome --slow-ms 20
+#
+# Opens every page object that declares Loc locators and times how long each
+# one takes to resolve (locator.count(), best of --repeat, minus one
+# protocol round trip). Selectors slower than --slow-ms, matching nothing or
+# matching more than one element are flagged; the exit status is 1 when any
+# is, so the check can gate a CI job.
+#
+#####################
+
+import sys
+import json
+import asyncio
+import argparse
+
+from demoqa import (
+    BooksPage,
+    SelectPage,
+    TextBoxPage,
+    DragPage,
+    LoginPage,
+    RegisterPage,
+    init_browser,
+    close_browser,
+    shutdown_browsers,
+)
+
+PAGES = [BooksPage, SelectPage, TextBoxPage, DragPage, LoginPage, RegisterPage]
+
+
+async def check(page_cls, browser_type: str, slow_ms: float, repeat: int) -> list[dict]:
+    session = await init_browser(browser_type)
+    try:
+        page_object = page_cls(session)
+        await page_object.navigate(wait_until="load")
+        return await page_object.selector_health(slow_ms=slow_ms, repeat=repeat)
+    finally:
+        await close_browser(session)
+
+
+async def bench(browser_type: str, slow_ms: float, repeat: int) -> list[dict]:
+    results = []
+    try:
+        for page_cls in PAGES:
+            if page_cls.locators():
+                results += await check(page_cls, browser_type, slow_ms, repeat)
+    finally:
+        await shutdown_browsers()
+    return results
+
+
+def problems(row: dict) -> list[str]:
+    found = []
+    if row.get("error"):
+        found.append("error")
+    elif row["matches"] == 0:
+        found.append("missing")
+    elif row["matches"] > 1:
+        # an action on it would fail playwright's strict mode
+        found.append("ambiguous")
+    if row["slow"]:
+        found.append("slow")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time every registered page object locator")
+    parser.add_argument("--browser", default="chrome")
+    parser.add_argument("--slow-ms", type=float, default=20.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(bench(args.browser, args.slow_ms, args.repeat))
+    flagged = 0
+    for row in sorted(results, key=lambda row: row["ms"] if row["ms"] is not None else float("inf"), reverse=True):
+        found = problems(row)
+        flagged += bool(found)
+        print(f"{row['ms']} ms  {row['page']}.{row['locator']}  {row['selector']}  "
+              f"matches: {row['matches']}" + (f"  <- {', '.join(found)}" if found else ""))
+    print(f"{len(results)} locators, {flagged} flagged")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=4)
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
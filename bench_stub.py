@@ -0,0 +1,99 @@
+#####################
+#
+# python bench_stub.py --browser chrome --runs 10
+#
+# Framework overhead with the network taken out: for every page object the
+# stub server has a page for, times a raw Playwright navigation (new page,
+# goto with the class's ready_state, close) against the same page opened
+# through the page object (async with PageClass(session)), all on the local
+# stub server. The difference is what the page object layer costs per page:
+# pools, request blocking, readiness waits, load history, action timing.
+#
+#####################
+
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from urllib.parse import urlparse
+
+from demoqa import (
+    BooksPage,
+    TextBoxPage,
+    LoginPage,
+    init_browser,
+    close_browser,
+    shutdown_browsers,
+    set_base_url,
+    site_url,
+)
+from stub_server import start_stub_server, page_file
+
+PAGES = [BooksPage, TextBoxPage, LoginPage]
+
+
+async def raw(page_cls, session) -> float:
+    started = time.perf_counter()
+    page = await session.context.new_page()
+    await page.goto(site_url(page_cls.url), wait_until=page_cls.ready_state)
+    if page_cls.ready_selector:
+        await page.locator(page_cls.ready_selector).first.wait_for(state="attached")
+    await page.close()
+    return (time.perf_counter() - started) * 1000
+
+
+async def page_object(page_cls, session) -> float:
+    started = time.perf_counter()
+    async with page_cls(session):
+        pass
+    return (time.perf_counter() - started) * 1000
+
+
+async def bench(browser_type: str, runs: int) -> list[dict]:
+    results = []
+    session = await init_browser(browser_type)
+    try:
+        for page_cls in PAGES:
+            if page_file(urlparse(page_cls.url).path) is None:
+                continue
+            # one of each first, so neither side pays for the first load
+            await raw(page_cls, session)
+            await page_object(page_cls, session)
+            samples = {"raw ms": [], "page object ms": []}
+            for _ in range(runs):
+                samples["raw ms"].append(await raw(page_cls, session))
+                samples["page object ms"].append(await page_object(page_cls, session))
+            row = {"page": page_cls.__name__}
+            for key, values in samples.items():
+                row[key] = round(statistics.median(values), 2)
+            row["overhead ms"] = round(row["page object ms"] - row["raw ms"], 2)
+            results.append(row)
+    finally:
+        await close_browser(session)
+        await shutdown_browsers()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure page object overhead against the local stub server")
+    parser.add_argument("--browser", default="chrome")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    set_base_url(server.url)
+    try:
+        results = asyncio.run(bench(args.browser, args.runs))
+    finally:
+        server.close()
+    for row in results:
+        print("  ".join(f"{key}: {value}" for key, value in row.items()))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import json
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Optional
+# private: where the bundled node driver is and its environment; requirements.txt
+# pins the playwright version this was checked against
+from playwright._impl._driver import compute_driver_executable, get_driver_env
+
+from demoqa import _launch_options
+
+# playwright-python has no launch_server, so the bundled node driver runs
+# playwright-core's launchServer and prints the ws endpoint on stdout.
+# The server lives until our end of stdin is closed.
+_SERVER_SCRIPT = """
+const playwright = require(process.argv[1]);
+const [engine, options] = [process.argv[2], JSON.parse(process.argv[3])];
+playwright[engine].launchServer(options).then(server => {
+    process.stdout.write(server.wsEndpoint() + '\\n');
+    process.stdin.on('end', () => server.close().then(() => process.exit(0)));
+    process.stdin.resume();
+}).catch(error => {
+    process.stderr.write(String(error && error.message || error) + '\\n');
+    process.exit(1);
+});
+"""
+
+_NODE_OPTION_NAMES = {
+    "headless": "headless",
+    "executable_path": "executablePath",
+    "args": "args",
+    "channel": "channel",
+    "firefox_user_prefs": "firefoxUserPrefs",
+}
+
+
+class BrowserServer:
+    def __init__(self, browser_type: str, process: subprocess.Popen, ws_endpoint: str, log_path: str) -> None:
+        self.browser_type = browser_type
+        self.process = process
+        self.ws_endpoint = ws_endpoint
+        # the driver's and the browser's stderr, a file so a chatty browser can't fill a pipe
+        self.log_path = log_path
+
+    def close(self, timeout: float = 10) -> None:
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        try:
+            os.remove(self.log_path)
+        except OSError:
+            pass
+
+
+def _read_line(process: subprocess.Popen, timeout: float) -> Optional[str]:
+    # the first stdout line, "" when the driver exited first, None when it printed nothing in time
+    lines = []
+    reader = threading.Thread(target=lambda: lines.append(process.stdout.readline()), daemon=True)
+    reader.start()
+    reader.join(timeout)
+    return lines[0].strip() if lines else None
+
+
+def launch_server(browser_type: str, timeout: float = 60) -> BrowserServer:
+    engine, options = _launch_options(browser_type)
+    node_options = {"host": "127.0.0.1", "port": 0}
+    for name, value in options.items():
+        if name in _NODE_OPTION_NAMES and value is not None:
+            node_options[_NODE_OPTION_NAMES[name]] = value
+
+    node, cli = compute_driver_executable()
+    log_fd, log_path = tempfile.mkstemp(prefix=f"browser-server-{browser_type}-", suffix=".log")
+    with os.fdopen(log_fd, "w") as log:
+        process = subprocess.Popen(
+            [node, "-e", _SERVER_SCRIPT, str(Path(cli).parent), engine, json.dumps(node_options)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=log,
+            env=get_driver_env(),
+            text=True,
+        )
+    ws_endpoint = _read_line(process, timeout)
+    if not ws_endpoint:
+        server = BrowserServer(browser_type, process, "", log_path)
+        if ws_endpoint is None:
+            # hung before printing the endpoint
+            process.kill()
+        process.wait()
+        with open(log_path) as log:
+            error = log.read().strip()
+        server.close()
+        raise RuntimeError(f"Could not start {browser_type} browser server"
+                           f"{'' if ws_endpoint == '' else f' within {timeout:g}s'}: {error}")
+    return BrowserServer(browser_type, process, ws_endpoint, log_path)
+
+
+def launch_servers(browser_types: list[str]) -> dict[str, BrowserServer]:
+    servers = {}
+    try:
+        for browser_type in browser_types:
+            servers[browser_type] = launch_server(browser_type)
+    except Exception:
+        for server in servers.values():
+            server.close()
+        raise
+    return servers
@@ -0,0 +1,293 @@
+#####################
+#
+# pytest -sv test_w1.py --concurrency 4
+#
+# Runs tests marked `concurrent` in batches of up to --concurrency items.
+# Setup and teardown of every item still go through pytest one by one, only
+# the test bodies of a batch run together in the shared asyncio loop:
+#
+#   setup(item1), park(item1), setup(item2), park(item2), ...
+#   gather(call(item1), call(item2), ...)
+#   unpark + teardown each item
+#
+# Parking detaches the item's function-scoped fixture values from pytest's
+# setup stack so the next item can get its own (e.g. its own BrowserContext
+# from the `browser` fixture). Reports are built per item, so rep_call and
+# the terminal output stay attributed to the right test.
+#
+# Every call runs the item's pytest_runtest_call hooks (xfail handling,
+# pytest_pyfunc_call, other plugins' wrappers) in a thread of its own, while
+# the test coroutine itself runs in the shared loop. Three plugins keep
+# process-wide state per call and are left out of the call phase:
+#
+#   - capture and logging: print() output and log records are routed to the
+#     task that produced them instead, and attached to the item's report as
+#     the usual "Captured stdout/stderr/log call" sections. Output written to
+#     the file descriptors directly (subprocesses) and caplog are not captured.
+#   - pytest-playwright: Playwright has one soft assertion scope per process,
+#     so expect.soft() raises in a concurrent test; leave such tests unmarked.
+#
+# Setup parking, xdist's report check and the loop runner rely on pytest,
+# pytest-xdist and pytest-asyncio internals: --concurrency above 1 refuses to
+# start on other versions than the ones in TESTED_VERSIONS
+# (test_concurrent_runner.py is the check to rerun before adding one).
+#
+#####################
+
+import io
+import sys
+import asyncio
+import logging
+import contextlib
+import contextvars
+from typing import Optional
+from importlib.metadata import version, PackageNotFoundError
+
+import pytest
+from pytest_asyncio.plugin import PytestAsyncioFunction
+
+_BATCH_KEY = pytest.StashKey[list]()
+# distribution -> major.minor releases whose internals the runner was tested against
+TESTED_VERSIONS = {
+    "pytest": ("9.1",),
+    "pytest-xdist": ("3.8",),
+    "pytest-asyncio": ("1.4",),
+}
+# the call phase's stdout/stderr/log buffers of the test running in this task
+_captured: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("captured", default=None)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--concurrency", action="store", type=int, default=1,
+                     help="run up to N tests marked `concurrent` at once in one event loop")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "concurrent: test body may run concurrently with its neighbours")
+    config.stash[_BATCH_KEY] = []
+    if config.getoption("--concurrency") > 1:
+        untested = _untested_versions()
+        if untested:
+            raise pytest.UsageError(f"--concurrency relies on internals of {', '.join(untested)}, which this "
+                                    "runner was not tested with; run without --concurrency or install a tested "
+                                    "version (concurrent_runner.TESTED_VERSIONS)")
+
+
+def _untested_versions() -> list[str]:
+    untested = []
+    for dist, releases in TESTED_VERSIONS.items():
+        try:
+            installed = version(dist)
+        except PackageNotFoundError:
+            # xdist: not installed, not used
+            continue
+        if ".".join(installed.split(".")[:2]) not in releases:
+            untested.append(f"{dist} {installed} (tested: {', '.join(releases)})")
+    return untested
+
+
+def _eligible(item) -> bool:
+    return (
+        isinstance(item, PytestAsyncioFunction)
+        and item.get_closest_marker("concurrent") is not None
+        and item._loop_scope != "function"
+        and not item.config.getoption("setuponly", False)
+    )
+
+
+def _same_batch(item, other) -> bool:
+    return other is not None and _eligible(other) and other.parent is item.parent \
+        and other._loop_scope == item._loop_scope
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item, nextitem):
+    limit = item.config.getoption("--concurrency")
+    if limit <= 1 or not _eligible(item):
+        return None
+    batch = item.config.stash[_BATCH_KEY]
+    batch.append(item)
+    if len(batch) < limit and _same_batch(item, nextitem):
+        # reported once the batch runs
+        return True
+    items = list(batch)
+    batch.clear()
+    _run_batch(items, nextitem)
+    return True
+
+
+class _Parked:
+    def __init__(self, item) -> None:
+        setupstate = item.session._setupstate
+        self.stack_entry = setupstate.stack.pop(item, None)
+        # contextvars set by async fixtures (e.g. the current BrowserSession)
+        self.context = contextvars.copy_context()
+        self.fixtures = []
+        for fixturedef in list(item._request._fixture_defs.values()):
+            if fixturedef.scope == "function" and fixturedef.cached_result is not None:
+                self.fixtures.append((fixturedef, fixturedef.cached_result, list(fixturedef._finalizers)))
+                fixturedef.cached_result = None
+                fixturedef._finalizers.clear()
+
+    def restore(self, item) -> None:
+        if self.stack_entry is not None:
+            item.session._setupstate.stack[item] = self.stack_entry
+        for fixturedef, cached_result, finalizers in self.fixtures:
+            fixturedef.cached_result = cached_result
+            fixturedef._finalizers[:] = finalizers
+
+
+def _xdist_worker(config):
+    if not hasattr(config, "workerinput"):
+        return None
+    # xdist runs remote.py through execnet, so match the class by name
+    for plugin in config.pluginmanager.get_plugins():
+        if type(plugin).__name__ == "WorkerInteractor":
+            return plugin
+    return None
+
+
+@contextlib.contextmanager
+def _reporting_as(item):
+    # xdist workers check that every report belongs to the item they are running
+    worker = _xdist_worker(item.config)
+    if worker is None:
+        yield
+        return
+    running = worker.item_index
+    worker.item_index = item.session.items.index(item)
+    try:
+        yield
+    finally:
+        worker.item_index = running
+
+
+def _reraise(config) -> tuple:
+    if config.getoption("usepdb", False):
+        return (pytest.exit.Exception,)
+    return (pytest.exit.Exception, KeyboardInterrupt)
+
+
+def _run_phase(item, when: str, **kwargs) -> pytest.TestReport:
+    # the setup/teardown part of pytest's runtest protocol, through its public hooks
+    hook = item.ihook.pytest_runtest_setup if when == "setup" else item.ihook.pytest_runtest_teardown
+    call = pytest.CallInfo.from_call(lambda: hook(item=item, **kwargs), when=when,
+                                     reraise=_reraise(item.config))
+    with _reporting_as(item):
+        report = item.ihook.pytest_runtest_makereport(item=item, call=call)
+        item.ihook.pytest_runtest_logreport(report=report)
+    if call.excinfo is not None and report.failed:
+        item.ihook.pytest_exception_interact(node=item, call=call, report=report)
+    return report
+
+
+class _TaskStream(io.TextIOBase):
+    # sys.stdout/sys.stderr while a batch runs: text goes to the writing test's buffer
+    def __init__(self, name: str, stream) -> None:
+        self.name = name
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        buffers = _captured.get()
+        if buffers is None or self.name not in buffers:
+            return self.stream.write(text)
+        return buffers[self.name].write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+
+class _TaskLogHandler(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        buffers = _captured.get()
+        if buffers is not None:
+            buffers["log"].write(self.format(record) + "\n")
+
+
+@contextlib.contextmanager
+def _routed_output(config):
+    capture = config.getoption("capture", "fd") != "no"
+    handler = _TaskLogHandler()
+    handler.setFormatter(logging.Formatter(config.getini("log_format"), config.getini("log_date_format")))
+    streams = {"stdout": sys.stdout, "stderr": sys.stderr}
+    if capture:
+        sys.stdout, sys.stderr = _TaskStream("stdout", sys.stdout), _TaskStream("stderr", sys.stderr)
+    logging.getLogger().addHandler(handler)
+    try:
+        yield capture
+    finally:
+        logging.getLogger().removeHandler(handler)
+        sys.stdout, sys.stderr = streams["stdout"], streams["stderr"]
+
+
+def _call_hook(config):
+    # pytest_runtest_call without the plugins with process-wide state, see the header
+    pluginmanager = config.pluginmanager
+    excluded = [pluginmanager.get_plugin(name) for name in ("capturemanager", "logging-plugin", "playwright")]
+    return pluginmanager.subset_hook_caller("pytest_runtest_call", [plugin for plugin in excluded if plugin])
+
+
+async def _call(item, loop: asyncio.AbstractEventLoop, capture: bool) -> pytest.CallInfo:
+    buffers = {"log": io.StringIO()}
+    if capture:
+        buffers.update(stdout=io.StringIO(), stderr=io.StringIO())
+    _captured.set(buffers)
+    test_function = item.obj
+
+    def run_in_loop(**kwargs) -> None:
+        # pytest_pyfunc_call's call of the test, from the hook thread into the shared loop
+        asyncio.run_coroutine_threadsafe(test_function(**kwargs), loop).result()
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(item, "obj", run_in_loop)
+        # skip pytest-asyncio's runtest, which would run the loop itself
+        patch.setattr(item, "runtest", lambda: item.ihook.pytest_pyfunc_call(pyfuncitem=item))
+        hook = _call_hook(item.config)
+        call = await asyncio.to_thread(pytest.CallInfo.from_call, lambda: hook(item=item), when="call",
+                                       reraise=_reraise(item.config))
+    for key, buffer in buffers.items():
+        item.add_report_section("call", key, buffer.getvalue().strip() if key == "log" else buffer.getvalue())
+    return call
+
+
+async def _gather(items: list, contexts: list, capture: bool) -> list:
+    loop = asyncio.get_running_loop()
+    tasks = [loop.create_task(_call(item, loop, capture), context=context) for item, context in zip(items, contexts)]
+    return await asyncio.gather(*tasks)
+
+
+def _run_batch(items: list, nextitem) -> None:
+    parked = {}
+    ready = []
+    for item in items:
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        report = _run_phase(item, "setup")
+        parked[item] = _Parked(item)
+        if report.passed:
+            ready.append(item)
+
+    if ready:
+        runner = ready[0]._request.getfixturevalue(f"_{ready[0]._loop_scope}_scoped_runner")
+        with _routed_output(ready[0].config) as capture:
+            calls = runner.run(_gather(ready, [parked[item].context for item in ready], capture))
+        for item, call in zip(ready, calls):
+            report = item.ihook.pytest_runtest_makereport(item=item, call=call)
+            with _reporting_as(item):
+                item.ihook.pytest_runtest_logreport(report=report)
+
+    # reverse order so contextvar resets done by async fixtures unwind cleanly
+    first = items[0]
+    for item in reversed(items):
+        parked[item].restore(item)
+        next_for_item = nextitem if item is first else first
+        if item.session.shouldfail or item.session.shouldstop:
+            next_for_item = None if item is first else first
+        try:
+            _run_phase(item, "teardown", nextitem=next_for_item)
+        finally:
+            item._request = False
+            item.funcargs = None
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
@@ -1,14 +1,53 @@
 import pytest
 import json
+import types
 import pytest_asyncio
 from typing import AsyncGenerator
-from playwright.async_api import async_playwright, APIRequestContext
+from urllib.parse import urlparse
+from playwright.async_api import APIRequestContext
 
+import demoqa
 from demoqa import (
     init_browser,
-    close_browser
+    close_browser,
+    settle_session,
+    get_pool,
+    get_api_clients,
+    shutdown_browsers,
+    TraceRecorder,
+    ScreencastRecorder,
+    HarStore,
+    BlockPolicy,
+    get_blocker,
+    get_load_history,
+    get_page_pools,
+    ResourceTracker,
+    get_action_timer,
+    get_perf_metrics,
+    LoginPage,
+    set_base_url,
+    configure_launch,
+    launch_profile,
+    launch_duplicates,
+    API_CLIENTS
 )
+from auth_cache import AuthStateCache, DEFAULT_BASE_URL, api_state_login, ui_login
+from stub_server import StubServer, start_stub_server, page_file
+import data_source
+from data_source import DataRecord
 
+pytest_plugins = ["concurrent_runner", "duration_scheduler"]
+
+STATS_KEY = pytest.StashKey[dict]()
+SERVERS_KEY = pytest.StashKey[dict]()
+TRACER_KEY = pytest.StashKey[TraceRecorder]()
+SCREENCAST_KEY = pytest.StashKey[ScreencastRecorder]()
+AUTH_KEY = pytest.StashKey[AuthStateCache]()
+HAR_KEY = pytest.StashKey[HarStore]()
+TRACKER_KEY = pytest.StashKey[ResourceTracker]()
+STUB_KEY = pytest.StashKey[StubServer]()
+TRACE_DETAILS = ["screenshots", "snapshots", "sources"]
+BROWSER_TYPES = ['chrome', 'msedge', 'firefox']
 SESSION_DATA = [
     {
         "username": "test",
@@ -22,22 +61,304 @@ SESSION_DATA = [
 
 def pytest_addoption(parser):
 
-    parser.addoption("--record-video", action="store", choices=["on", "failure"], default=None)
+    parser.addoption("--record-video", action="store", choices=["on", "failure", "failure-frames"], default=None,
+                     help="failure-frames: keep recent screencast frames in memory, write them only for failed tests")
+    parser.addoption("--video-buffer-mb", action="store", type=float, default=8,
+                     help="memory cap per page for --record-video failure-frames")
     parser.addoption("--slow", action="store", default=None, help="for slow_mo")
+    parser.addoption("--browser-mode", action="store", choices=["launch", "server"], default="launch",
+                     help="launch: every worker launches its own browsers, "
+                          "server: one shared browser server per browser type, workers connect to it")
+    parser.addoption("--auth-login", action="store", choices=["api", "ui"], default="api",
+                     help="how authenticated_state logs in: Account API calls or the login form")
+    parser.addoption("--auth-ttl", action="store", type=float, default=1800,
+                     help="seconds a cached login (storage_state) is reused across tests and workers")
+    parser.addoption("--har", action="store", choices=["off", "record", "replay", "auto"], default="off",
+                     help="record each test's network into a HAR, or serve it back from the HAR "
+                          "(auto: replay when the test has a HAR, record otherwise)")
+    parser.addoption("--har-dir", action="store", default="hars",
+                     help="HAR files and their content-addressed resources")
+    parser.addoption("--har-unmatched", action="store", choices=["fail", "passthrough", "abort"], default="fail",
+                     help="requests missing from the HAR on replay: abort and fail the test, go to the network, "
+                          "or abort silently")
+    parser.addoption("--block", action="store", default=None,
+                     help="block these requests on every page on top of the page objects' own policies: "
+                          "comma separated ads,images,fonts,media,stylesheets; off disables all blocking")
+    parser.addoption("--load-history", action="store", default=".load-history.json",
+                     help="JSON file of past page load times that navigate()/expect_title() timeouts are "
+                          "derived from; off keeps the fixed 60s (30s for expect_title)")
+    parser.addoption("--track-resources", action="store_true", default=False,
+                     help="report pages/contexts each test left open and RSS of the browsers (Linux /proc)")
+    parser.addoption("--fail-on-leak", action="store_true", default=False,
+                     help="fail tests that leave pages or contexts open (implies --track-resources)")
+    parser.addoption("--resource-report", action="store", default=None,
+                     help="write the per-test resource records to this JSON file")
+    parser.addoption("--time-actions", action="store_true", default=False,
+                     help="time every page object action (implied by --action-report)")
+    parser.addoption("--action-report", action="store", default=None,
+                     help="write the action timings, slowest actions and per page class totals to this JSON file")
+    parser.addoption("--perf-metrics", action="store_true", default=False,
+                     help="collect browser metrics on every page object navigation and fail tests over "
+                          "their page's perf_budget (implied by --perf-report)")
+    parser.addoption("--perf-report", action="store", default=None,
+                     help="write the per-navigation browser metrics to this JSON file")
+    parser.addoption("--launch-profile", action="store", default=None,
+                     help="browser type=launch profile pairs, e.g. chrome=chromium-shell,firefox=firefox "
+                          f"(profiles: {', '.join(demoqa.LAUNCH_PROFILES)})")
+    parser.addoption("--launch-mode", action="store", choices=["headed", "headless", "shell"], default=None,
+                     help="override the mode of every launch profile (default: each profile's, --headed: headed)")
+    parser.addoption("--stub-server", action="store_true", default=False,
+                     help="serve demoqa.com and reqres.in from the local stand-in in stub_server.py, "
+                          "started once and shared by all workers")
+    parser.addoption("--api-base-url", action="store", default=None,
+                     help="send the API suites to this host instead of reqres.in/demoqa.com (e.g. the stub server)")
+    parser.addoption("--trace-detail", action="store", default=",".join(TRACE_DETAILS),
+                     help="comma separated subset of screenshots,snapshots,sources recorded with --tracing")
+
+def pytest_configure(config):
+    details = [detail for detail in config.getoption("--trace-detail").split(",") if detail]
+    unknown = set(details) - set(TRACE_DETAILS)
+    if unknown:
+        raise pytest.UsageError(f"Unknown --trace-detail value(s): {', '.join(sorted(unknown))}")
+    config.stash[TRACER_KEY] = TraceRecorder(
+        mode=config.getoption("--tracing"),
+        output_dir=config.getoption("--output"),
+        **{detail: detail in details for detail in TRACE_DETAILS}
+    )
+    config.stash[SCREENCAST_KEY] = ScreencastRecorder(
+        max_bytes=int(config.getoption("--video-buffer-mb") * 1024 * 1024),
+        output_dir=config.getoption("--output")
+    )
+    block = config.getoption("--block")
+    try:
+        if block == "off":
+            get_blocker().configure(enabled=False)
+        elif block:
+            get_blocker().configure(BlockPolicy.from_names(block))
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+    profiles = [pair.split("=", 1) for pair in (config.getoption("--launch-profile") or "").split(",") if pair]
+    try:
+        if any(len(pair) != 2 for pair in profiles):
+            raise ValueError("expected browser type=profile pairs")
+        configure_launch(
+            dict(profiles),
+            config.getoption("--launch-mode") or ("headed" if config.getoption("--headed") else None)
+        )
+    except ValueError as e:
+        raise pytest.UsageError(f"--launch-profile: {e}")
+    load_history = config.getoption("--load-history")
+    get_load_history().load(None if load_history == "off" else load_history)
+    config.stash[TRACKER_KEY] = ResourceTracker()
+    get_action_timer().configure(bool(config.getoption("--time-actions") or config.getoption("--action-report")))
+    get_perf_metrics().configure(bool(config.getoption("--perf-metrics") or config.getoption("--perf-report")))
+    config.stash[HAR_KEY] = HarStore(
+        mode=config.getoption("--har"),
+        har_dir=config.getoption("--har-dir"),
+        unmatched=config.getoption("--har-unmatched")
+    )
+    config.stash[AUTH_KEY] = AuthStateCache(
+        ttl=config.getoption("--auth-ttl"),
+        login=api_state_login if config.getoption("--auth-login") == "api" else ui_login
+    )
+    if not hasattr(config, "workerinput"):
+        if config.getoption("--stub-server"):
+            config.stash[STUB_KEY] = start_stub_server()
+        if config.getoption("--browser-mode") == "server":
+            from browser_server import launch_servers
+            browser_channel = config.getoption("browser_channel")
+            browser_types = [browser_channel] if browser_channel else _distinct_browser_types()
+            try:
+                config.stash[SERVERS_KEY] = launch_servers(browser_types)
+            except RuntimeError as e:
+                raise pytest.UsageError(str(e))
+    # page objects follow the stub server or --base-url
+    set_base_url(_site_base_url(config))
+
+def pytest_report_header(config):
+    duplicates = launch_duplicates(BROWSER_TYPES)
+    return "launch profiles: " + "; ".join(
+        f"{browser_type} -> {launch_profile(browser_type).describe()}"
+        + (f" (skipped, same as {duplicates[browser_type]})" if browser_type in duplicates else "")
+        for browser_type in BROWSER_TYPES)
+
+def _distinct_browser_types() -> list[str]:
+    # one of each browser actually launched: a fallback that duplicates another type runs nothing new
+    duplicates = launch_duplicates(BROWSER_TYPES)
+    return [browser_type for browser_type in BROWSER_TYPES if browser_type not in duplicates]
+
+def pytest_unconfigure(config):
+    for server in config.stash.get(SERVERS_KEY, {}).values():
+        server.close()
+    if STUB_KEY in config.stash:
+        config.stash[STUB_KEY].close()
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    servers = node.config.stash.get(SERVERS_KEY, {})
+    node.workerinput["browser_servers"] = {name: server.ws_endpoint for name, server in servers.items()}
+    node.workerinput["stub_url"] = _stub_url(node.config)
+
+@pytest.hookimpl(tryfirst=True, optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    if config.getoption("--duration-schedule"):
+        from duration_scheduler import DurationScheduling
+        return DurationScheduling(config, log, group_of=_browser_of)
+    return None
+
+def _browser_of(nodeid: str) -> str | None:
+    # the browser fixture's param in the test id, None for api tests
+    params = nodeid.rpartition("[")[2].rstrip("]").split("-") if nodeid.endswith("]") else []
+    return next((param for param in params if param in BROWSER_TYPES), None)
 
+def _stub_url(config) -> str | None:
+    if hasattr(config, "workerinput"):
+        return config.workerinput.get("stub_url")
+    server = config.stash.get(STUB_KEY, None)
+    return server.url if server else None
+
+def _tracks_resources(config) -> bool:
+    return config.getoption("--track-resources") or config.getoption("--fail-on-leak")
+
+def _site_base_url(config) -> str | None:
+    return _stub_url(config) or config.getoption("--base-url")
+
+def _server_endpoints(config) -> dict:
+    if hasattr(config, "workerinput"):
+        return config.workerinput.get("browser_servers", {})
+    return {name: server.ws_endpoint for name, server in config.stash.get(SERVERS_KEY, {}).items()}
+
+@pytest.hookimpl(tryfirst=True)
 def pytest_generate_tests(metafunc):
+    if metafunc.definition.get_closest_marker("unit"):
+        # dropped from the closure before the browser params are applied: runs once, nothing launched
+        metafunc.fixturenames[:] = [name for name in metafunc.fixturenames if name not in ("browser", "browser_pool")]
+    if metafunc.definition.get_closest_marker("api") and 'browser' in metafunc.fixturenames:
+        # applied like a parametrize mark so it replaces the browser fixture params
+        metafunc.definition.add_marker(pytest.mark.parametrize('browser', [None], indirect=True, ids=['api']))
     if 'test_data' in metafunc.fixturenames:
-        data_file = metafunc.module.__file__[:-2] + 'json'
-        try:
-            with open(data_file) as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                metafunc.parametrize('test_data', data, indirect=True)
-        except FileNotFoundError:
-            pass
+        # <module>.jsonl/.csv/.json, indexed; the test_data fixture reads each record
+        source = data_source.find_source(metafunc.module.__file__[:-3])
+        if source is not None and source.is_list:
+            metafunc.parametrize('test_data', source.records(), indirect=True)
     if 'session_data' in metafunc.fixturenames:
         metafunc.parametrize('session_data', SESSION_DATA, indirect=True)
 
+def pytest_collection_modifyitems(config, items):
+    if not _stub_url(config):
+        return
+    for item in items:
+        missing = [f"{page_cls.__name__} ({urlparse(page_cls.url).path})" for page_cls in _page_classes(item)
+                   if page_cls.url and page_file(urlparse(page_cls.url).path) is None]
+        if missing:
+            item.add_marker(pytest.mark.skip(reason=f"--stub-server has no page for {', '.join(missing)}"))
+
+def _page_classes(item) -> set[type]:
+    # demoqa page objects the test body names (nested functions included) or prewarms
+    names = {name for m in item.iter_markers("prewarm") for name in m.args}
+    codes = [item.function.__code__] if hasattr(item, "function") else []
+    while codes:
+        code = codes.pop()
+        names.update(code.co_names)
+        codes.extend(const for const in code.co_consts if isinstance(const, types.CodeType))
+    return {page_cls for name in names if isinstance(page_cls := getattr(demoqa, name, None), type)
+            and issubclass(page_cls, demoqa.BasePage)}
+
+def _local_stats(config) -> dict:
+    return {
+        "browser pool": get_pool().stats(),
+        "tracing": config.stash[TRACER_KEY].stats(),
+        "failure video": config.stash[SCREENCAST_KEY].stats(),
+        "auth cache": config.stash[AUTH_KEY].stats(),
+        "har": config.stash[HAR_KEY].stats(),
+        "network blocking": get_blocker().stats(),
+        "page loads": get_load_history().stats(),
+        "page pool": get_page_pools().stats(),
+        "resources": config.stash[TRACKER_KEY].stats(),
+        "api clients": get_api_clients().stats(),
+        "action timing": get_action_timer().stats(),
+        "browser metrics": get_perf_metrics().stats(),
+        "test data": data_source.stats(),
+    }
+
+def _merge_stats(total: dict, stats: dict) -> None:
+    for section, values in stats.items():
+        bucket = total.setdefault(section, {})
+        for key, value in values.items():
+            bucket[key] = bucket.get(key, 0) + value
+
+def pytest_sessionfinish(session):
+    # xdist workers ship their numbers back to the controller
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["pleasewright_stats"] = json.dumps(_local_stats(session.config))
+        workeroutput["load_history"] = json.dumps(get_load_history().new)
+        workeroutput["resource_records"] = json.dumps(session.config.stash[TRACKER_KEY].records)
+        workeroutput["action_records"] = json.dumps(get_action_timer().records)
+        workeroutput["perf_records"] = json.dumps(get_perf_metrics().records)
+    else:
+        # only the controller writes the history, with the workers' samples
+        get_load_history().save()
+        report = session.config.getoption("--resource-report")
+        if report:
+            with open(report, "w") as f:
+                json.dump(session.config.stash[TRACKER_KEY].records, f, indent=4)
+        report = session.config.getoption("--action-report")
+        if report:
+            with open(report, "w") as f:
+                json.dump({**get_action_timer().report(), "records": get_action_timer().records}, f, indent=4)
+        report = session.config.getoption("--perf-report")
+        if report:
+            with open(report, "w") as f:
+                json.dump(get_perf_metrics().records, f, indent=4)
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    workeroutput = getattr(node, "workeroutput", {})
+    stats = workeroutput.get("pleasewright_stats")
+    if stats:
+        _merge_stats(node.config.stash.setdefault(STATS_KEY, {}), json.loads(stats))
+    if workeroutput.get("load_history"):
+        get_load_history().add(json.loads(workeroutput["load_history"]))
+    if workeroutput.get("resource_records"):
+        # the counters arrive with the stats, only keep the per-test rows
+        node.config.stash[TRACKER_KEY].records.extend(json.loads(workeroutput["resource_records"]))
+    if workeroutput.get("action_records"):
+        get_action_timer().records.extend(json.loads(workeroutput["action_records"]))
+    if workeroutput.get("perf_records"):
+        get_perf_metrics().records.extend(json.loads(workeroutput["perf_records"]))
+
+def pytest_terminal_summary(terminalreporter, config):
+    total = {}
+    _merge_stats(total, config.stash.get(STATS_KEY, {}))
+    _merge_stats(total, _local_stats(config))
+    for section, values in total.items():
+        if not any(values.values()):
+            continue
+        terminalreporter.write_sep("-", section)
+        terminalreporter.write_line("  ".join(
+            f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}" for key, value in values.items()
+        ))
+    records = config.stash[TRACKER_KEY].records
+    if records:
+        terminalreporter.write_sep("-", "resources per test")
+        for record in sorted(records, key=lambda r: r["rss peak mb"], reverse=True)[:5]:
+            terminalreporter.write_line(f"{record['rss peak mb']} MB peak, {record['renderers']} renderer(s): {record['test']}")
+        for record in records:
+            if record["open pages"] or record["open contexts"]:
+                terminalreporter.write_line(f"left {record['open pages']} page(s), {record['open contexts']} "
+                                            f"context(s) open: {record['test']} {record['leaked urls']}")
+    if get_action_timer().records:
+        report = get_action_timer().report(top=5)
+        terminalreporter.write_sep("-", "slowest actions")
+        for record in report["slowest"]:
+            terminalreporter.write_line(f"{record['ms']:.0f} ms {record['page']}.{record['action']}"
+                                        f"({record['locator']!r}): {record['test']}")
+        terminalreporter.write_sep("-", "action time per page class")
+        for page, totals in report["per page class"].items():
+            terminalreporter.write_line(f"{page}: {totals['calls']} action(s), {totals['total ms'] / 1000:.2f} s total, "
+                                        f"{totals['mean ms']:.0f} ms mean, {totals['max ms']:.0f} ms max")
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
     outcome = yield
@@ -48,90 +369,132 @@ def pytest_runtest_makereport(item, call):
 def session_data():
     yield SESSION_DATA
 
-@pytest_asyncio.fixture(scope="function", params=['chrome', 'msedge', 'firefox'], autouse=True)
-async def browser(request):
+@pytest_asyncio.fixture(scope="session")
+async def browser_pool(request):
+    # browsers are launched (or connected to) lazily and stay warm for the whole worker session
+    pool = get_pool()
+    pool.use_servers(_server_endpoints(request.config))
+    yield pool
+    await shutdown_browsers()
+
+@pytest_asyncio.fixture(scope="function", params=BROWSER_TYPES, autouse=True)
+async def browser(request, browser_pool):
     markers = request.node.own_markers
     skip_browser = [m.args[0] for m in markers if m.name == "skip_browser"]
     browser_channel = request.config.getoption("browser_channel")
-    if browser_channel is not None and browser_channel != request.param:
+    if request.param is None:
+        # api tests
+        yield None
+    elif browser_channel is not None and browser_channel != request.param:
         pytest.skip()
     elif request.param in skip_browser:
         pytest.skip()
+    elif browser_channel is None and request.param in (duplicates := launch_duplicates(BROWSER_TYPES)):
+        pytest.skip(f"{request.param} launches the same browser as {duplicates[request.param]}: "
+                    f"{launch_profile(request.param).describe()}")
     else:
         storage_state = None
         if 'authenticated_state' in request.fixturenames:
             storage_state = request.getfixturevalue('authenticated_state')
         
+        video_option = request.config.getoption("--record-video")
         config = {
             "browser_type": request.param,
-            "video": request.config.getoption("--record-video"),
+            "video": video_option if video_option != "failure-frames" else None,
             "slow": request.config.getoption("--slow"),
-            "storage_state": storage_state
+            "storage_state": storage_state,
+            "name": request.node.nodeid,
+            "tracer": request.config.stash[TRACER_KEY],
+            "screencast": request.config.stash[SCREENCAST_KEY] if video_option == "failure-frames" else None,
+            "har": request.config.stash[HAR_KEY],
+            "tracker": request.config.stash[TRACKER_KEY] if _tracks_resources(request.config) else None,
+            "prewarm": tuple(getattr(demoqa, name) for m in request.node.iter_markers("prewarm") for name in m.args)
         }
-        await init_browser(**config)
+        session = await init_browser(**config)
         
-        yield
+        yield session
         
         # keep video or not
-        video_option = request.config.getoption("--record-video")
+        # leaks, HAR misses and budgets fail the test too: decided before close_browser keeps or drops the trace
+        await settle_session(session)
+        problems = _session_problems(request.config, session)
+        # no call report when a later fixture failed or skipped during setup
+        rep_call = getattr(request.node, "rep_call", None)
+        failed = rep_call is None or rep_call.failed or bool(problems)
         keep_video = False
         if video_option == "on":
             keep_video = True
-        elif video_option == "failure" and request.node.rep_call.failed:
+        elif video_option in ("failure", "failure-frames") and failed:
             keep_video = True
         
-        await close_browser(keep_video)
+        await close_browser(session, keep_video, failed)
+        if problems:
+            pytest.fail("\n".join(problems))
 
-@pytest_asyncio.fixture(scope="function")
-async def api_request_context() -> AsyncGenerator[APIRequestContext, None]:
-    headers = {
-        'Content-Type': 'application/json',
-        'x-api-key': 'reqres-free-v1'
-    }
-    async with async_playwright() as pw:
-        request_context = await pw.request.new_context(
-            base_url="https://reqres.in/", extra_http_headers=headers
-        )
+def _session_problems(config, session) -> list[str]:
+    problems = []
+    leaks = session.resources or {}
+    if config.getoption("--fail-on-leak") and (leaks.get("open pages") or leaks.get("open contexts")):
+        problems.append(f"Left open: {leaks['open pages']} page(s) {leaks['leaked urls']}, "
+                        f"{leaks['open contexts']} context(s)")
+    if session.har_misses and session.har.unmatched == "fail":
+        problems.append(f"{len(session.har_misses)} request(s) not in the HAR, first: {session.har_misses[0]}")
+    over_budget = [f"{record['page']}: {', '.join(record['over budget'])}" for record in session.perf
+                   if record["over budget"]]
+    if over_budget:
+        problems.append(f"Performance budget exceeded: {'; '.join(over_budget)}")
+    return problems
+
+async def _api_client(request, base_url: str, headers: dict) -> AsyncGenerator[APIRequestContext, None]:
+    # shared per worker unless the test asks for its own cookies with @pytest.mark.api(isolated=True)
+    base_url = request.config.getoption("--api-base-url") or _stub_url(request.config) or base_url
+    marker = request.node.get_closest_marker("api")
+    clients = get_api_clients()
+    if marker is not None and marker.kwargs.get("isolated"):
+        request_context = await clients.isolated_client(base_url, headers)
         yield request_context
         await request_context.dispose()
+    else:
+        yield await clients.get(base_url, headers)
 
 @pytest_asyncio.fixture(scope="function")
-async def api_request_context_final() -> AsyncGenerator[APIRequestContext, None]:
-    headers = {
-        'Content-Type': 'application/json',
-    }
-    async with async_playwright() as pw:
-        request_context = await pw.request.new_context(
-            base_url="https://demoqa.com/", extra_http_headers=headers
-        )
+async def api_request_context(request, browser_pool) -> AsyncGenerator[APIRequestContext, None]:
+    async for request_context in _api_client(request, *API_CLIENTS["api_request_context"]):
         yield request_context
-        await request_context.dispose()
+
+@pytest_asyncio.fixture(scope="function")
+async def api_request_context_final(request, browser_pool) -> AsyncGenerator[APIRequestContext, None]:
+    async for request_context in _api_client(request, *API_CLIENTS["api_request_context_final"]):
+        yield request_context
+
+@pytest.fixture(scope="session")
+def stub_server():
+    server = start_stub_server()
+    yield server
+    server.close()
 
 @pytest.fixture(scope="function")
 def test_data(request):
-    yield request.param
+    yield _record(request.param)
 
-@pytest_asyncio.fixture(scope="session")
-async def authenticated_state():
-    # temp browser to get auth state
-    temp_playwright = await async_playwright().start()
-    temp_browser = await temp_playwright.chromium.launch(
-        headless=False,
-        executable_path="C:/Program Files/Google/Chrome/Application/chrome.exe"
-    )
-    temp_context = await temp_browser.new_context()
-    temp_page = await temp_context.new_page()
-    
-    await temp_page.goto("https://demoqa.com/login")
-    await temp_page.get_by_role("textbox", name="UserName").fill("oabgnol63")
-    await temp_page.get_by_role("textbox", name="Password").fill("Exploit99*")
-    await temp_page.click("button#login")
-    await temp_page.wait_for_selector(f"text=oabgnol63", timeout=10000)
-    
-    auth_file = "state.json"
-    await temp_context.storage_state(path=auth_file)
-    await temp_context.close()
-    await temp_browser.close()
-    await temp_playwright.stop()
-    
-    yield auth_file
+def _record(param):
+    return param.load() if isinstance(param, DataRecord) else param
+
+@pytest.fixture(scope="session")
+def auth_cache(request):
+    return request.config.stash[AUTH_KEY]
+
+def _account_for(request) -> dict:
+    # the dataset record of a data-driven test, otherwise the default account
+    params = getattr(request.node, "callspec", None)
+    for name in ("test_data", "session_data"):
+        record = _record(params.params.get(name)) if params else None
+        if isinstance(record, dict) and "username" in record and "password" in record:
+            return record
+    return {"username": LoginPage.username, "password": LoginPage.password}
+
+@pytest_asyncio.fixture(scope="function")
+async def authenticated_state(request, auth_cache, browser_pool):
+    account = _account_for(request)
+    base_url = _site_base_url(request.config) or DEFAULT_BASE_URL
+    yield await auth_cache.get(account["username"], account["password"], base_url)
@@ -0,0 +1,185 @@
+#####################
+#
+# Data-driven tests read their records from <test module>.jsonl, .csv or
+# .json (an array), the first that exists. A file is indexed once: byte
+# offsets of every record, plus the header for CSV. The index is cached in
+# .data-index/ under the sha1 of the file's content, so later collections
+# (every xdist worker collects) only hash the file and read the index.
+#
+# Tests are parametrized with DataRecord references; a record is read and
+# parsed when its test's fixture asks for it, so a worker only ever
+# materializes the records of the items it runs.
+#
+#####################
+
+import io
+import os
+import csv
+import json
+import mmap
+import hashlib
+import re
+from typing import Any, Optional
+
+INDEX_DIR = ".data-index"
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".json": "json"}
+# whole strings, so brackets and commas inside them are skipped
+_JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{},]')
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _index_jsonl(data) -> list[int]:
+    offsets = []
+    start = 0
+    while start < len(data):
+        end = data.find(b"\n", start)
+        end = len(data) if end == -1 else end
+        if data[start:end].strip():
+            offsets += [start, end]
+        start = end + 1
+    return offsets
+
+
+def _index_csv(data) -> tuple[list[str], list[int]]:
+    # a record ends at a newline outside quotes
+    offsets = []
+    start = pos = quotes = 0
+    while pos < len(data):
+        end = data.find(b"\n", pos)
+        end = len(data) if end == -1 else end
+        quotes += data[pos:end].count(b'"')
+        pos = end + 1
+        if quotes % 2 == 0:
+            if data[start:end].strip():
+                offsets += [start, end]
+            start, quotes = pos, 0
+    if not offsets:
+        return [], []
+    header = data[offsets[0]:offsets[1]].decode("utf-8-sig")
+    return next(csv.reader(io.StringIO(header))), offsets[2:]
+
+
+def _index_json(data) -> Optional[list[int]]:
+    # items of a top-level array, None when the file holds something else
+    first = re.compile(rb"\S").search(data)
+    if first is None or data[first.start():first.start() + 1] != b"[":
+        return None
+    offsets = []
+    depth = 0
+    item_start = first.start() + 1
+    for token in _JSON_TOKEN.finditer(data, first.start()):
+        char = data[token.start():token.start() + 1]
+        if char in b"[{":
+            depth += 1
+        elif char in b"]}":
+            depth -= 1
+        if (char == b"," and depth == 1) or depth == 0:
+            chunk = data[item_start:token.start()]
+            if chunk.strip():
+                lead = len(chunk) - len(chunk.lstrip())
+                offsets += [item_start + lead, item_start + len(chunk.rstrip())]
+            item_start = token.end()
+            if depth == 0:
+                break
+    return offsets
+
+
+class DataRecord:
+    # a test's parameter: which record, not the record itself
+    __slots__ = ("source", "index")
+
+    def __init__(self, source: "DataSource", index: int) -> None:
+        self.source = source
+        self.index = index
+
+    def load(self) -> Any:
+        return self.source.record(self.index)
+
+    def __repr__(self) -> str:
+        return f"DataRecord({os.path.basename(self.source.path)}, {self.index})"
+
+
+class DataSource:
+    def __init__(self, path: str, index_dir: str = INDEX_DIR) -> None:
+        self.path = path
+        self.format = FORMATS[os.path.splitext(path)[1]]
+        self.index_dir = index_dir
+        self.fields: list[str] = []
+        self.offsets: Optional[list[int]] = None
+        self.loaded = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        cache = os.path.join(self.index_dir, f"{file_hash(self.path)}.{self.format}.json")
+        try:
+            with open(cache) as f:
+                index = json.load(f)
+            self.fields, self.offsets = index["fields"], index["offsets"]
+            return
+        except (OSError, ValueError, KeyError):
+            pass
+        self._build_index()
+        os.makedirs(self.index_dir, exist_ok=True)
+        # workers collecting at the same time may both build it
+        tmp_path = f"{cache}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"path": self.path, "fields": self.fields, "offsets": self.offsets}, f)
+        os.replace(tmp_path, cache)
+
+    def _build_index(self) -> None:
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                self.offsets = [] if self.format != "json" else None
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                match self.format:
+                    case "jsonl":
+                        self.offsets = _index_jsonl(data)
+                    case "csv":
+                        self.fields, self.offsets = _index_csv(data)
+                    case "json":
+                        self.offsets = _index_json(data)
+
+    @property
+    def is_list(self) -> bool:
+        return self.offsets is not None
+
+    def __len__(self) -> int:
+        return len(self.offsets) // 2 if self.offsets else 0
+
+    def records(self) -> list[DataRecord]:
+        return [DataRecord(self, index) for index in range(len(self))]
+
+    def record(self, index: int) -> Any:
+        start, end = self.offsets[2 * index], self.offsets[2 * index + 1]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            raw = f.read(end - start).decode("utf-8")
+        self.loaded += 1
+        if self.format == "csv":
+            return dict(zip(self.fields, next(csv.reader(io.StringIO(raw)))))
+        return json.loads(raw)
+
+
+_sources: dict[str, Optional[DataSource]] = {}
+
+
+def find_source(base: str) -> Optional[DataSource]:
+    # base + the first of FORMATS' extensions that exists, once per process
+    if base not in _sources:
+        path = next((base + ext for ext in FORMATS if os.path.isfile(base + ext)), None)
+        _sources[base] = DataSource(path) if path else None
+    return _sources[base]
+
+
+def stats() -> dict:
+    return {
+        "records loaded": sum(source.loaded for source in _sources.values() if source),
+    }
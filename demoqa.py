@@ -1,46 +1,712 @@
 import os
+import re
+import json
+import time
+import base64
+import asyncio
 import random
-from typing import Literal, Any
+import shutil
+import inspect
+import weakref
+import functools
+from collections import deque
+from contextvars import ContextVar
+from typing import Literal, Any, Callable, get_args
 from typing import Optional
-from playwright.async_api import async_playwright, expect, Page, Browser, HttpCredentials
- 
-# global browser instance
-_playwright = None
-_browser = None
-_context = None
+from datetime import datetime
+from urllib.parse import urlparse
+from playwright.async_api import (
+    async_playwright, expect, Page, Browser, BrowserContext, HttpCredentials, Playwright, APIRequestContext,
+    CDPSession, Locator, TimeoutError as PlaywrightTimeoutError
+)
  
+# startup work the suite never needs, on top of Playwright's own default args
+CHROMIUM_FAST_ARGS = ("--disable-sync", "--mute-audio", "--disable-notifications")
+CHROMIUM_HEADLESS_ARGS = ("--disable-gpu",)
+FIREFOX_FAST_PREFS = {
+    "browser.shell.checkDefaultBrowser": False,
+    "app.update.auto": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "browser.safebrowsing.downloads.remote.enabled": False,
+}
+
+class LaunchProfile:
+    # how a browser is launched. mode: "headed", "headless" (the full browser's new
+    # headless mode) or "shell" (chromium-headless-shell, bundled Chromium only).
+    # executables are tried in order (paths, or names on PATH) after the
+    # PLEASEWRIGHT_<NAME>_EXECUTABLE variable; a branded browser that isn't installed,
+    # or is asked for the shell it doesn't have, falls back to the fallback profile.
+    def __init__(
+            self,
+            name: str,
+            engine: Literal["chromium", "firefox", "webkit"],
+            channel: Optional[str] = None,
+            mode: Literal["headed", "headless", "shell"] = "headless",
+            executables: tuple[str, ...] = (),
+            args: tuple[str, ...] = (),
+            user_prefs: Optional[dict] = None,
+            fallback: Optional[str] = None
+    ) -> None:
+        self.name = name
+        self.engine = engine
+        self.channel = channel
+        self.mode = mode
+        self.executables = executables
+        self.args = args
+        self.user_prefs = user_prefs
+        self.fallback = fallback
+
+    def with_mode(self, mode: Optional[str]) -> "LaunchProfile":
+        if mode is None or mode == self.mode:
+            return self
+        return LaunchProfile(self.name, self.engine, self.channel, mode, self.executables,
+                             self.args, self.user_prefs, self.fallback)
+
+    def executable(self) -> Optional[str]:
+        path = os.environ.get(f"PLEASEWRIGHT_{self.name.upper().replace('-', '_')}_EXECUTABLE")
+        if path:
+            return path
+        for candidate in self.executables:
+            if "/" in candidate:
+                if os.path.isfile(candidate):
+                    return candidate
+            elif shutil.which(candidate):
+                return shutil.which(candidate)
+        return None
+
+    def resolve(self) -> "LaunchProfile":
+        if self.mode == "shell" and self.engine != "chromium":
+            # no headless shell outside Chromium
+            return self.with_mode("headless")
+        if self.fallback and (self.mode == "shell" or (self.executables and self.executable() is None)):
+            return LAUNCH_PROFILES[self.fallback].with_mode(self.mode).resolve()
+        return self
+
+    def options(self, slow: int | None = None) -> dict:
+        executable = self.executable()
+        headless = self.mode != "headed"
+        options: dict[str, Any] = {"headless": headless, "slow_mo": slow}
+        if executable:
+            options["executable_path"] = executable
+        elif self.channel:
+            options["channel"] = self.channel
+        elif self.engine == "chromium" and self.mode == "headless":
+            # bundled Chromium: headless=True alone starts the headless shell
+            options["channel"] = "chromium"
+        if self.engine == "chromium":
+            options["args"] = [*self.args, *(CHROMIUM_HEADLESS_ARGS if headless else ())]
+        elif self.args:
+            options["args"] = list(self.args)
+        if self.user_prefs:
+            options["firefox_user_prefs"] = dict(self.user_prefs)
+        return options
+
+    def describe(self) -> str:
+        executable = self.executable()
+        return f"{self.name}: {self.engine} {self.mode}, {executable or self.channel or 'bundled'}"
+
+LAUNCH_PROFILES = {profile.name: profile for profile in (
+    LaunchProfile("chrome", "chromium", channel="chrome", args=CHROMIUM_FAST_ARGS, fallback="chromium", executables=(
+        "C:/Program Files/Google/Chrome/Application/chrome.exe",
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "/opt/google/chrome/chrome",
+        "google-chrome-stable",
+        "google-chrome",
+    )),
+    LaunchProfile("msedge", "chromium", channel="msedge", args=CHROMIUM_FAST_ARGS, fallback="chromium", executables=(
+        "C:/Program Files (x86)/Microsoft/Edge/Application/msedge.exe",
+        "C:/Program Files/Microsoft/Edge/Application/msedge.exe",
+        "/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge",
+        "/opt/microsoft/msedge/msedge",
+        "microsoft-edge-stable",
+        "microsoft-edge",
+    )),
+    LaunchProfile("chromium", "chromium", args=CHROMIUM_FAST_ARGS),
+    LaunchProfile("chromium-shell", "chromium", mode="shell", args=CHROMIUM_FAST_ARGS),
+    # Playwright drives its own patched Firefox build, an installed Firefox won't do
+    LaunchProfile("firefox", "firefox", user_prefs=FIREFOX_FAST_PREFS),
+    LaunchProfile("webkit", "webkit"),
+)}
+
+# browser type (the browser fixture's params) -> profile name, and a mode for every profile
+_profiles = {"chrome": "chrome", "msedge": "msedge", "firefox": "firefox"}
+_launch_mode: Optional[str] = None
+
+def configure_launch(profiles: Optional[dict[str, str]] = None, mode: Optional[str] = None) -> None:
+    global _launch_mode
+    for browser_type, name in (profiles or {}).items():
+        if name not in LAUNCH_PROFILES:
+            raise ValueError(f"Unknown launch profile '{name}', expected one of: {', '.join(LAUNCH_PROFILES)}")
+        _profiles[browser_type] = name
+    if mode not in (None, "headed", "headless", "shell"):
+        raise ValueError(f"Unknown launch mode '{mode}'")
+    _launch_mode = mode
+
+def launch_profile(browser_type: str) -> LaunchProfile:
+    # a browser type, or a profile name directly
+    name = _profiles.get(browser_type, browser_type)
+    if name not in LAUNCH_PROFILES:
+        raise ValueError(f"Unsupported browser type: {browser_type}")
+    return LAUNCH_PROFILES[name].with_mode(_launch_mode).resolve()
+
+def launch_duplicates(browser_types: list[str]) -> dict[str, str]:
+    # browser type -> an earlier one that resolves to the same profile and mode, e.g. chrome
+    # and msedge both falling back to bundled Chromium where neither is installed
+    seen: dict[tuple, str] = {}
+    duplicates = {}
+    for browser_type in browser_types:
+        profile = launch_profile(browser_type)
+        key = (profile.name, profile.mode)
+        if key in seen:
+            duplicates[browser_type] = seen[key]
+        else:
+            seen[key] = browser_type
+    return duplicates
+
+def _launch_options(browser_type: str, slow: int | None = None) -> tuple[str, dict]:
+    profile = launch_profile(browser_type)
+    return profile.engine, profile.options(slow)
+
+async def _launch(playwright: Playwright, browser_type: str, slow: int | None = None) -> Browser:
+    engine, options = _launch_options(browser_type, slow)
+    return await getattr(playwright, engine).launch(**options)
+
+class BrowserPool:
+    # one warm browser per (browser type, slow_mo) for the lifetime of a worker
+    def __init__(self) -> None:
+        self._playwright: Optional[Playwright] = None
+        self._browsers: dict[tuple[str, int | None], Browser] = {}
+        self._servers: dict[str, str] = {}
+        self.launches = 0
+        self.connects = 0
+        self.reuses = 0
+        self.restarts = 0
+
+    def use_servers(self, endpoints: dict[str, str]) -> None:
+        # browser type -> ws endpoint of a shared browser server
+        self._servers = dict(endpoints)
+
+    async def playwright(self) -> Playwright:
+        # the worker's single driver, also used for API request contexts
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return self._playwright
+
+    async def acquire(self, browser_type: str, slow: int | None = None) -> Browser:
+        key = (browser_type, slow)
+        browser = self._browsers.get(key)
+        if browser is not None and browser.is_connected():
+            self.reuses += 1
+            return browser
+        if browser is not None:
+            # crashed or closed behind our back
+            self.restarts += 1
+        playwright = await self.playwright()
+        ws_endpoint = self._servers.get(browser_type)
+        if ws_endpoint:
+            engine, _ = _launch_options(browser_type)
+            browser = await getattr(playwright, engine).connect(ws_endpoint, slow_mo=slow)
+            self.connects += 1
+        else:
+            browser = await _launch(playwright, browser_type, slow)
+            self.launches += 1
+        self._browsers[key] = browser
+        return browser
+
+    async def close(self) -> None:
+        for browser in self._browsers.values():
+            try:
+                if browser.is_connected():
+                    await browser.close()
+            except Exception:
+                pass
+        self._browsers.clear()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self) -> dict:
+        return {
+            "launches": self.launches,
+            "server connects": self.connects,
+            "restarts": self.restarts,
+            "launches avoided": self.reuses,
+        }
+
+_pool = BrowserPool()
+
+def get_pool() -> BrowserPool:
+    return _pool
+
+class ApiClientPool:
+    # one APIRequestContext per (base url, headers) on the worker's shared driver;
+    # a request context keeps its connections alive between calls
+    def __init__(self, pool: BrowserPool) -> None:
+        self._pool = pool
+        self._clients: dict[tuple, APIRequestContext] = {}
+        self.created = 0
+        self.reuses = 0
+        self.isolated = 0
+
+    @staticmethod
+    def _key(base_url: str, headers: dict[str, str] | None) -> tuple:
+        return base_url, tuple(sorted((headers or {}).items()))
+
+    async def _new_context(self, base_url: str, headers: dict[str, str] | None) -> APIRequestContext:
+        playwright = await self._pool.playwright()
+        return await playwright.request.new_context(base_url=base_url, extra_http_headers=headers)
+
+    async def get(self, base_url: str, headers: dict[str, str] | None = None) -> APIRequestContext:
+        key = self._key(base_url, headers)
+        client = self._clients.get(key)
+        if client is not None:
+            self.reuses += 1
+            return client
+        client = await self._new_context(base_url, headers)
+        self._clients[key] = client
+        self.created += 1
+        return client
+
+    async def isolated_client(self, base_url: str, headers: dict[str, str] | None = None) -> APIRequestContext:
+        # own cookie jar for a single test, the caller disposes it
+        self.isolated += 1
+        return await self._new_context(base_url, headers)
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            try:
+                await client.dispose()
+            except Exception:
+                pass
+        self._clients.clear()
+
+    def stats(self) -> dict:
+        return {
+            "clients created": self.created,
+            "clients reused": self.reuses,
+            "isolated clients": self.isolated,
+        }
+
+_api_clients = ApiClientPool(_pool)
+
+REQRES_URL = "https://reqres.in/"
+# API fixture name -> (base url, headers), for conftest.py's fixtures and loadgen.py
+API_CLIENTS = {
+    "api_request_context": (REQRES_URL, {
+        'Content-Type': 'application/json',
+        'x-api-key': 'reqres-free-v1'
+    }),
+    "api_request_context_final": ("https://demoqa.com/", {
+        'Content-Type': 'application/json',
+    }),
+}
+
+def get_api_clients() -> ApiClientPool:
+    return _api_clients
+
+def artifact_dir(name: str, output_dir: str = "test-results") -> str:
+    # unique per test (node id includes the browser param), safe on every OS
+    return os.path.join(output_dir, re.sub(r"[^\w\-.]+", "-", name).strip("-"))
+
+class TraceRecorder:
+    # tracing per context with one chunk per test; the archive is only written
+    # in "on" mode or when the test failed ("retain-on-failure")
+    def __init__(
+            self,
+            mode: Literal["on", "off", "retain-on-failure"] = "retain-on-failure",
+            screenshots: bool = True,
+            snapshots: bool = True,
+            sources: bool = True,
+            output_dir: str = "test-results"
+    ) -> None:
+        self.mode = mode
+        self.screenshots = screenshots
+        self.snapshots = snapshots
+        self.sources = sources
+        self.output_dir = output_dir
+        self.seconds = 0.0
+        self.written = 0
+        self.discarded = 0
+        self.bytes_written = 0
+
+    async def start(self, context: BrowserContext, name: str) -> None:
+        if self.mode == "off":
+            return
+        started = time.perf_counter()
+        await context.tracing.start(screenshots=self.screenshots, snapshots=self.snapshots, sources=self.sources)
+        await context.tracing.start_chunk(title=name)
+        self.seconds += time.perf_counter() - started
+
+    async def stop(self, context: BrowserContext, name: str, failed: bool = False) -> Optional[str]:
+        if self.mode == "off":
+            return None
+        started = time.perf_counter()
+        path = None
+        if self.mode == "on" or failed:
+            path = os.path.join(artifact_dir(name, self.output_dir), "trace.zip")
+        await context.tracing.stop_chunk(path=path)
+        await context.tracing.stop()
+        self.seconds += time.perf_counter() - started
+        if path:
+            self.written += 1
+            self.bytes_written += os.path.getsize(path)
+        else:
+            self.discarded += 1
+        return path
+
+    def stats(self) -> dict:
+        return {
+            "traces written": self.written,
+            "traces discarded": self.discarded,
+            "bytes written": self.bytes_written,
+            "tracing seconds": round(self.seconds, 3),
+        }
+
+class FrameRing:
+    # most recent screencast frames of one page, never more than max_bytes
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.frames: deque[tuple[float, bytes]] = deque()
+        self.size = 0
+
+    def push(self, timestamp: float, data: bytes) -> None:
+        self.frames.append((timestamp, data))
+        self.size += len(data)
+        while self.size > self.max_bytes and self.frames:
+            _, dropped = self.frames.popleft()
+            self.size -= len(dropped)
+
+class ScreencastRecorder:
+    # failure-only capture: frames stay in memory and hit the disk only when
+    # the test failed. Needs CDP, so only Chromium pages are captured.
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, output_dir: str = "test-results", quality: int = 60) -> None:
+        self.max_bytes = max_bytes
+        self.output_dir = output_dir
+        self.quality = quality
+        self._rings: dict[BrowserContext, list[FrameRing]] = {}
+        self._watchers: dict[BrowserContext, list[asyncio.Task]] = {}
+        self.frames = 0
+        self.bytes_captured = 0
+        self.bytes_written = 0
+
+    def attach(self, context: BrowserContext) -> None:
+        self._rings[context] = []
+        self._watchers[context] = []
+
+        def on_page(page: Page) -> None:
+            watchers = self._watchers.get(context)
+            if watchers is None:
+                # opened while the context is torn down, after stop()
+                return
+            watchers.append(asyncio.ensure_future(self._watch(context, page)))
+
+        context.on("page", on_page)
+
+    async def _watch(self, context: BrowserContext, page: Page) -> None:
+        rings = self._rings.get(context)
+        if rings is None:
+            return
+        ring = FrameRing(self.max_bytes)
+        rings.append(ring)
+        cdp = await context.new_cdp_session(page)
+
+        def on_frame(params: dict) -> None:
+            data = base64.b64decode(params["data"])
+            self.frames += 1
+            self.bytes_captured += len(data)
+            ring.push(params["metadata"]["timestamp"], data)
+            asyncio.ensure_future(self._ack(cdp, params["sessionId"]))
+
+        cdp.on("Page.screencastFrame", on_frame)
+        await cdp.send("Page.startScreencast", {"format": "jpeg", "quality": self.quality})
+
+    async def _ack(self, cdp, session_id: int) -> None:
+        try:
+            await cdp.send("Page.screencastFrameAck", {"sessionId": session_id})
+        except Exception:
+            # page already closed
+            pass
+
+    async def stop(self, context: BrowserContext, name: str, failed: bool = False) -> Optional[str]:
+        await asyncio.gather(*self._watchers.pop(context, []), return_exceptions=True)
+        rings = self._rings.pop(context, [])
+        if not failed or not any(ring.frames for ring in rings):
+            return None
+        frames_dir = os.path.join(artifact_dir(name, self.output_dir), "frames")
+        for index, ring in enumerate(rings):
+            page_dir = os.path.join(frames_dir, f"page-{index}")
+            os.makedirs(page_dir, exist_ok=True)
+            timestamps = []
+            for number, (timestamp, data) in enumerate(ring.frames):
+                with open(os.path.join(page_dir, f"{number:05d}.jpg"), "wb") as f:
+                    f.write(data)
+                self.bytes_written += len(data)
+                timestamps.append(timestamp)
+            with open(os.path.join(page_dir, "frames.json"), "w") as f:
+                json.dump(timestamps, f)
+        return frames_dir
+
+    def stats(self) -> dict:
+        return {
+            "frames captured": self.frames,
+            "bytes captured": self.bytes_captured,
+            "bytes written": self.bytes_written,
+        }
+
+class HarStore:
+    # one HAR per test in har_dir; response bodies are attached next to it as
+    # <sha1>.<ext> files, so every HAR in the directory shares one copy of each resource.
+    # "auto" replays a test's HAR when it exists and records it otherwise.
+    def __init__(
+            self,
+            mode: Literal["off", "record", "replay", "auto"] = "off",
+            har_dir: str = "hars",
+            unmatched: Literal["fail", "passthrough", "abort"] = "fail"
+    ) -> None:
+        self.mode = mode
+        self.har_dir = har_dir
+        self.unmatched = unmatched
+        self._recording: dict[str, set[str]] = {}
+        self._misses: dict[str, list[str]] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.stored = 0
+        self.reused = 0
+        self.unmatched_requests = 0
+
+    def path_for(self, name: str) -> str:
+        return artifact_dir(name, self.har_dir) + ".har"
+
+    def _records(self, name: str) -> bool:
+        return self.mode == "record" or (self.mode == "auto" and not os.path.exists(self.path_for(name)))
+
+    def context_options(self, name: str) -> dict:
+        if self.mode == "off" or not self._records(name):
+            return {}
+        os.makedirs(self.har_dir, exist_ok=True)
+        # resources already on disk before this test, to tell stored from shared ones
+        self._recording[name] = set(os.listdir(self.har_dir))
+        return {
+            "record_har_path": self.path_for(name),
+            "record_har_content": "attach",
+            "record_har_mode": "minimal",
+        }
+
+    async def attach(self, context: BrowserContext, name: str) -> None:
+        if self.mode == "off" or name in self._recording:
+            return
+        path = self.path_for(name)
+        if not os.path.exists(path):
+            raise RuntimeError(f"No HAR recorded for {name}: {path}")
+        misses = self._misses.setdefault(name, [])
+
+        async def on_unmatched(route) -> None:
+            self.unmatched_requests += 1
+            misses.append(route.request.url)
+            if self.unmatched == "passthrough":
+                await route.continue_()
+            else:
+                await route.abort()
+
+        # routes run newest first: the HAR answers, misses fall back to the policy
+        await context.route("**/*", on_unmatched)
+        await context.route_from_har(path, not_found="fallback")
+        self.replayed += 1
+
+    def misses(self, name: str) -> list[str]:
+        # the requests the HAR couldn't answer so far
+        return list(self._misses.get(name, []))
+
+    def stop(self, name: str) -> list[str]:
+        # after the context closed; returns the requests the HAR couldn't answer
+        existing = self._recording.pop(name, None)
+        if existing is not None:
+            try:
+                with open(self.path_for(name)) as f:
+                    entries = json.load(f)["log"]["entries"]
+            except (OSError, ValueError, KeyError):
+                entries = []
+            files = {entry["response"]["content"].get("_file") for entry in entries} - {None}
+            self.recorded += 1
+            self.stored += len(files - existing)
+            self.reused += len(files & existing)
+        return self._misses.pop(name, [])
+
+    def stats(self) -> dict:
+        return {
+            "hars recorded": self.recorded,
+            "hars replayed": self.replayed,
+            "resources stored": self.stored,
+            "resources shared": self.reused,
+            "unmatched requests": self.unmatched_requests,
+        }
+
+def _children(pid: int) -> list[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def _is_renderer(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"--type=renderer" in f.read()
+    except OSError:
+        return False
+
+def tree_rss_kb(root: int) -> int:
+    # RSS of a process and all its descendants, 0 where there is no /proc
+    total, pending = 0, [root]
+    while pending:
+        pid = pending.pop()
+        total += _rss_kb(pid)
+        pending.extend(_children(pid))
+    return total
+
+def tree_renderers(root: int) -> int:
+    count, pending = 0, _children(root)
+    while pending:
+        pid = pending.pop()
+        count += _is_renderer(pid)
+        pending.extend(_children(pid))
+    return count
+
+class ResourceTracker:
+    # per test: pages and contexts opened through demoqa.py that were still open at
+    # teardown, and RSS of this worker's process tree (driver + launched browsers,
+    # shared by tests running concurrently in the worker) sampled from /proc
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self.records: list[dict] = []
+        self.leaked_pages = 0
+        self.leaked_contexts = 0
+        self.tracked = 0
+        self.peak_kb = 0
+
+    def _sample(self) -> int:
+        rss = tree_rss_kb(os.getpid())
+        self.peak_kb = max(self.peak_kb, rss)
+        return rss
+
+    def start(self, session: "BrowserSession") -> None:
+        session.rss_start_kb = session.rss_peak_kb = self._sample()
+
+        async def sample() -> None:
+            while True:
+                await asyncio.sleep(self.interval)
+                session.rss_peak_kb = max(session.rss_peak_kb, self._sample())
+
+        session.sampler = asyncio.ensure_future(sample())
+
+    async def stop(self, session: "BrowserSession", idle_pages: list[Page]) -> dict:
+        # before the context is closed; warm pages idling in the page pool are not leaks
+        if session.sampler:
+            session.sampler.cancel()
+            await asyncio.gather(session.sampler, return_exceptions=True)
+        rss = self._sample()
+        pages = [page for page in session.pages if not page.is_closed() and page not in idle_pages]
+        contexts = [context for context in session.contexts if context in session.open_contexts]
+        record = {
+            "test": session.name,
+            "open pages": len(pages),
+            "open contexts": len(contexts),
+            "leaked urls": [page.url for page in pages],
+            "renderers": tree_renderers(os.getpid()),
+            "rss start mb": round(session.rss_start_kb / 1024, 1),
+            "rss end mb": round(rss / 1024, 1),
+            "rss peak mb": round(max(session.rss_peak_kb, rss) / 1024, 1),
+        }
+        self.leaked_pages += len(pages)
+        self.leaked_contexts += len(contexts)
+        self.tracked += 1
+        self.records.append(record)
+        return record
+
+    def stats(self) -> dict:
+        return {
+            "tests tracked": self.tracked,
+            "leaked pages": self.leaked_pages,
+            "leaked contexts": self.leaked_contexts,
+            "peak rss mb": round(self.peak_kb / 1024, 1),
+        }
+
+class BrowserSession:
+    # one test's handle on a pooled browser and its own isolated context
+    def __init__(
+            self,
+            browser: Browser,
+            context: BrowserContext,
+            name: str = "",
+            tracer: Optional[TraceRecorder] = None,
+            screencast: Optional[ScreencastRecorder] = None,
+            har: Optional[HarStore] = None
+    ) -> None:
+        self.browser = browser
+        self.context = context
+        self.name = name
+        self.tracer = tracer
+        self.screencast = screencast
+        self.har = har
+        self.har_misses: list[str] = []
+        self.pages: list[Page] = []
+        # contexts the test opened itself through new_context()
+        self.contexts: list[BrowserContext] = []
+        self.open_contexts: set[BrowserContext] = set()
+        self.tracker: Optional[ResourceTracker] = None
+        self.sampler: Optional[asyncio.Task] = None
+        self.rss_start_kb = 0
+        self.rss_peak_kb = 0
+        self.resources: Optional[dict] = None
+        # browser metrics of every navigate(), see PerfMetrics
+        self.perf: list[dict] = []
+
+    async def new_page(self) -> Page:
+        return await self.context.new_page()
+
+    async def new_context(self, **kwargs) -> BrowserContext:
+        context = await self.browser.new_context(**kwargs)
+        self.contexts.append(context)
+        self.open_contexts.add(context)
+        context.on("page", self.pages.append)
+        context.on("close", self.open_contexts.discard)
+        return context
+
+# session of the running task, for page objects created without an explicit one
+_current_session: ContextVar[Optional[BrowserSession]] = ContextVar("current_session", default=None)
+
 async def init_browser(
         browser_type: str, 
         slow: int | None = None, 
         video: str | None = None,
         http_auth: dict | None = None,
-        storage_state: str | None = None
-    ) -> Optional[Browser]:
+        storage_state: str | dict | None = None,
+        name: str = "",
+        tracer: Optional[TraceRecorder] = None,
+        screencast: Optional[ScreencastRecorder] = None,
+        har: Optional[HarStore] = None,
+        prewarm: tuple[type, ...] = (),
+        tracker: Optional[ResourceTracker] = None
+    ) -> BrowserSession:
     try:
-        global _playwright, _browser, _context
-        if _browser is None:
-            _playwright = await async_playwright().start()
-            match browser_type:
-                case 'chrome':
-                    _browser = await _playwright.chromium.launch(
-                        headless=False,
-                        executable_path="C:/Program Files/Google/Chrome/Application/chrome.exe",
-                        slow_mo=slow,
-                    )
-                case 'msedge':
-                    _browser = await _playwright.chromium.launch(
-                        headless=False,
-                        executable_path="C:/Program Files/Google/Chrome/Application/chrome.exe",
-                        slow_mo=slow,
-                    )
-                case 'firefox':
-                    _browser = await _playwright.firefox.launch(
-                        headless=False,
-                        executable_path="C:/Program Files/Mozilla Firefox/firefox.exe",
-                        slow_mo=slow,
-                    )
-                case _:
-                    raise ValueError(f"Unsupported browser type: {browser_type}")   
+        browser = await _pool.acquire(browser_type, slow)
+        if screencast and browser.browser_type.name != "chromium":
+            # no CDP screencast, fall back to recording and deleting on success
+            screencast = None
+            video = "failure"
         
         context_options = {
             "record_video_dir": "test-results/" if video else None,
@@ -48,98 +714,948 @@ async def init_browser(
         }
         if storage_state:
             context_options["storage_state"] = storage_state
-        _context = await _browser.new_context(**context_options)
-        await _context.tracing.start(screenshots=True, snapshots=True, sources=True)
-        return _browser
+        if har:
+            context_options.update(har.context_options(name))
+        context = await browser.new_context(**context_options)
+        if har:
+            await har.attach(context, name)
+        if tracer:
+            await tracer.start(context, name)
+        if screencast:
+            screencast.attach(context)
+        session = BrowserSession(browser, context, name, tracer, screencast, har)
+        # every page of the test, also the ones page objects already closed
+        context.on("page", session.pages.append)
+        if tracker:
+            session.tracker = tracker
+            tracker.start(session)
+        for page_cls in prewarm:
+            # loads in the background while the rest of the setup runs
+            _page_pools.get(context).prewarm(page_cls)
+        _current_session.set(session)
+        return session
     except Exception as e:
         raise e
  
-async def close_browser(keep_video: bool = False) -> None:
+async def settle_session(session: BrowserSession) -> None:
+    # before close_browser: what the test left open and what the HAR missed, so the
+    # caller can fail the test on them and still keep its trace and frames
+    if session.tracker and session.resources is None:
+        session.resources = await session.tracker.stop(session, _page_pools.get(session.context).idle_pages())
+    if session.har:
+        session.har_misses = session.har.misses(session.name)
+
+async def close_browser(session: BrowserSession, keep_video: bool = False, failed: bool = False) -> None:
+    # closes the test's context only, the browser stays warm in the pool
     try:
-        global _playwright, _browser, _context
-        if _context:
-            await _context.tracing.stop(path="trace.zip")
-            video_paths = []
-            if not keep_video:
-                for page in _context.pages:
-                    if page.video:
-                        video_path = await page.video.path()
-                        video_paths.append(video_path)
-            await _context.close()
-            if not keep_video and video_paths:
-                for video_path in video_paths:
-                    try:
-                        if os.path.exists(video_path):
-                            os.remove(video_path)
-                    except Exception:
-                        pass
-        if _browser:
-            await _browser.close()
-        if _playwright:
-            await _playwright.stop()
-        _browser = None
-        _playwright = None
-        _context = None
+        context = session.context
+        await settle_session(session)
+        if session.tracer:
+            await session.tracer.stop(context, session.name, failed)
+        if session.screencast:
+            await session.screencast.stop(context, session.name, failed)
+        await _page_pools.close(context)
+        _blocker.forget(context)
+        for extra in list(session.open_contexts):
+            # left open by the test
+            _blocker.forget(extra)
+            await extra.close()
+        video_paths = []
+        if not keep_video:
+            for page in session.pages:
+                if page.video:
+                    video_path = await page.video.path()
+                    video_paths.append(video_path)
+        await context.close()
+        if session.har:
+            # the HAR is written when the context closes
+            session.har_misses = session.har.stop(session.name)
+        if not keep_video and video_paths:
+            for video_path in video_paths:
+                try:
+                    if os.path.exists(video_path):
+                        os.remove(video_path)
+                except Exception:
+                    pass
+        if _current_session.get() is session:
+            _current_session.set(None)
     except Exception as e:
         raise e
+
+async def shutdown_browsers() -> None:
+    # API clients live on the same driver, dispose them before it stops
+    await _api_clients.close()
+    await _pool.close()
+
+def get_session() -> BrowserSession:
+    session = _current_session.get()
+    if session is None:
+        raise RuntimeError("Browser not initialized")
+    return session
  
 def get_browser() -> Browser:
-    if _browser is None:
-        raise RuntimeError("Browser not initialized")
-    return _browser
+    return get_session().browser
 
-def get_context():
-    if _context is None:
+def get_context() -> BrowserContext:
+    session = _current_session.get()
+    if session is None:
         raise RuntimeError("Context not initialized")
-    return _context
+    return session.context
  
+DEMOQA_URL = "https://demoqa.com"
+_base_url = DEMOQA_URL
+
+def set_base_url(url: str | None) -> None:
+    # e.g. the local stub server; None goes back to demoqa.com
+    global _base_url
+    _base_url = (url or DEMOQA_URL).rstrip("/")
+
+def site_url(url: str) -> str:
+    # page object urls are written against demoqa.com, move them to the configured host
+    if url.startswith(DEMOQA_URL):
+        return _base_url + url[len(DEMOQA_URL):]
+    return url
+
+# ad and analytics hosts seen on demoqa.com pages
+AD_DOMAINS = (
+    "googlesyndication.com",
+    "doubleclick.net",
+    "googletagservices.com",
+    "googletagmanager.com",
+    "google-analytics.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "adsrvr.org",
+    "pubmatic.com",
+    "rubiconproject.com",
+    "criteo.com",
+    "casalemedia.com",
+    "openx.net",
+    "ezoic.net",
+)
+
+class BlockPolicy:
+    # requests a page never needs: by resource type, host (subdomains included) or url regex
+    def __init__(
+            self,
+            resource_types: tuple[str, ...] = (),
+            domains: tuple[str, ...] = (),
+            url_patterns: tuple[str, ...] = ()
+    ) -> None:
+        self.resource_types = frozenset(resource_types)
+        self.domains = tuple(domains)
+        self.url_patterns = [re.compile(pattern) for pattern in url_patterns]
+
+    PRESETS = {
+        "ads": {"domains": AD_DOMAINS},
+        "images": {"resource_types": ("image",)},
+        "fonts": {"resource_types": ("font",)},
+        "media": {"resource_types": ("media",)},
+        "stylesheets": {"resource_types": ("stylesheet",)},
+    }
+
+    @classmethod
+    def from_names(cls, names: str) -> "BlockPolicy":
+        # e.g. "ads,fonts,images"
+        policy = cls()
+        for name in filter(None, (name.strip() for name in names.split(","))):
+            if name not in cls.PRESETS:
+                raise ValueError(f"Unknown block preset: {name}")
+            policy = policy | cls(**cls.PRESETS[name])
+        return policy
+
+    def __or__(self, other: Optional["BlockPolicy"]) -> "BlockPolicy":
+        if other is None:
+            return self
+        return BlockPolicy(
+            tuple(self.resource_types | other.resource_types),
+            self.domains + other.domains,
+            tuple(p.pattern for p in self.url_patterns + other.url_patterns)
+        )
+
+    def match(self, resource_type: str, url: str) -> Optional[str]:
+        # the reason a request is blocked, None to let it through
+        if resource_type in self.resource_types:
+            return resource_type
+        host = urlparse(url).hostname or ""
+        for domain in self.domains:
+            if host == domain or host.endswith("." + domain):
+                return domain
+        for pattern in self.url_patterns:
+            if pattern.search(url):
+                return pattern.pattern
+        return None
+
+BLOCK_ADS = BlockPolicy(domains=AD_DOMAINS)
+BLOCK_ADS_AND_MEDIA = BLOCK_ADS | BlockPolicy(resource_types=("image", "font", "media"))
+
+class NetworkBlocker:
+    # one context-wide route per BrowserContext; each page is checked against the
+    # policy of the page object that opened it plus the global policy
+    def __init__(self) -> None:
+        self.enabled = True
+        self.policy: Optional[BlockPolicy] = None
+        self._routed: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.blocked = 0
+        self.reasons: dict[str, int] = {}
+
+    def configure(self, policy: Optional[BlockPolicy] = None, enabled: bool = True) -> None:
+        self.policy = policy
+        self.enabled = enabled
+
+    async def install(self, context: BrowserContext, page: Page, policy: Optional[BlockPolicy]) -> None:
+        if not self.enabled:
+            return
+        policy = policy | self.policy if policy else self.policy
+        if policy is None:
+            return
+        pages = self._routed.get(context)
+        if pages is None:
+            # weak: a Page references its context, which would keep the entry alive
+            pages = self._routed[context] = weakref.WeakKeyDictionary()
+
+            async def on_route(route) -> None:
+                request = route.request
+                try:
+                    # popups opened by the page fall under the global policy
+                    page_policy = pages.get(request.frame.page, self.policy)
+                except Exception:
+                    # service worker requests have no frame
+                    page_policy = self.policy
+                reason = page_policy.match(request.resource_type, request.url) if page_policy else None
+                if reason is None:
+                    await route.fallback()
+                    return
+                self.blocked += 1
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+                await route.abort("blockedbyclient")
+
+            await context.route("**/*", on_route)
+        pages[page] = policy
+
+    def forget(self, context: BrowserContext) -> None:
+        self._routed.pop(context, None)
+
+    def stats(self) -> dict:
+        return {"blocked requests": self.blocked, **self.reasons}
+
+_blocker = NetworkBlocker()
+
+def get_blocker() -> NetworkBlocker:
+    return _blocker
+
+class LoadHistory:
+    # recent navigate() times per page class, site and browser engine, kept across runs
+    # in a JSON file; timeouts follow what a page normally needs instead of a flat 60s.
+    # Stub server or webkit loads never set the timeouts of the live site in chromium.
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            keep: int = 50,
+            min_samples: int = 5,
+            factor: float = 3.0,
+            floor: float = 5.0,
+            ceiling: float = 60.0
+    ) -> None:
+        self.path = path
+        self.keep = keep
+        self.min_samples = min_samples
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.samples: dict[str, list[float]] = {}
+        self.new: dict[str, list[float]] = {}
+        self.recorded = 0
+
+    def load(self, path: Optional[str]) -> None:
+        self.path = path
+        self.samples = {}
+        if not path:
+            return
+        try:
+            with open(path) as f:
+                # keys without a site and browser are from older files, they mix all of them
+                self.samples = {key: list(times) for key, times in json.load(f).items() if key.count("|") == 2}
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def key(page: str, base_url: str, browser: str) -> str:
+        return f"{page}|{base_url}|{browser}"
+
+    def record(self, key: str, seconds: float) -> None:
+        self.new.setdefault(key, []).append(round(seconds, 3))
+        self.recorded += 1
+
+    def add(self, samples: dict[str, list[float]]) -> None:
+        # samples recorded by another process (xdist worker), saved with ours
+        for page, times in samples.items():
+            self.new.setdefault(page, []).extend(times)
+
+    def merge(self, samples: dict[str, list[float]]) -> None:
+        for page, times in samples.items():
+            self.samples[page] = (self.samples.get(page, []) + times)[-self.keep:]
+
+    def save(self) -> None:
+        if not self.path or not self.new:
+            return
+        self.merge(self.new)
+        self.new = {}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.samples, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def timeout_ms(self, key: str, default: int = 60000) -> int:
+        times = sorted(self.samples.get(key, []))
+        if len(times) < self.min_samples:
+            return default
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        return int(min(max(p95 * self.factor, self.floor), self.ceiling) * 1000)
+
+    def stats(self) -> dict:
+        return {
+            "navigations": self.recorded,
+            "pages with history": len(self.samples),
+        }
+
+_history = LoadHistory()
+
+def get_load_history() -> LoadHistory:
+    return _history
+
+def _history_key(page_cls: type, context: BrowserContext) -> str:
+    browser = context.browser
+    return LoadHistory.key(page_cls.__name__, _base_url, browser.browser_type.name if browser else "unknown")
+
+class PagePool:
+    # pages of one context for page objects. Pre-warmed pages are opened in the
+    # background and already sit on their class's url when a page object takes them.
+    # A page is never handed out twice: tests leave dialog handlers and routes on
+    # it, so __aexit__ closes it. The warm slot is refilled in the background only
+    # once the context has opened the class twice, single-use tests don't pay for a
+    # load nobody takes.
+    def __init__(self, context: BrowserContext, owner: "PagePools", max_idle: int = 2) -> None:
+        self.context = context
+        self.owner = owner
+        self.max_idle = max_idle
+        self._warm: dict[type, list[asyncio.Task]] = {}
+        self._prewarmed: set[type] = set()
+        self._acquired: dict[type, int] = {}
+
+    def prewarm(self, page_cls: type, count: int = 1) -> None:
+        self._prewarmed.add(page_cls)
+        idle = sum(len(tasks) for tasks in self._warm.values())
+        tasks = self._warm.setdefault(page_cls, [])
+        for _ in range(min(count, self.max_idle - idle)):
+            tasks.append(asyncio.ensure_future(self._open(page_cls)))
+
+    async def _open(self, page_cls: type) -> Optional[Page]:
+        page = None
+        try:
+            page = await self.context.new_page()
+            await _blocker.install(self.context, page, page_cls.block_policy)
+            timeout = _history.timeout_ms(_history_key(page_cls, self.context))
+            await page.goto(site_url(page_cls.url), wait_until=page_cls.ready_state, timeout=timeout)
+            if page_cls.ready_selector:
+                await page.locator(page_cls.ready_selector).first.wait_for(state="attached", timeout=timeout)
+            return page
+        except Exception:
+            # the page object falls back to a cold page
+            if page is not None and not page.is_closed():
+                await page.close()
+            return None
+
+    async def acquire(self, page_cls: Optional[type]) -> tuple[Page, bool]:
+        # (page, True) when the page is already loaded on page_cls.url
+        if page_cls:
+            self._acquired[page_cls] = self._acquired.get(page_cls, 0) + 1
+        tasks = self._warm.get(page_cls) if page_cls else None
+        if tasks:
+            task = next((task for task in tasks if task.done()), tasks[0])
+            tasks.remove(task)
+            page = await task
+            if page is not None and not page.is_closed():
+                self.owner.warm_hits += 1
+                return page, True
+        self.owner.cold += 1
+        return await self.context.new_page(), False
+
+    async def release(self, page: Page, page_cls: type) -> None:
+        if not page.is_closed():
+            await page.close()
+        self.owner.closed += 1
+        if page_cls in self._prewarmed and self._acquired.get(page_cls, 0) > 1:
+            self.prewarm(page_cls)
+
+    def idle_pages(self) -> list[Page]:
+        return [task.result() for tasks in self._warm.values() for task in tasks
+                if task.done() and not task.cancelled() and task.result() is not None]
+
+    async def close(self) -> None:
+        tasks = [task for tasks in self._warm.values() for task in tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._warm.clear()
+        self._prewarmed.clear()
+
+class PagePools:
+    # one PagePool per BrowserContext
+    def __init__(self, max_idle: int = 2) -> None:
+        self.max_idle = max_idle
+        self._pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.warm_hits = 0
+        self.cold = 0
+        self.closed = 0
+
+    def get(self, context: BrowserContext) -> PagePool:
+        pool = self._pools.get(context)
+        if pool is None:
+            pool = self._pools[context] = PagePool(context, self, self.max_idle)
+        return pool
+
+    async def close(self, context: BrowserContext) -> None:
+        pool = self._pools.pop(context, None)
+        if pool is not None:
+            await pool.close()
+
+    def stats(self) -> dict:
+        return {
+            "warm pages used": self.warm_hits,
+            "cold pages": self.cold,
+            "pages closed": self.closed,
+        }
+
+_page_pools = PagePools()
+
+def get_page_pools() -> PagePools:
+    return _page_pools
+
+class ActionTimer:
+    # wall time of page object actions, per test. Actions called from other timed
+    # actions (fill_name -> text_box_interact) are recorded as nested and left out
+    # of the per-class totals so nothing is counted twice.
+    def __init__(self) -> None:
+        self.enabled = False
+        self.records: list[dict] = []
+        self.timed = 0
+        self.seconds = 0.0
+
+    def configure(self, enabled: bool) -> None:
+        self.enabled = enabled
+
+    def record(self, page: str, action: str, locator: str, test: str,
+               seconds: float, failed: bool, nested: bool) -> None:
+        self.timed += 1
+        if not nested:
+            self.seconds += seconds
+        self.records.append({
+            "test": test,
+            "page": page,
+            "action": action,
+            "locator": locator,
+            "ms": round(seconds * 1000, 2),
+            "failed": failed,
+            "nested": nested,
+        })
+
+    @staticmethod
+    def _totals(records: list[dict], key) -> dict:
+        totals: dict[str, dict] = {}
+        for record in records:
+            bucket = totals.setdefault(key(record), {"calls": 0, "total ms": 0.0, "max ms": 0.0})
+            bucket["calls"] += 1
+            bucket["total ms"] = round(bucket["total ms"] + record["ms"], 2)
+            bucket["max ms"] = max(bucket["max ms"], record["ms"])
+        for bucket in totals.values():
+            bucket["mean ms"] = round(bucket["total ms"] / bucket["calls"], 2)
+        return dict(sorted(totals.items(), key=lambda item: item[1]["total ms"], reverse=True))
+
+    def report(self, records: Optional[list[dict]] = None, top: int = 10) -> dict:
+        records = self.records if records is None else records
+        outer = [record for record in records if not record["nested"]]
+        return {
+            "actions": len(records),
+            "slowest": sorted(records, key=lambda r: r["ms"], reverse=True)[:top],
+            "per page class": self._totals(outer, lambda r: r["page"]),
+            "per action": self._totals(records, lambda r: f"{r['page']}.{r['action']}"),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "actions timed": self.timed,
+            "action seconds": self.seconds,
+        }
+
+_action_timer = ActionTimer()
+_action_depth: ContextVar[int] = ContextVar("action_depth", default=0)
+
+def get_action_timer() -> ActionTimer:
+    return _action_timer
+
+def _page_session(page_object: "BasePage") -> Optional[BrowserSession]:
+    if isinstance(page_object.session, BrowserSession):
+        return page_object.session
+    return _current_session.get()
+
+def timed_action(locator: Optional[str] = None):
+    # locator: the parameter, or failing that the page object attribute, that names
+    # what the action works on. Disabled, the wrapper costs one attribute check.
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if not _action_timer.enabled:
+                return await func(self, *args, **kwargs)
+            depth = _action_depth.get()
+            token = _action_depth.set(depth + 1)
+            failed = False
+            started = time.perf_counter()
+            try:
+                return await func(self, *args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                _action_depth.reset(token)
+                target = ""
+                if locator:
+                    bound = signature.bind_partial(self, *args, **kwargs).arguments
+                    target = bound[locator] if locator in bound else getattr(self, locator, "")
+                session = _page_session(self)
+                _action_timer.record(type(self).__name__, func.__name__, str(target or ""),
+                                     session.name if session else "", elapsed, failed, depth > 0)
+        return wrapper
+    return decorate
+
+# one evaluate after the page is ready: Navigation Timing, paint timings and, where the
+# browser has them, buffered LCP and layout-shift entries (null when unsupported)
+PERF_SCRIPT = """async () => {
+    const supported = PerformanceObserver.supportedEntryTypes || [];
+    const buffered = (type) => new Promise((resolve) => {
+        if (!supported.includes(type)) return resolve(null);
+        const observer = new PerformanceObserver((list) => { observer.disconnect(); resolve(list.getEntries()); });
+        observer.observe({type, buffered: true});
+        setTimeout(() => { observer.disconnect(); resolve([]); }, 50);
+    });
+    const [lcp, shifts] = await Promise.all([buffered("largest-contentful-paint"), buffered("layout-shift")]);
+    const nav = performance.getEntriesByType("navigation")[0];
+    const paint = Object.fromEntries(performance.getEntriesByType("paint").map((e) => [e.name, e.startTime]));
+    return {
+        ttfb: nav ? nav.responseStart - nav.startTime : null,
+        domInteractive: nav ? nav.domInteractive : null,
+        domContentLoaded: nav && nav.domContentLoadedEventEnd ? nav.domContentLoadedEventEnd : null,
+        load: nav && nav.loadEventEnd ? nav.loadEventEnd : null,
+        transferSize: nav && nav.transferSize !== undefined ? nav.transferSize : null,
+        fp: paint["first-paint"] ?? null,
+        fcp: paint["first-contentful-paint"] ?? null,
+        lcp: lcp && lcp.length ? lcp[lcp.length - 1].startTime : null,
+        cls: shifts ? shifts.filter((e) => !e.hadRecentInput).reduce((sum, e) => sum + e.value, 0) : null,
+    };
+}"""
+
+# Performance.getMetrics name -> (record key, scale)
+CDP_METRICS = {
+    "JSHeapUsedSize": ("js heap mb", 1 / (1024 * 1024)),
+    "Nodes": ("dom nodes", 1),
+    "LayoutCount": ("layouts", 1),
+    "RecalcStyleCount": ("style recalcs", 1),
+    "LayoutDuration": ("layout ms", 1000),
+    "RecalcStyleDuration": ("style recalc ms", 1000),
+    "ScriptDuration": ("script ms", 1000),
+    "TaskDuration": ("task ms", 1000),
+}
+# counted from Performance.enable on, so only meaningful when enabled before the navigation
+CDP_COUNTERS = {"layouts", "style recalcs", "layout ms", "style recalc ms", "script ms", "task ms"}
+
+class PerfMetrics:
+    # browser metrics per navigate(): Navigation Timing, paint, LCP/CLS and on
+    # Chromium the CDP Performance domain. Metrics a browser can't give are None
+    # and budgets on them are not checked.
+    def __init__(self) -> None:
+        self.enabled = False
+        self.records: list[dict] = []
+        self.measured = 0
+        self.over_budget = 0
+
+    def configure(self, enabled: bool) -> None:
+        self.enabled = enabled
+
+    async def start(self, context: BrowserContext, page: Page) -> Optional[CDPSession]:
+        browser = context.browser
+        if browser is None or browser.browser_type.name != "chromium":
+            return None
+        try:
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Performance.enable")
+            return cdp
+        except Exception:
+            return None
+
+    async def collect(self, page: Page, cdp: Optional[CDPSession], page_name: str, test: str,
+                      warm: bool, budget: dict[str, float]) -> dict:
+        record: dict[str, Any] = {"test": test, "page": page_name, "url": page.url, "warm": warm}
+        try:
+            timings = await page.evaluate(PERF_SCRIPT)
+        except Exception:
+            timings = {}
+        record.update({
+            "ttfb ms": timings.get("ttfb"),
+            "dom interactive ms": timings.get("domInteractive"),
+            "dom content loaded ms": timings.get("domContentLoaded"),
+            "load ms": timings.get("load"),
+            "transfer kb": timings["transferSize"] / 1024 if timings.get("transferSize") is not None else None,
+            "fp ms": timings.get("fp"),
+            "fcp ms": timings.get("fcp"),
+            "lcp ms": timings.get("lcp"),
+            "cls": timings.get("cls"),
+        })
+        metrics = {}
+        if cdp is not None:
+            try:
+                metrics = {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+                await cdp.detach()
+            except Exception:
+                pass
+        for name, (key, scale) in CDP_METRICS.items():
+            # a warm page was loaded before anyone enabled the domain
+            record[key] = metrics[name] * scale if name in metrics and not (warm and key in CDP_COUNTERS) else None
+        for key, value in record.items():
+            if isinstance(value, float):
+                record[key] = round(value, 3 if key == "cls" else 1)
+        record["over budget"] = [
+            f"{key} {record[key]} > {limit}" for key, limit in budget.items()
+            if record.get(key) is not None and record[key] > limit
+        ]
+        self.measured += 1
+        self.over_budget += bool(record["over budget"])
+        self.records.append(record)
+        return record
+
+    def stats(self) -> dict:
+        return {
+            "navigations measured": self.measured,
+            "over budget": self.over_budget,
+        }
+
+_perf = PerfMetrics()
+
+def get_perf_metrics() -> PerfMetrics:
+    return _perf
+
+ARIA_ROLES = frozenset(get_args(inspect.signature(Page.get_by_role).parameters["role"].annotation))
+_BRACKETS = {")": "(", "]": "[", "}": "{"}
+
+def _check_balanced(selector: str) -> None:
+    stack = []
+    quote = None
+    escaped = False
+    for char in selector:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif quote:
+            quote = None if char == quote else quote
+        elif char in "\"'":
+            quote = char
+        elif char in "([{":
+            stack.append(char)
+        elif char in _BRACKETS:
+            if not stack or stack.pop() != _BRACKETS[char]:
+                raise ValueError(f"Unbalanced '{char}' in selector {selector!r}")
+    if quote or stack:
+        raise ValueError(f"Unclosed {quote or stack[-1]!r} in selector {selector!r}")
+
+class Loc:
+    # a page object's locator, declared once on the class:
+    #     login_button = Loc("css", "button#login")
+    #     username_box = Loc("role", "textbox", name="UserName")
+    #     droppable = Loc("css", "#droppable", within=Loc("role", "tabpanel", name="Simple"))
+    # Checked when the class is defined; page_object.login_button is built on first
+    # use and cached until the page object gets another page.
+    KINDS = ("role", "css", "xpath", "text", "label", "placeholder", "test_id")
+
+    def __init__(self, kind: str, selector: str, name: str | None = None,
+                 exact: bool | None = None, nth: int | None = None, within: "Loc | None" = None) -> None:
+        self.kind = kind
+        self.selector = selector
+        self.name = name
+        self.exact = exact
+        self.nth = nth
+        self.within = within
+        self.attr = ""
+        self._check()
+
+    def _check(self) -> None:
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Unknown locator kind '{self.kind}', expected one of: {', '.join(self.KINDS)}")
+        if not self.selector or not self.selector.strip():
+            raise ValueError(f"Empty {self.kind} locator")
+        match self.kind:
+            case "role":
+                if self.selector not in ARIA_ROLES:
+                    raise ValueError(f"Unknown ARIA role '{self.selector}'")
+            case "css":
+                if self.selector.lstrip().startswith(("/", "(")):
+                    raise ValueError(f"CSS locator looks like XPath: {self.selector!r}")
+                _check_balanced(self.selector)
+            case "xpath":
+                if not self.selector.lstrip().startswith(("/", "(", ".")):
+                    raise ValueError(f"XPath locator must start with '/', '(' or '.': {self.selector!r}")
+                _check_balanced(self.selector)
+        if self.name is not None and self.kind != "role":
+            raise ValueError(f"name= only applies to role locators, not {self.kind}")
+        if self.within is not None and not isinstance(self.within, Loc):
+            raise ValueError(f"within= takes a Loc, not {type(self.within).__name__}")
+
+    def __set_name__(self, owner: type, attr: str) -> None:
+        self.attr = attr
+
+    def __get__(self, page_object: Any, owner: type) -> Any:
+        if page_object is None:
+            return self
+        page = page_object.page
+        if page is None:
+            raise RuntimeError("Page not initialized")
+        cache = page_object.__dict__.setdefault("_locators", {})
+        cached = cache.get(self.attr)
+        if cached is not None and cached[0] is page:
+            return cached[1]
+        locator = self.build(page)
+        cache[self.attr] = (page, locator)
+        return locator
+
+    def build(self, page: Page) -> Locator:
+        root = self.within.build(page) if self.within is not None else page
+        match self.kind:
+            case "role":
+                locator = root.get_by_role(self.selector, name=self.name, exact=self.exact)
+            case "css":
+                locator = root.locator(self.selector)
+            case "xpath":
+                locator = root.locator(f"xpath={self.selector}")
+            case "text":
+                locator = root.get_by_text(self.selector, exact=self.exact)
+            case "label":
+                locator = root.get_by_label(self.selector, exact=self.exact)
+            case "placeholder":
+                locator = root.get_by_placeholder(self.selector, exact=self.exact)
+            case _:
+                locator = root.get_by_test_id(self.selector)
+        return locator.nth(self.nth) if self.nth is not None else locator
+
+    def describe(self) -> str:
+        name = f", name={self.name!r}" if self.name is not None else ""
+        nth = f", nth={self.nth}" if self.nth is not None else ""
+        within = f"{self.within.describe()} >> " if self.within is not None else ""
+        return f"{within}{self.kind}({self.selector!r}{name}{nth})"
+
+@functools.cache
+def _loc_index(page_cls: type) -> dict[tuple, Loc]:
+    # (kind, selector, name, exact) -> the class's registered Loc, for lookups by name
+    return {(spec.kind, spec.selector, spec.name, spec.exact): spec
+            for spec in page_cls.locators().values() if spec.nth is None and spec.within is None}
+
+@functools.cache
+def _adhoc_loc(kind: str, selector: str, name: str | None, exact: bool | None) -> Loc:
+    # one spec per selector a page object looks up without registering it, cached per page like the registered ones
+    spec = Loc(kind, selector, name=name, exact=exact)
+    spec.attr = f"_{spec.describe()}|{exact}"
+    return spec
+
+# BasePage.fill_form: finds every field by its accessible name (aria-labelledby,
+# aria-label, label, placeholder, title; case-insensitive, exact match preferred,
+# like get_by_role's name) and fills it as a user would be seen by the page: focus,
+# the native value setter (React tracks that one), input and change events. Fields not found
+# exactly once, hidden, disabled, read-only or without a value to set (a role=textbox that is
+# neither an input nor contenteditable) are returned as missing.
+FILL_FORM_SCRIPT = """(fields) => {
+    const selector = "input:not([type=hidden]):not([type=checkbox]):not([type=radio]):not([type=submit])"
+        + ":not([type=button]):not([type=file]), textarea, [contenteditable=true], [role=textbox]";
+    const text = (el) => (el ? el.textContent : "").replace(/\\s+/g, " ").trim();
+    const nameOf = (el) => {
+        const labelledby = el.getAttribute("aria-labelledby");
+        if (labelledby) return labelledby.split(/\\s+/).map((id) => text(document.getElementById(id))).join(" ");
+        if (el.getAttribute("aria-label")) return el.getAttribute("aria-label").trim();
+        if (el.labels && el.labels.length) return [...el.labels].map(text).join(" ");
+        return (el.getAttribute("placeholder") || el.getAttribute("title") || "").trim();
+    };
+    const usable = (el) => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== "hidden"
+        && !el.disabled && !el.readOnly;
+    const candidates = [...document.querySelectorAll(selector)].map((el) => [el, nameOf(el).toLowerCase()]);
+    const filled = [];
+    const missing = [];
+    for (const [name, value] of fields) {
+        const wanted = name.toLowerCase();
+        let matches = candidates.filter(([, label]) => label === wanted);
+        if (!matches.length) matches = candidates.filter(([, label]) => label.includes(wanted));
+        const el = matches.length === 1 ? matches[0][0] : null;
+        // the native value setters only work on their own elements (a plain role=textbox div would throw)
+        const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype
+            : el instanceof HTMLInputElement ? HTMLInputElement.prototype : null;
+        if (!el || !usable(el) || (!proto && !el.isContentEditable)) {
+            missing.push(name);
+            continue;
+        }
+        const started = performance.now();
+        el.focus();
+        if (proto) {
+            Object.getOwnPropertyDescriptor(proto, "value").set.call(el, value);
+        } else {
+            el.textContent = value;
+        }
+        el.dispatchEvent(new InputEvent("input", {bubbles: true, inputType: "insertText", data: value}));
+        el.dispatchEvent(new Event("change", {bubbles: true}));
+        filled.push({name, ms: performance.now() - started});
+    }
+    return {filled, missing};
+}"""
+
+# BasePage.expect_all: the state of every text/css/xpath expectation in one pass over
+# the page. Texts match like get_by_text: whitespace-normalized, a case-insensitive
+# substring or with exact the whole text, and only the deepest elements that match.
+EXPECT_ALL_SCRIPT = """(expectations) => {
+    const skip = new Set(["SCRIPT", "STYLE", "NOSCRIPT", "TEMPLATE"]);
+    const normalize = (s) => s.replace(/\\s+/g, " ").trim();
+    const visible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility === "visible";
+    };
+    let texts = null;
+    const byText = (wanted, exact) => {
+        texts = texts || [...document.body.querySelectorAll("*")].filter((el) => !skip.has(el.tagName))
+            .map((el) => [el, normalize(el.textContent)]);
+        const target = exact ? normalize(wanted) : normalize(wanted).toLowerCase();
+        const matched = new Set(texts.filter(([, text]) => exact ? text === target : text.toLowerCase().includes(target))
+            .map(([el]) => el));
+        return [...matched].filter((el) => ![...el.children].some((child) => matched.has(child)));
+    };
+    const find = ({kind, selector, exact}) => {
+        if (kind === "css") return [...document.querySelectorAll(selector)];
+        if (kind === "xpath") {
+            const found = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            return Array.from({length: found.snapshotLength}, (_, i) => found.snapshotItem(i))
+                .filter((node) => node.nodeType === Node.ELEMENT_NODE);
+        }
+        return byText(selector, exact);
+    };
+    return expectations.map((expectation) => {
+        let found;
+        try {
+            found = find(expectation);
+        } catch (e) {
+            return {met: false, found: 0, visible: 0, error: String(e.message || e)};
+        }
+        const picked = expectation.nth === null ? found : [found.at(expectation.nth)].filter(Boolean);
+        const shown = picked.filter(visible).length;
+        return {met: expectation.visible ? shown > 0 : shown === 0, found: found.length, visible: shown};
+    });
+}"""
+EXPECT_ALL_WAIT = "(expectations) => (" + EXPECT_ALL_SCRIPT + ")(expectations).every((result) => result.met)"
+
+
+def _unmet(result: dict, visible: bool) -> str:
+    if result.get("error"):
+        return f"error: {result['error']}"
+    if not visible:
+        return f"{result['visible']} still visible"
+    return "not found" if not result["found"] else f"{result['found']} found, none visible"
+
 class BasePage:    
-    def __init__(self, url: str = "") -> None:
+    # requests its pages never need, on top of the global policy (None: global only)
+    block_policy: Optional[BlockPolicy] = BLOCK_ADS
+    # navigate() is done when the load event below fired and ready_selector is attached
+    ready_state: Literal["load", "domcontentloaded", "networkidle", "commit"] = "commit"
+    ready_selector: Optional[str] = None
+    # limits on PerfMetrics record keys ("lcp ms", "cls", "js heap mb", ...), checked with --perf-metrics;
+    # the default is where Web Vitals rate LCP and CLS as poor
+    perf_budget: dict[str, float] = {"lcp ms": 4000, "cls": 0.25}
+
+    def __init__(self, url: str = "", session: BrowserSession | BrowserContext | None = None) -> None:
         self.url = url
+        self.session = session
         self.page_title = "DEMOQA"
         self.page: Optional[Page] = None
+
+    @property
+    def context(self) -> BrowserContext:
+        if self.session is None:
+            return get_context()
+        if isinstance(self.session, BrowserSession):
+            return self.session.context
+        return self.session
  
     async def __aenter__(self) -> Any:
         await self.navigate()
         return self
  
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> Any:
+        await self.close_page()
         return None
  
+    def ready_timeout(self, default: int = 60000) -> int:
+        return _history.timeout_ms(_history_key(type(self), self.context), default)
+
+    @timed_action("url")
     async def navigate(self, url: str | None = None,
-                       timeout: int = 60000,
-                       wait_until: Literal["load", "domcontentloaded", "networkidle", "commit"] = "commit") -> Page | None:
+                       timeout: int | None = None,
+                       wait_until: Literal["load", "domcontentloaded", "networkidle", "commit"] | None = None) -> Page | None:
         try:
-            context = get_context()
-            self.page = await context.new_page()
             target_url = url or self.url
-            if target_url:
-                await self.goto(target_url, timeout=timeout, wait_until=wait_until)
+            # the readiness definition, warm pages and the history only describe the class's own url
+            own_url = bool(target_url) and target_url == self.url
+            self.page, warm = await _page_pools.get(self.context).acquire(type(self) if own_url else None)
+            await _blocker.install(self.context, self.page, self.block_policy)
+            cdp = await _perf.start(self.context, self.page) if _perf.enabled and target_url else None
+            if target_url and not warm:
+                timeout = timeout or (self.ready_timeout() if own_url else 60000)
+                started = time.perf_counter()
+                await self.goto(target_url, timeout=timeout, wait_until=wait_until or self.ready_state)
+                if own_url and self.ready_selector:
+                    remaining = max(timeout - (time.perf_counter() - started) * 1000, 1)
+                    await self.page.locator(self.ready_selector).first.wait_for(state="attached", timeout=remaining)
+                if own_url and wait_until in (None, self.ready_state):
+                    # a caller's own wait_until waits for something else than the class's readiness
+                    _history.record(_history_key(type(self), self.context), time.perf_counter() - started)
+            if _perf.enabled and target_url:
+                session = _page_session(self)
+                record = await _perf.collect(self.page, cdp, type(self).__name__, session.name if session else "",
+                                             warm, self.perf_budget if own_url else {})
+                if session:
+                    session.perf.append(record)
             return self.page
         except Exception as e:
             raise e
 
+    @timed_action("url")
     async def goto(self, url: str,
                    timeout: int = 60000,
                    wait_until: Literal["load", "domcontentloaded", "networkidle", "commit"] = "commit") -> None:
         if self.page:
-            await self.page.goto(url, timeout=timeout, wait_until=wait_until)
+            await self.page.goto(site_url(url), timeout=timeout, wait_until=wait_until)
         else:
             raise RuntimeError("Page not initialized")
 
     async def close_page(self) -> None:
         if self.page:
-            await self.page.close()
+            await _page_pools.get(self.context).release(self.page, type(self))
             self.page = None
  
-    async def expect_title(self, title: str | None = None, timeout: int = 30000) -> None:
+    @timed_action("title")
+    async def expect_title(self, title: str | None = None, timeout: int | None = None) -> None:
         if self.page:
             if title is None:
                 title = self.page_title
-            await expect(self.page).to_have_title(title, timeout=timeout)
+            # the old fixed 30s until the page has enough history
+            await expect(self.page).to_have_title(title, timeout=timeout or self.ready_timeout(30000))
         else:
             raise ValueError("Page not initialized")
 
+    @timed_action("name")
     async def text_box_interact(
             self, 
             name: str, 
@@ -152,7 +1668,7 @@ class BasePage:
     ) -> None:
 
         if self.page:
-            textbox = self.page.get_by_role("textbox", name=name, **locator_kwargs)
+            textbox = self.role_locator("textbox", name, locator_kwargs)
             if not textbox:
                 raise ValueError(f"Textbox with name '{name}' not found")
             match action:
@@ -167,6 +1683,7 @@ class BasePage:
         else:
             raise RuntimeError("Page not initialized")
                 
+    @timed_action("name")
     async def button_interact(
             self, 
             name: str, 
@@ -177,7 +1694,7 @@ class BasePage:
     ) -> None:
 
         if self.page:
-            button = self.page.get_by_role("button", name=name, **locator_kwargs)
+            button = self.role_locator("button", name, locator_kwargs)
             if not button:
                 raise ValueError(f"Textbox with name '{name}' not found")
             match action:
@@ -188,6 +1705,7 @@ class BasePage:
         else:
             raise RuntimeError("Page not initialized")
 
+    @timed_action("text")
     async def expect_text_visible(
             self, text: str, 
             exact: bool | None = None, 
@@ -200,74 +1718,261 @@ class BasePage:
         else:
             raise RuntimeError("Page not initialized")
 
+    @timed_action()
+    async def expect_all(
+            self, expectations: list[str | Loc | Locator],
+            exact: bool | None = None,
+            visible: bool = True,
+            timeout: float | None = None
+    ) -> None:
+        # every expectation visible (or, with visible=False, hidden) within one shared timeout.
+        # Texts (get_by_text, exact applies to them) and text/css/xpath Locs are polled together
+        # by one in-page check on the main frame; other Locs and Locators run expect() alongside.
+        # Any visible match is enough, there's no strict mode. Fails with every unmet expectation.
+        if not self.page:
+            raise RuntimeError("Page not initialized")
+
+        timeout = 5000 if timeout is None else timeout
+        checks, labels, locators = [], [], []
+        for expectation in expectations:
+            if isinstance(expectation, str):
+                expectation = Loc("text", expectation, exact=exact)
+            if isinstance(expectation, Loc) and expectation.kind in ("text", "css", "xpath") and expectation.within is None:
+                checks.append({"kind": expectation.kind, "selector": expectation.selector,
+                               "exact": bool(expectation.exact), "nth": expectation.nth, "visible": visible})
+                labels.append(expectation.describe())
+            else:
+                locators.append(expectation.build(self.page) if isinstance(expectation, Loc) else expectation)
+
+        async def check_page() -> list[str]:
+            if not checks:
+                return []
+            try:
+                await self.page.wait_for_function(EXPECT_ALL_WAIT, arg=checks, polling=100, timeout=timeout)
+                return []
+            except PlaywrightTimeoutError:
+                results = await self.page.evaluate(EXPECT_ALL_SCRIPT, checks)
+            return [f"{label}: {_unmet(result, visible)}" for label, result in zip(labels, results) if not result["met"]]
+
+        async def check_locator(locator: Locator) -> list[str]:
+            try:
+                await expect(locator).to_be_visible(visible=visible, timeout=timeout)
+                return []
+            except Exception as e:
+                return [f"{locator}: {str(e).strip().splitlines()[0]}"]
+
+        unmet = sum(await asyncio.gather(check_page(), *map(check_locator, locators)), [])
+        if unmet:
+            raise AssertionError(f"{len(unmet)} of {len(expectations)} expectations unmet after {timeout:g} ms:\n"
+                                 + "\n".join(f"  {line}" for line in unmet))
+
+    @timed_action("text")
     async def type_text(self, text: str, **kwargs) -> None:
         if self.page:
             await self.page.keyboard.type(text, **kwargs)
         else:
             raise RuntimeError("Page not initialized")
 
+    @timed_action("keys")
     async def press_key(self, keys: str, **kwargs) -> None:
         if self.page:
             await self.page.keyboard.press(keys, **kwargs)
         else:
             raise RuntimeError("Page not initialized")
+
+    @timed_action()
+    async def fill_form(self, fields: dict[str, str], compare: bool = False) -> dict:
+        # textbox name -> value, filled in one evaluate; compare also refills them one by
+        # one through text_box_interact and reports the speedup
+        if not self.page:
+            raise RuntimeError("Page not initialized")
+
+        started = time.perf_counter()
+        result = await self.page.evaluate(FILL_FORM_SCRIPT, [[name, str(value)] for name, value in fields.items()])
+        timings = {field["name"]: round(field["ms"], 2) for field in result["filled"]}
+        for name in result["missing"]:
+            # not there yet, ambiguous, ...: Playwright's role lookup with its waits and errors
+            field_started = time.perf_counter()
+            await self.text_box_interact(name, "fill", str(fields[name]))
+            timings[name] = round((time.perf_counter() - field_started) * 1000, 2)
+        batched = (time.perf_counter() - started) * 1000
+        report = {"fields": timings, "fallback": result["missing"], "batched ms": round(batched, 2)}
+        if compare:
+            started = time.perf_counter()
+            for name, value in fields.items():
+                await self.text_box_interact(name, "fill", str(value))
+            sequential = (time.perf_counter() - started) * 1000
+            report["sequential ms"] = round(sequential, 2)
+            report["speedup"] = round(sequential / batched, 2) if batched else None
+        return report
+
+    def role_locator(self, role: str, name: str, locator_kwargs: dict = {}) -> Locator:
+        # the registered Loc with this role and name when the class declares one, otherwise
+        # an ad hoc one; either way built once per page
+        if set(locator_kwargs) - {"exact"}:
+            return self.page.get_by_role(role, name=name, **locator_kwargs)
+        key = ("role", role, name, locator_kwargs.get("exact"))
+        spec = _loc_index(type(self)).get(key) or _adhoc_loc(*key)
+        return spec.__get__(self, type(self))
+
+    @classmethod
+    def locators(cls) -> dict[str, Loc]:
+        # the class's Loc registry, inherited ones included
+        specs = {}
+        for klass in reversed(cls.__mro__):
+            specs.update({attr: value for attr, value in vars(klass).items() if isinstance(value, Loc)})
+        return specs
+
+    async def _timed_ms(self, call, repeat: int) -> float:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await call()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    async def selector_health(self, slow_ms: float = 20.0, repeat: int = 3) -> list[dict]:
+        # how long each registered locator takes to resolve on the current page, best of
+        # repeat, minus one protocol round trip; role-by-name lookups are the usual suspects
+        if not self.page:
+            raise RuntimeError("Page not initialized")
+
+        round_trip = await self._timed_ms(lambda: self.page.evaluate("0"), repeat)
+        records = []
+        for attr, spec in self.locators().items():
+            locator = getattr(self, attr)
+            record = {"page": type(self).__name__, "locator": attr, "selector": spec.describe()}
+            try:
+                record["matches"] = await locator.count()
+                record["ms"] = round(max(await self._timed_ms(locator.count, repeat) - round_trip, 0.0), 2)
+                record["slow"] = record["ms"] > slow_ms
+            except Exception as e:
+                record.update({"matches": 0, "ms": None, "slow": False, "error": str(e).splitlines()[0]})
+            records.append(record)
+        return records
  
 class LoginPage(BasePage):
     url = "https://demoqa.com/login"
+    ready_selector = "#login, #userName-value"
     ph_username = 'UserName'
     ph_password = 'Password'
     username = "oabgnol63"
     password = "Exploit99*"
     login_button_id = "button#login"
+    username_box = Loc("role", "textbox", name=ph_username)
+    password_box = Loc("role", "textbox", name=ph_password)
+    login_button = Loc("css", login_button_id)
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
 
+    @timed_action("login_button_id")
     async def login(self, username, password):
         if self.page:
-            await self.page.get_by_role("textbox", name=self.ph_username).fill(username)
-            await self.page.get_by_role("textbox", name=self.ph_password).fill(password)
-            await self.page.click(f'{self.login_button_id}')
+            await self.username_box.fill(username)
+            await self.password_box.fill(password)
+            await self.login_button.click()
         else:
             raise RuntimeError("Page not initialized")
+
+async def api_login(
+        request_context: APIRequestContext,
+        username: str,
+        password: str,
+        base_url: str = "https://demoqa.com"
+) -> dict:
+    # logs in through the Account API and returns a storage_state with the same
+    # cookies the login form sets, ready for new_context(storage_state=...)
+    base_url = base_url.rstrip("/")
+    credentials = {"userName": username, "password": password}
+    res = await request_context.post(f"{base_url}/Account/v1/GenerateToken", data=credentials)
+    body = await res.json() if res.ok else {}
+    if not body.get("token"):
+        raise RuntimeError(f"Login failed for '{username}': {res.status} {body.get('result', '')}")
+    res = await request_context.post(f"{base_url}/Account/v1/Login", data=credentials)
+    if not res.ok:
+        raise RuntimeError(f"Login failed for '{username}': {res.status} {await res.text()}")
+    user = await res.json()
+
+    expires = datetime.fromisoformat(body["expires"]).timestamp()
+    domain = urlparse(base_url).hostname
+    values = {
+        "userID": user["userId"],
+        "userName": user["username"],
+        "token": body["token"],
+        "expires": body["expires"],
+    }
+    return {
+        "cookies": [
+            {
+                "name": name,
+                "value": value,
+                "domain": domain,
+                "path": "/",
+                "expires": expires,
+                "httpOnly": False,
+                "secure": False,
+                "sameSite": "Lax",
+            }
+            for name, value in values.items()
+        ],
+        "origins": [],
+    }
  
 class TextBoxPage(BasePage):
     url = "https://demoqa.com/text-box"
+    block_policy = BLOCK_ADS_AND_MEDIA
+    ready_selector = "#userName"
     fullname_ph = "Full Name"
     email_ph = "name@example.com"
     current_address_ph = "Current Address"
-    def __init__(self):
-        super().__init__(url=self.url)
+    name_box = Loc("role", "textbox", name=fullname_ph)
+    email_box = Loc("role", "textbox", name=email_ph)
+    address_box = Loc("role", "textbox", name=current_address_ph)
+    submit_button = Loc("role", "button", name="Submit")
+
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
     
+    @timed_action("fullname_ph")
     async def fill_name(self, name: str) -> None:
         if self.page:
-            await self.text_box_interact(self.fullname_ph, "fill", name)
+            await self.name_box.fill(name)
         else:
             raise RuntimeError("Page not initialized")
         
+    @timed_action("email_ph")
     async def fill_email(self, email: str) -> None:
         if self.page:
-            await self.text_box_interact(self.email_ph, "fill", email)
+            await self.email_box.fill(email)
         else:
             raise RuntimeError("Page not initialized")
         
+    @timed_action("current_address_ph")
     async def fill_address(self, address: str) -> None:
         if self.page:
-            await self.text_box_interact(self.current_address_ph, "fill", address)
+            await self.address_box.fill(address)
         else:
             raise RuntimeError("Page not initialized")
    
 class DragPage(BasePage):
     url = "https://demoqa.com/droppable"
+    block_policy = BLOCK_ADS_AND_MEDIA
+    ready_selector = "#draggable"
     drag_id = "#draggable"
     drop_id = "#droppable"
     simple_drop_name = "Simple"
+    draggable = Loc("css", drag_id)
+    droppable = Loc("css", drop_id, within=Loc("role", "tabpanel", name=simple_drop_name))
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
   
 class SelectPage(BasePage):
     url = "https://demoqa.com/select-menu"
+    block_policy = BLOCK_ADS_AND_MEDIA
+    ready_selector = "#cars"
  
     group_menu = {
         "id": "#withOptGroup svg",
@@ -289,155 +1994,229 @@ class SelectPage(BasePage):
         "id": "#cars",
         "sel": ["volvo"]
     }
+
+    group_menu_toggle = Loc("css", group_menu["id"])
+    select_one_toggle = Loc("css", select_one["id"])
+    select_menu_toggle = Loc("css", select_menu_container["id"], nth=2)
+    cars_select = Loc("css", inplace_select["id"])
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
         
 class AlertPage(BasePage):
     url = "https://demoqa.com/alerts"
+    ready_selector = "#alertButton"
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
   
 class FramePage(BasePage):
     url = "https://demoqa.com/frames"
+    ready_selector = "#frame1"
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
   
 class CheckBoxPage(BasePage):
     url = "https://demoqa.com/checkbox"
+    block_policy = BLOCK_ADS_AND_MEDIA
+    ready_selector = "#tree-node"
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
   
 class RadioButtonPage(BasePage):
     url = "https://demoqa.com/radio-button"
+    block_policy = BLOCK_ADS_AND_MEDIA
+    ready_selector = "#yesRadio"
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
   
 class MultiPage(BasePage):
     url = "https://demoqa.com/browser-windows"
+    ready_selector = "#tabButton"
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
   
 class CalendarPage(BasePage):
     url = "https://demoqa.com/date-picker"
+    block_policy = BLOCK_ADS_AND_MEDIA
+    ready_selector = "#datePickerMonthYearInput"
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
+
+# BooksPage.table_snapshot: a react-table's headers, sort state, data rows keyed by
+# header label (padding rows left out) and pagination, read in one evaluate
+TABLE_SNAPSHOT_SCRIPT = """(table) => {
+    const text = (el) => (el ? el.textContent.trim() : "");
+    const headers = [...table.querySelectorAll(".rt-thead.-header .rt-th")].map((th) => ({
+        label: text(th),
+        sort: th.classList.contains("-sort-asc") ? "ascending" : th.classList.contains("-sort-desc") ? "descending" : null,
+    }));
+    const groups = [...table.querySelectorAll(".rt-tbody .rt-tr-group")];
+    const rows = groups
+        .map((group) => group.querySelector(".rt-tr"))
+        .filter((row) => row && !row.classList.contains("-padRow"))
+        .map((row) => Object.fromEntries([...row.querySelectorAll(".rt-td")].map(
+            (td, i) => [headers[i] ? headers[i].label : String(i), text(td)])));
+    const jump = table.querySelector(".-pageJump input");
+    const total = table.querySelector(".-totalPages");
+    const size = table.querySelector(".-pageSizeOptions select");
+    return {
+        headers,
+        rows,
+        rowGroups: groups.length,
+        page: jump ? Number(jump.value) : null,
+        pages: total ? Number(text(total)) : null,
+        rowsPerPage: size ? Number(size.value) : null,
+    };
+}"""
 
 class BooksPage(BasePage):
     url = "https://demoqa.com/books"
+    block_policy = BLOCK_ADS_AND_MEDIA
+    ready_selector = ".action-buttons"
 
     title_header = "Title"
     num_rows_per_page_dropdown = "rows per page"
     row_selector = "div.rt-tr-group"
     next_page_text = "Next"
     current_page_spinbutton_name = "jump to page"
-    book_filter_xpath = "//div[@class='action-buttons']"
+    table_selector = ".ReactTable"
+    title_header_text = Loc("text", title_header)
+    rows_per_page = Loc("label", num_rows_per_page_dropdown)
+    next_page_button = Loc("role", "button", name=next_page_text)
+    current_page_box = Loc("role", "spinbutton", name=current_page_spinbutton_name)
+    table = Loc("css", table_selector, nth=0)
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
 
+    @timed_action("title_header")
     async def sort_by_title(self, order: str) -> str:
         match order:
             case "ascending":
-                await self.page.get_by_text(self.title_header).click()
+                await self.title_header_text.click()
             case "descending":
-                await self.page.get_by_text(self.title_header).click(click_count=2)
+                await self.title_header_text.click(click_count=2)
             case _:
                 raise ValueError(f"Unsupported sort order: {order}")
 
-    async def verify_sort(self, column: str, order: str) -> bool:
+    @timed_action("table_selector")
+    async def table_snapshot(self, until: Callable[[dict], bool] | None = None, timeout: float = 5000) -> dict:
+        # the whole table in one round trip, for the verify_* methods to share; with until,
+        # read again like expect() retries (the table re-renders after filters and paging)
+        # until it holds or timeout ms passed, and return the last read
         if not self.page:
             raise RuntimeError("Page not initialized")
-        
-        # Get the parent, verify the class has -sort-asc or -sort-desc
-        column_header = self.page.get_by_text(column).locator("..").first
-        
-        classes = await column_header.get_attribute("class")
-        
-        if order == "ascending":
-            return "-sort-asc" in classes if classes else False
-        elif order == "descending":
-            return "-sort-desc" in classes if classes else False
-        
-        return False
-    
 
+        deadline = time.perf_counter() + timeout / 1000
+        delays = iter((0.1, 0.25, 0.5))
+        while True:
+            table = self._table_dict(await self.table.evaluate(TABLE_SNAPSHOT_SCRIPT))
+            remaining = deadline - time.perf_counter()
+            if until is None or until(table) or remaining <= 0:
+                return table
+            await asyncio.sleep(min(next(delays, 1.0), remaining))
+
+    @staticmethod
+    def _table_dict(table: dict) -> dict:
+        return {
+            "headers": [header["label"] for header in table["headers"]],
+            "sort": {header["label"]: header["sort"] for header in table["headers"] if header["sort"]},
+            "rows": table["rows"],
+            "row groups": table["rowGroups"],
+            "page": table["page"],
+            "pages": table["pages"],
+            "rows per page": table["rowsPerPage"],
+        }
+
+    @timed_action("column")
+    async def verify_sort(self, column: str, order: str, table: dict | None = None) -> bool:
+        # the header shows the order and the rows on the page are really in it
+        if order not in ("ascending", "descending"):
+            return False
+
+        def sorted_by(table: dict) -> bool:
+            values = [row.get(column, "") for row in table["rows"]]
+            return table["sort"].get(column) == order \
+                and values == sorted(values, key=str.lower, reverse=order == "descending")
+
+        return sorted_by(table or await self.table_snapshot(until=sorted_by))
+
+
+    @timed_action("num_rows_per_page_dropdown")
     async def set_row_per_page(self, number: int) -> None:
         if not self.page:
             raise RuntimeError("Page not initialized")
         
-        await self.page.get_by_label(self.num_rows_per_page_dropdown).select_option(str(number))
+        await self.rows_per_page.select_option(str(number))
 
-    async def verify_num_pages(self, expected_number: int) -> bool:
-        if not self.page:
-            raise RuntimeError("Page not initialized")
-        
-        total_pages_element = self.page.locator("span.-totalPages")
-        total_pages_text = await total_pages_element.text_content()
-        if not total_pages_text:
+    @timed_action("table_selector")
+    async def verify_num_pages(self, expected_number: int, table: dict | None = None) -> bool:
+        table = table or await self.table_snapshot(until=lambda table: table["pages"] == expected_number)
+        if table["pages"] is None:
             raise RuntimeError("Could not find total pages information")
         
-        total_pages = int(total_pages_text.strip())
-        
-        return total_pages == expected_number
+        return table["pages"] == expected_number
 
-    async def verify_num_rows(self, expected_number: int) -> bool:
-        if not self.page:
-            raise RuntimeError("Page not initialized")
-        
-        rows = self.page.locator(self.row_selector)
-        row_count = await rows.count()
-        return row_count == expected_number
+    @timed_action("row_selector")
+    async def verify_num_rows(self, expected_number: int, table: dict | None = None) -> bool:
+        # row groups, padding rows of a short last page included
+        table = table or await self.table_snapshot(until=lambda table: table["row groups"] == expected_number)
+        return table["row groups"] == expected_number
     
+    @timed_action("next_page_text")
     async def click_next_page_button(self, times: int = 1) -> None:
         if not self.page:
             raise RuntimeError("Page not initialized")
         
-        next_button = self.page.get_by_role("button", name=self.next_page_text)
         for _ in range(times):
-            await next_button.click()
+            await self.next_page_button.click()
 
+    @timed_action("current_page_spinbutton_name")
     async def verify_current_page(self, expected_page: int) -> None:
         if not self.page:
             raise RuntimeError("Page not initialized")
         
-        current_page_input = self.page.get_by_role("spinbutton", name=self.current_page_spinbutton_name)
-        await expect(current_page_input).to_have_value(str(expected_page))
+        await expect(self.current_page_box).to_have_value(str(expected_page))
 
-    async def verify_filter_by_title(self, title: str) -> None:
-        if not self.page:
-            raise RuntimeError("Page not initialized")
-        
-        filter_section = self.page.locator(self.book_filter_xpath)
-        row_count = await filter_section.count()
+    @timed_action("title")
+    async def verify_filter_by_title(self, title: str, table: dict | None = None) -> None:
+        def filtered(table: dict) -> list:
+            return [row.get(self.title_header) for row in table["rows"]]
+
+        titles = filtered(table or await self.table_snapshot(until=lambda table: filtered(table) == [title]))
 
-        assert row_count == 1, f"Expected 1 row in filter section for title '{title}', but found {row_count}"
-        await expect(filter_section).to_have_text(title)
+        assert len(titles) == 1, f"Expected 1 row in filter section for title '{title}', but found {len(titles)}"
+        assert titles[0] == title, f"Expected the filtered row to be '{title}', but found '{titles[0]}'"
 
 class RegisterPage(BasePage):
     url = "https://demoqa.com/register"
+    ready_selector = "#register"
     first_name_tb = "First Name"
     last_name_tb = "Last Name"
     username_tb = "UserName"
     pwd_tb = "Password"
     verify_box_tb = 'iframe[name=\"a-22qw0hdpmj3k\"]'
     verify_name = "I'm not a robot"
+    register_button = Loc("role", "button", name="Register")
  
-    def __init__(self):
-        super().__init__(url=self.url)
+    def __init__(self, session: BrowserSession | BrowserContext | None = None):
+        super().__init__(url=self.url, session=session)
 
+    @timed_action()
     async def reg_new_user(self, user: dict) -> dict:
 
-        await self.text_box_interact(self.first_name_tb, "fill", user["firstName"])
-        await self.text_box_interact(self.last_name_tb, "fill", user["lastName"])
-        await self.text_box_interact(self.username_tb, "fill", user["userName"])
-        await self.text_box_interact(self.pwd_tb, "fill", user["password"])
+        await self.fill_form({
+            self.first_name_tb: user["firstName"],
+            self.last_name_tb: user["lastName"],
+            self.username_tb: user["userName"],
+            self.pwd_tb: user["password"],
+        })
         await self.page.locator(self.verify_box_tb).content_frame.get_by_role("checkbox", name=self.verify_name).click()
-        await self.page.get_by_role("button", name="Register").click()
+        await self.register_button.click()
         return user
\ No newline at end of file
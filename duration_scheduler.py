@@ -0,0 +1,277 @@
+#####################
+#
+# pytest test_final.py test_w1.py -n 4 --duration-schedule
+#
+# With --duration-schedule or --record-durations, keeps every test's
+# duration (setup + call + teardown) and outcome in a local sqlite database
+# (--duration-db, the controller writes it after the run; other runs don't
+# touch it). --record-durations alone only records, e.g. from serial runs
+# to seed the history; --duration-schedule also replaces xdist's load
+# scheduling:
+#
+#   - every test gets a predicted duration: the median of its last runs, of
+#     its last skips when it was skipped last time (browser-parametrized
+#     tests skipped for a channel cost next to nothing), or the mean of the
+#     known tests when it has no history
+#   - tests are packed onto workers longest-first, each on the worker that
+#     finishes it earliest; a worker's first test of a browser costs
+#     --browser-launch-cost extra, so browsers stick to a few workers
+#   - a worker runs its tests grouped by browser, longest first, and once
+#     its own queue is empty it takes the shortest queued test of the worker
+#     with the most work left, preferring a browser it already has
+#
+# The predicted and the actual makespan are printed at the end of the run.
+# Which browser a test needs comes from the conftest hook that creates the
+# scheduler.
+#
+#####################
+
+import time
+import sqlite3
+import statistics
+from typing import Callable, Optional
+
+import pytest
+from xdist.scheduler import LoadScheduling
+
+_DB_KEY = pytest.StashKey["DurationDB"]()
+_SCHED_KEY = pytest.StashKey["DurationScheduling"]()
+
+
+def pytest_addoption(parser):
+    parser.addoption("--duration-db", action="store", default=".test-durations.sqlite",
+                     help="sqlite file with the durations and outcomes of past runs ('off' to disable)")
+    parser.addoption("--duration-schedule", action="store_true", default=False,
+                     help="with -n: pack tests onto workers longest-first by their past durations (records them too)")
+    parser.addoption("--record-durations", action="store_true", default=False,
+                     help="record durations and outcomes to --duration-db without --duration-schedule")
+    parser.addoption("--browser-launch-cost", action="store", type=float, default=3.0,
+                     help="seconds a worker pays for the first test of a browser, for --duration-schedule")
+
+
+def pytest_configure(config):
+    path = config.getoption("--duration-db")
+    config.stash[_DB_KEY] = DurationDB(None if path == "off" else path)
+    recording = config.getoption("--duration-schedule") or config.getoption("--record-durations")
+    if recording and not hasattr(config, "workerinput"):
+        # the controller sees every worker's reports
+        config.pluginmanager.register(DurationRecorder(config.stash[_DB_KEY]), "duration_recorder")
+
+
+class DurationDB:
+    def __init__(self, path: Optional[str], keep: int = 10) -> None:
+        self.path = path
+        self.keep = keep
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("CREATE TABLE IF NOT EXISTS durations "
+                   "(nodeid TEXT NOT NULL, outcome TEXT NOT NULL, duration REAL NOT NULL, recorded REAL NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS durations_nodeid ON durations (nodeid, recorded)")
+        return db
+
+    def history(self) -> dict[str, tuple[float, str]]:
+        # nodeid -> (predicted seconds, last outcome)
+        if not self.path:
+            return {}
+        runs: dict[str, list[tuple[str, float]]] = {}
+        db = self._connect()
+        try:
+            for nodeid, outcome, duration in db.execute(
+                    "SELECT nodeid, outcome, duration FROM durations ORDER BY recorded DESC"):
+                runs.setdefault(nodeid, []).append((outcome, duration))
+        finally:
+            db.close()
+        history = {}
+        for nodeid, results in runs.items():
+            last = results[0][0]
+            same = [duration for outcome, duration in results if (outcome == "skipped") == (last == "skipped")]
+            history[nodeid] = (statistics.median(same), last)
+        return history
+
+    def save(self, results: dict[str, tuple[float, str]]) -> None:
+        if not self.path or not results:
+            return
+        now = time.time()
+        db = self._connect()
+        try:
+            with db:
+                db.executemany("INSERT INTO durations VALUES (?, ?, ?, ?)",
+                               [(nodeid, outcome, duration, now) for nodeid, (duration, outcome) in results.items()])
+                db.execute("DELETE FROM durations WHERE rowid IN (SELECT rowid FROM (SELECT rowid, ROW_NUMBER() "
+                           "OVER (PARTITION BY nodeid ORDER BY recorded DESC) AS n FROM durations) WHERE n > ?)",
+                           (self.keep,))
+        finally:
+            db.close()
+
+
+class DurationRecorder:
+    def __init__(self, db: DurationDB) -> None:
+        self.db = db
+        self.results: dict[str, tuple[float, str]] = {}
+
+    def pytest_runtest_logreport(self, report) -> None:
+        duration, outcome = self.results.get(report.nodeid, (0.0, "passed"))
+        if report.failed:
+            outcome = "failed"
+        elif report.skipped and outcome != "failed":
+            outcome = "skipped"
+        self.results[report.nodeid] = (duration + report.duration, outcome)
+
+    def pytest_sessionfinish(self) -> None:
+        self.db.save(self.results)
+
+
+class DurationScheduling(LoadScheduling):
+    def __init__(self, config, log=None, group_of: Callable[[str], Optional[str]] = lambda nodeid: None) -> None:
+        super().__init__(config, log)
+        self.group_of = group_of
+        self.launch_cost = config.getoption("--browser-launch-cost")
+        self.history = config.stash[_DB_KEY].history()
+        self.node2queue: dict = {}
+        self.node2groups: dict = {}
+        self.predicted: list[float] = []
+        # browser per collection index, None when the test needs none (api, skipped last time)
+        self.groups: list[Optional[str]] = []
+        self.predicted_load: dict = {}
+        self.busy: dict = {}
+        self.unknown = 0
+        self.stolen = 0
+        self.started = 0.0
+        self.finished = 0.0
+        config.stash[_SCHED_KEY] = self
+
+    @property
+    def tests_finished(self) -> bool:
+        if any(self.node2queue.values()):
+            return False
+        return super().tests_finished
+
+    @property
+    def has_pending(self) -> bool:
+        return any(self.node2queue.values()) or super().has_pending
+
+    def add_node(self, node) -> None:
+        super().add_node(node)
+        self.node2queue[node] = []
+        self.node2groups[node] = set()
+        self.busy[node] = 0.0
+
+    def _predict(self) -> None:
+        known = [duration for duration, outcome in self.history.values() if outcome != "skipped"]
+        default = statistics.mean(known) if known else 1.0
+        for nodeid in self.collection:
+            if nodeid in self.history:
+                duration, outcome = self.history[nodeid]
+                self.predicted.append(duration)
+                self.groups.append(None if outcome == "skipped" else self.group_of(nodeid))
+            else:
+                self.unknown += 1
+                self.predicted.append(default)
+                self.groups.append(self.group_of(nodeid))
+
+    def _plan(self) -> None:
+        loads = {node: 0.0 for node in self.nodes}
+        for index in sorted(self.pending, key=lambda i: self.predicted[i], reverse=True):
+            group = self.groups[index]
+
+            def finish(node) -> float:
+                launch = self.launch_cost if group is not None and group not in self.node2groups[node] else 0.0
+                return loads[node] + self.predicted[index] + launch
+
+            node = min(self.nodes, key=finish)
+            loads[node] = finish(node)
+            self.node2groups[node].add(group)
+            self.node2queue[node].append(index)
+        self.pending.clear()
+        for node, queue in self.node2queue.items():
+            totals: dict = {}
+            for index in queue:
+                group = self.groups[index]
+                totals[group] = totals.get(group, 0.0) + self.predicted[index]
+            queue.sort(key=lambda i: (-totals[self.groups[i]], str(self.groups[i]), -self.predicted[i]))
+        self.predicted_load = loads
+
+    def _steal(self, node) -> Optional[int]:
+        victims = [other for other, queue in self.node2queue.items() if queue and other is not node]
+        if not victims:
+            return None
+        victim = max(victims, key=lambda other: sum(self.predicted[i] for i in self.node2queue[other]))
+        queue = self.node2queue[victim]
+        groups = self.node2groups[node]
+        pos = next((pos for pos in range(len(queue) - 1, -1, -1) if self.groups[queue[pos]] in groups), len(queue) - 1)
+        self.stolen += 1
+        groups.add(self.groups[queue[pos]])
+        return queue.pop(pos)
+
+    def _next(self, node) -> Optional[int]:
+        if self.node2queue[node]:
+            return self.node2queue[node].pop(0)
+        if self.pending:
+            # left over from a crashed worker
+            return self.pending.pop(0)
+        return self._steal(node)
+
+    def check_schedule(self, node, duration: float = 0) -> None:
+        if node.shutting_down:
+            return
+        # two items on the worker, so it always knows its next one
+        send = []
+        while len(self.node2pending[node]) + len(send) < 2:
+            index = self._next(node)
+            if index is None:
+                break
+            send.append(index)
+        if send:
+            self.node2pending[node].extend(send)
+            node.send_runtest_some(send)
+        elif not self.pending and not any(self.node2queue.values()):
+            node.shutdown()
+
+    def remove_node(self, node) -> Optional[str]:
+        # a crashed worker's queue goes back to the others
+        self.pending.extend(self.node2queue.pop(node, []))
+        return super().remove_node(node)
+
+    def mark_test_complete(self, node, item_index: int, duration: float = 0) -> None:
+        self.busy[node] = self.busy.get(node, 0.0) + duration
+        self.finished = time.perf_counter()
+        super().mark_test_complete(node, item_index, duration)
+
+    def schedule(self) -> None:
+        assert self.collection_is_completed
+        if self.collection is not None:
+            for node in self.nodes:
+                self.check_schedule(node)
+            return
+        if not self._check_nodes_have_same_collection():
+            self.log("**Different tests collected, aborting run**")
+            return
+        self.collection = next(iter(self.node2collection.values()))
+        self.pending[:] = range(len(self.collection))
+        if not self.collection:
+            return
+        self._predict()
+        self._plan()
+        self.started = time.perf_counter()
+        for node in self.nodes:
+            self.check_schedule(node)
+
+    def report(self) -> list[str]:
+        actual = self.finished - self.started if self.finished else 0.0
+        lines = [f"predicted makespan: {max(self.predicted_load.values(), default=0.0):.1f} s  "
+                 f"actual makespan: {actual:.1f} s  tests without history: {self.unknown}  "
+                 f"tests moved between workers: {self.stolen}"]
+        for node, predicted in self.predicted_load.items():
+            groups = ",".join(sorted(str(group) for group in self.node2groups.get(node, ()) if group is not None))
+            lines.append(f"{node.gateway.id}: predicted {predicted:.1f} s, busy {self.busy.get(node, 0.0):.1f} s, "
+                         f"browsers: {groups or '-'}")
+        return lines
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    sched = config.stash.get(_SCHED_KEY, None)
+    if sched is not None and sched.started:
+        terminalreporter.write_sep("-", "duration schedule")
+        for line in sched.report():
+            terminalreporter.write_line(line)
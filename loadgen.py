@@ -0,0 +1,304 @@
+#####################
+#
+# python loadgen.py test_w2.py::TestAPIRequests --users 10 --duration 30 --json load.json
+# python loadgen.py test_w2.py test_final.py::TestDemoQA::test_create_user_api --iterations 500
+#
+# Runs the API tests as load scenarios: every virtual user picks the
+# selected test methods round-robin and calls them with the same pooled
+# request contexts the api fixtures hand out. Without --api-base-url a local
+# stub server is started, so no network is needed.
+#
+# A test class can define load_iteration(self): it is called before each of
+# its scenario runs, to give the iteration data of its own (test_final.py's
+# TestDemoQA registers a new user name every time).
+#
+# Reports request latency percentiles, throughput, status codes and a
+# per-second timeline of iterations and errors, as JSON.
+#
+#####################
+
+import sys
+import json
+import math
+import time
+import asyncio
+import inspect
+import logging
+import argparse
+import importlib.util
+from collections import Counter
+
+from demoqa import BrowserPool, ApiClientPool, API_CLIENTS
+from stub_server import start_stub_server
+
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    # nearest rank
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p * len(sorted_values) / 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Scenario:
+    def __init__(self, cls: type, name: str, clients: list[str]) -> None:
+        self.cls = cls
+        self.name = name
+        self.clients = clients
+
+    @property
+    def id(self) -> str:
+        return f"{self.cls.__module__}::{self.cls.__name__}::{self.name}"
+
+
+def _api_methods(cls: type) -> list[Scenario]:
+    # async test methods whose only arguments are API fixtures
+    scenarios = []
+    for name, func in inspect.getmembers(cls, inspect.iscoroutinefunction):
+        if not name.startswith("test"):
+            continue
+        params = [p for p in inspect.signature(func).parameters if p != "self"]
+        if params and all(p in API_CLIENTS for p in params):
+            scenarios.append(Scenario(cls, name, params))
+    return scenarios
+
+
+def _load_module(path: str):
+    name = path.rsplit("/", 1)[-1].removesuffix(".py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def collect(selectors: list[str]) -> list[Scenario]:
+    scenarios = []
+    for selector in selectors:
+        path, *names = selector.split("::")
+        module = _load_module(path)
+        classes = [getattr(module, names[0])] if names else \
+            [obj for name, obj in inspect.getmembers(module, inspect.isclass) if name.startswith("Test")]
+        found = [scenario for cls in classes for scenario in _api_methods(cls)]
+        if len(names) > 1:
+            found = [s for s in found if s.name == names[1]]
+        if not found:
+            raise ValueError(f"No API scenarios found for {selector}")
+        scenarios.extend(found)
+    return scenarios
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.latencies: list[float] = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.scenarios: dict[str, dict] = {}
+        self.timeline: dict[int, Counter] = {}
+
+    def _second(self) -> Counter:
+        return self.timeline.setdefault(int(time.perf_counter() - self.start), Counter())
+
+    def record_request(self, status: int | str, seconds: float) -> None:
+        self.latencies.append(seconds * 1000)
+        self.statuses[str(status)] += 1
+        self._second()["requests"] += 1
+
+    def record_iteration(self, scenario: Scenario, seconds: float, error: BaseException | None) -> None:
+        bucket = self.scenarios.setdefault(scenario.id, {"iterations": 0, "errors": 0, "latencies": []})
+        bucket["iterations"] += 1
+        bucket["latencies"].append(seconds * 1000)
+        second = self._second()
+        second["iterations"] += 1
+        if error is not None:
+            bucket["errors"] += 1
+            second["errors"] += 1
+            self.errors[f"{type(error).__name__}: {error}".splitlines()[0][:200]] += 1
+
+    @staticmethod
+    def _summary(values: list[float]) -> dict:
+        ordered = sorted(values)
+        return {
+            "min": round(ordered[0], 2) if ordered else 0.0,
+            "p50": round(percentile(ordered, 50), 2),
+            "p95": round(percentile(ordered, 95), 2),
+            "p99": round(percentile(ordered, 99), 2),
+            "max": round(ordered[-1], 2) if ordered else 0.0,
+            "mean": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        }
+
+    def _histogram(self) -> dict:
+        counts = Counter()
+        for value in self.latencies:
+            edge = next((edge for edge in LATENCY_BUCKETS_MS if value <= edge), None)
+            counts[f"<={edge}" if edge else f">{LATENCY_BUCKETS_MS[-1]}"] += 1
+        labels = [f"<={edge}" for edge in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {label: counts[label] for label in labels}
+
+    def report(self, config: dict) -> dict:
+        elapsed = time.perf_counter() - self.start
+        iterations = sum(s["iterations"] for s in self.scenarios.values())
+        errors = sum(s["errors"] for s in self.scenarios.values())
+        return {
+            "config": config,
+            "duration s": round(elapsed, 3),
+            "requests": len(self.latencies),
+            "iterations": iterations,
+            "errors": errors,
+            "error rate": round(errors / iterations, 4) if iterations else 0.0,
+            "throughput rps": round(len(self.latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency ms": self._summary(self.latencies),
+            "latency histogram ms": self._histogram(),
+            "status codes": dict(self.statuses),
+            "error types": dict(self.errors),
+            "scenarios": {
+                name: {
+                    "iterations": s["iterations"],
+                    "errors": s["errors"],
+                    "error rate": round(s["errors"] / s["iterations"], 4),
+                    "latency ms": self._summary(s["latencies"]),
+                } for name, s in self.scenarios.items()
+            },
+            "timeline": [
+                {"second": second, "iterations": c["iterations"], "requests": c["requests"], "errors": c["errors"],
+                 "error rate": round(c["errors"] / c["iterations"], 4) if c["iterations"] else 0.0}
+                for second, c in sorted(self.timeline.items())
+            ],
+        }
+
+
+class TimedClient:
+    # APIRequestContext stand-in that times every request
+    def __init__(self, client, stats: LoadStats) -> None:
+        self._client = client
+        self._stats = stats
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    async def _timed(self, method: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            res = await getattr(self._client, method)(*args, **kwargs)
+        except Exception as e:
+            self._stats.record_request(type(e).__name__, time.perf_counter() - started)
+            raise e
+        self._stats.record_request(res.status, time.perf_counter() - started)
+        return res
+
+    async def get(self, *args, **kwargs):
+        return await self._timed("get", *args, **kwargs)
+
+    async def post(self, *args, **kwargs):
+        return await self._timed("post", *args, **kwargs)
+
+    async def put(self, *args, **kwargs):
+        return await self._timed("put", *args, **kwargs)
+
+    async def patch(self, *args, **kwargs):
+        return await self._timed("patch", *args, **kwargs)
+
+    async def delete(self, *args, **kwargs):
+        return await self._timed("delete", *args, **kwargs)
+
+    async def head(self, *args, **kwargs):
+        return await self._timed("head", *args, **kwargs)
+
+    async def fetch(self, *args, **kwargs):
+        return await self._timed("fetch", *args, **kwargs)
+
+
+async def _virtual_user(user: int, scenarios: list[Scenario], clients: dict, stats: LoadStats,
+                        deadline: float | None, budget: list[int]) -> None:
+    instances = {}
+    step = user
+    while True:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return
+        if deadline is None:
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+        scenario = scenarios[step % len(scenarios)]
+        step += 1
+        instance = instances.setdefault(scenario.cls, scenario.cls())
+        kwargs = {name: clients[name] for name in scenario.clients}
+        started = time.perf_counter()
+        error = None
+        try:
+            if hasattr(instance, "load_iteration"):
+                instance.load_iteration()
+            await getattr(instance, scenario.name)(**kwargs)
+        except Exception as e:
+            error = e
+        stats.record_iteration(scenario, time.perf_counter() - started, error)
+
+
+async def run_load(scenarios: list[Scenario], users: int, duration: float | None, iterations: int | None,
+                   base_url: str | None) -> LoadStats:
+    pool = BrowserPool()
+    api_clients = ApiClientPool(pool)
+    try:
+        raw_clients = {}
+        for name in {name for s in scenarios for name in s.clients}:
+            default_url, headers = API_CLIENTS[name]
+            raw_clients[name] = await api_clients.get(base_url or default_url, headers)
+        # start the clock once the driver and the request contexts are up
+        stats = LoadStats()
+        clients = {name: TimedClient(client, stats) for name, client in raw_clients.items()}
+        deadline = time.perf_counter() + duration if duration is not None else None
+        budget = [iterations or 0]
+        await asyncio.gather(*(
+            _virtual_user(user, scenarios, clients, stats, deadline, budget) for user in range(users)
+        ))
+    finally:
+        await api_clients.close()
+        await pool.close()
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API tests as an HTTP load test")
+    parser.add_argument("selectors", nargs="*", default=["test_w2.py::TestAPIRequests"],
+                        help="file.py, file.py::Class or file.py::Class::test_name")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("--duration", type=float, default=None, help="seconds to run (default 10)")
+    limit.add_argument("--iterations", type=int, default=None, help="total scenario runs across all users")
+    parser.add_argument("--api-base-url", default=None, help="target host, default: a local stub server")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+    if args.duration is None and args.iterations is None:
+        args.duration = 10
+
+    scenarios = collect(args.selectors)
+    # the test modules log every response at INFO
+    logging.getLogger().setLevel(logging.WARNING)
+
+    server = None if args.api_base_url else start_stub_server()
+    base_url = args.api_base_url or server.url + "/"
+    try:
+        stats = asyncio.run(run_load(scenarios, args.users, args.duration, args.iterations, base_url))
+    finally:
+        if server:
+            server.close()
+
+    report = stats.report({
+        "scenarios": [s.id for s in scenarios],
+        "users": args.users,
+        "duration": args.duration,
+        "iterations": args.iterations,
+        "base url": args.api_base_url or "stub",
+    })
+    output = json.dumps(report, indent=4)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            f.write(output)
+    print(output)
+    sys.exit(1 if report["iterations"] == 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
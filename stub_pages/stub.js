@@ -0,0 +1,13 @@
+function cookie(name) {
+    const match = document.cookie.split("; ").find(part => part.startsWith(name + "="));
+    return match ? decodeURIComponent(match.slice(name.length + 1)) : "";
+}
+
+async function post(url, body) {
+    const res = await fetch(url, {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify(body),
+    });
+    return {ok: res.ok, status: res.status, body: await res.json().catch(() => ({}))};
+}
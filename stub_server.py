@@ -0,0 +1,326 @@
+#####################
+#
+# python stub_server.py --port 8765
+#
+# Local stand-in for demoqa.com and reqres.in, so the suites can run without
+# the network: the Account/BookStore APIs, the reqres /api/users endpoints
+# and the pages in stub_pages/ (/login -> stub_pages/login.html).
+#
+# The login, profile, text-box and books pages are hand-written with the same
+# DOM the page objects use. With --stub-server, tests using a page object that
+# has no page here are skipped at collection. Snapshots of other pages can be
+# recorded with
+#
+# python stub_server.py --record https://demoqa.com/checkbox
+#
+# which saves the rendered DOM without scripts (static content only).
+#
+#####################
+
+import os
+import re
+import json
+import uuid
+import argparse
+import mimetypes
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# accounts used across the suites (LoginPage, SESSION_DATA, test_final)
+SEED_USERS = {
+    "oabgnol63": "Exploit99*",
+    "testuser666": "Exploit99*",
+    "test": "Exploit99*",
+    "test2": "Exploit99*",
+}
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_pages")
+
+# /BookStore/v1/Books as served by demoqa.com
+BOOKS = [
+    {"isbn": "9781449325862", "title": "Git Pocket Guide", "author": "Richard E. Silverman",
+     "publisher": "O'Reilly Media"},
+    {"isbn": "9781449331818", "title": "Learning JavaScript Design Patterns", "author": "Addy Osmani",
+     "publisher": "O'Reilly Media"},
+    {"isbn": "9781449337711", "title": "Designing Evolvable Web APIs with ASP.NET", "author": "Glenn Block et al.",
+     "publisher": "O'Reilly Media"},
+    {"isbn": "9781449365035", "title": "Speaking JavaScript", "author": "Axel Rauschmayer",
+     "publisher": "O'Reilly Media"},
+    {"isbn": "9781491904244", "title": "You Don't Know JS", "author": "Kyle Simpson",
+     "publisher": "O'Reilly Media"},
+    {"isbn": "9781491950296", "title": "Programming JavaScript Applications", "author": "Eric Elliott",
+     "publisher": "O'Reilly Media"},
+    {"isbn": "9781593275846", "title": "Eloquent JavaScript, Second Edition", "author": "Marijn Haverbeke",
+     "publisher": "No Starch Press"},
+    {"isbn": "9781593277574", "title": "Understanding ECMAScript 6", "author": "Nicholas C. Zakas",
+     "publisher": "No Starch Press"},
+]
+
+# reqres.in fixtures used by test_w2
+REQRES_USERS = {
+    1: {"id": 1, "email": "george.bluth@reqres.in", "first_name": "George", "last_name": "Bluth"},
+    2: {"id": 2, "email": "janet.weaver@reqres.in", "first_name": "Janet", "last_name": "Weaver"},
+    3: {"id": 3, "email": "emma.wong@reqres.in", "first_name": "Emma", "last_name": "Wong"},
+}
+
+
+def _timestamp(offset: timedelta = timedelta()) -> str:
+    return (datetime.now(timezone.utc) + offset).isoformat(timespec="milliseconds")
+
+
+class StubState:
+    def __init__(self, users: dict | None = None) -> None:
+        self.lock = threading.Lock()
+        self.users = {}
+        self.tokens = {}
+        self.connections = 0
+        self.requests = 0
+        for username, password in (users or SEED_USERS).items():
+            self.add_user(username, password)
+
+    def add_user(self, username: str, password: str) -> dict:
+        user = {"userID": str(uuid.uuid4()), "username": username, "password": password, "books": []}
+        self.users[username] = user
+        return user
+
+
+def page_file(path: str, pages_dir: str = PAGES_DIR) -> str | None:
+    name = path.strip("/") or "index"
+    if not re.fullmatch(r"[\w\-./]+", name) or ".." in name:
+        return None
+    for candidate in (name, name + ".html"):
+        file = os.path.join(pages_dir, candidate)
+        if os.path.isfile(file):
+            return file
+    return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes, don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    state: StubState
+    pages_dir: str = PAGES_DIR
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def setup(self) -> None:
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def parse_request(self) -> bool:
+        with self.state.lock:
+            self.state.requests += 1
+        return super().parse_request()
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _send_json(self, status: int, body) -> None:
+        self._send_bytes(status, json.dumps(body).encode(), "application/json; charset=utf-8")
+
+    def _send_page(self, path: str) -> None:
+        file = page_file(path, self.pages_dir)
+        if file is None:
+            self._send_bytes(404, b"<!DOCTYPE html><title>DEMOQA</title><p>No stub page</p>",
+                             "text/html; charset=utf-8")
+            return
+        with open(file, "rb") as f:
+            data = f.read()
+        content_type = mimetypes.guess_type(file)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type.endswith("javascript"):
+            content_type += "; charset=utf-8"
+        self._send_bytes(200, data, content_type)
+
+    def _send_bytes(self, status: int, data: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_empty(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _credentials(self) -> tuple[str, str]:
+        body = self._read_json()
+        return body.get("userName", ""), body.get("password", "")
+
+    def _user_id(self) -> int | None:
+        match = re.fullmatch(r"/api/users/(\d+)", self.path.split("?")[0])
+        return int(match.group(1)) if match else None
+
+    def do_GET(self) -> None:
+        # requests may carry a body (test_w2 sends data={}), drain it to keep the connection usable
+        self._read_json()
+        path = self.path.split("?")[0]
+        user_id = self._user_id()
+        if path == "/BookStore/v1/Books":
+            self._send_json(200, {"books": BOOKS})
+        elif path == "/api/users":
+            users = list(REQRES_USERS.values())
+            self._send_json(200, {"page": 1, "per_page": len(users), "total": len(users),
+                                  "total_pages": 1, "data": users})
+        elif user_id is not None and user_id in REQRES_USERS:
+            self._send_json(200, {"data": REQRES_USERS[user_id]})
+        elif user_id is not None:
+            self._send_json(404, {})
+        else:
+            self._send_page(path)
+
+    def do_POST(self) -> None:
+        match self.path.split("?")[0]:
+            case "/Account/v1/User":
+                self._create_user()
+            case "/Account/v1/GenerateToken":
+                self._generate_token()
+            case "/Account/v1/Login":
+                self._login()
+            case "/api/users":
+                body = self._read_json()
+                self._send_json(201, {**body, "id": str(uuid.uuid4().int % 1000),
+                                      "createdAt": _timestamp()})
+            case _:
+                self._read_json()
+                self._send_json(404, {"message": f"No stub for POST {self.path}"})
+
+    def do_PUT(self) -> None:
+        body = self._read_json()
+        if self._user_id() is None:
+            self._send_json(404, {"message": f"No stub for PUT {self.path}"})
+            return
+        self._send_json(200, {**body, "updatedAt": _timestamp()})
+
+    do_PATCH = do_PUT
+
+    def do_DELETE(self) -> None:
+        self._read_json()
+        if self._user_id() is None:
+            self._send_json(404, {"message": f"No stub for DELETE {self.path}"})
+            return
+        self._send_empty(204)
+
+    def _create_user(self) -> None:
+        username, password = self._credentials()
+        if not username or not password:
+            self._send_json(400, {"code": "1200", "message": "UserName and Password required."})
+            return
+        with self.state.lock:
+            if username in self.state.users:
+                self._send_json(406, {"code": "1204", "message": "User exists!"})
+                return
+            user = self.state.add_user(username, password)
+        self._send_json(201, {"userID": user["userID"], "username": username, "books": []})
+
+    def _authorized_user(self, username: str, password: str) -> dict | None:
+        user = self.state.users.get(username)
+        return user if user and user["password"] == password else None
+
+    def _generate_token(self) -> None:
+        user = self._authorized_user(*self._credentials())
+        if user is None:
+            self._send_json(200, {"token": None, "expires": None, "status": "Failed",
+                                  "result": "User authorization failed."})
+            return
+        token = uuid.uuid4().hex
+        expires = _timestamp(timedelta(days=7))
+        with self.state.lock:
+            self.state.tokens[user["username"]] = (token, expires)
+        self._send_json(200, {"token": token, "expires": expires, "status": "Success",
+                              "result": "User authorized successfully."})
+
+    def _login(self) -> None:
+        user = self._authorized_user(*self._credentials())
+        if user is None:
+            self._send_json(404, {"code": "1207", "message": "User not found!"})
+            return
+        token, expires = self.state.tokens.get(user["username"], (None, None))
+        self._send_json(200, {
+            "userId": user["userID"],
+            "username": user["username"],
+            "password": user["password"],
+            "token": token,
+            "expires": expires,
+            "created_date": "2024-01-01T00:00:00.000Z",
+            "isActive": False,
+        })
+
+
+class StubServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, users: dict | None = None,
+                 pages_dir: str = PAGES_DIR) -> None:
+        handler = type("BoundStubHandler", (StubHandler,), {"state": StubState(users), "pages_dir": pages_dir})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def state(self) -> StubState:
+        return self.httpd.RequestHandlerClass.state
+
+    def start(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0) -> StubServer:
+    return StubServer(host, port).start()
+
+
+def record_pages(urls: list[str], pages_dir: str = PAGES_DIR) -> None:
+    # rendered DOM without scripts, so the snapshot doesn't call back to the live site
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch()
+        page = browser.new_page()
+        for url in urls:
+            page.goto(url, wait_until="load")
+            page.evaluate("document.querySelectorAll('script, iframe').forEach(e => e.remove())")
+            name = urlparse(url).path.strip("/") or "index"
+            file = os.path.join(pages_dir, name + ".html")
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            with open(file, "w", encoding="utf-8") as f:
+                f.write(page.content())
+            print(f"{url} -> {file}")
+        browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the local demoqa stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--record", nargs="+", metavar="URL", default=None,
+                        help="save snapshots of these live pages into stub_pages/ instead of serving")
+    args = parser.parse_args()
+    if args.record:
+        record_pages(args.record)
+        raise SystemExit(0)
+    server = StubServer(args.host, args.port)
+    print(f"Serving on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,44 @@
+import json
+import pytest
+
+from demoqa import LoginPage, api_login
+from auth_cache import AuthStateCache, api_state_login
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_api_login_storage_state(browser_pool, stub_server):
+    playwright = await browser_pool.playwright()
+    request_context = await playwright.request.new_context()
+    state = await api_login(request_context, LoginPage.username, LoginPage.password, stub_server.url)
+    await request_context.dispose()
+
+    cookies = {cookie["name"]: cookie for cookie in state["cookies"]}
+    assert set(cookies) == {"userID", "userName", "token", "expires"}
+    assert cookies["userName"]["value"] == LoginPage.username
+    assert cookies["token"]["domain"] == "127.0.0.1"
+    assert cookies["token"]["expires"] > 0
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_api_login_wrong_password(browser_pool, stub_server):
+    playwright = await browser_pool.playwright()
+    request_context = await playwright.request.new_context()
+    with pytest.raises(RuntimeError, match="Login failed"):
+        await api_login(request_context, LoginPage.username, "wrong", stub_server.url)
+    await request_context.dispose()
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_auth_cache_logs_in_once(browser_pool, stub_server, tmp_path):
+    cache = AuthStateCache(cache_dir=str(tmp_path), login=api_state_login)
+    first = await cache.get("test", "Exploit99*", stub_server.url)
+    second = await cache.get("test", "Exploit99*", stub_server.url)
+    other = await cache.get("test2", "Exploit99*", stub_server.url)
+
+    assert first == second != other
+    assert cache.stats() == {"logins": 2, "cache hits": 1}
+    with open(first) as f:
+        assert any(cookie["name"] == "token" for cookie in json.load(f)["cookies"])
@@ -0,0 +1,88 @@
+import os
+import json
+
+import pytest
+
+# pytester is only loaded when this module is collected
+pytest_plugins = ["pytester"]
+
+BATCH = """
+import sys
+import asyncio
+import logging
+
+import pytest
+
+ready = asyncio.Event()
+
+
+@pytest.mark.concurrent
+@pytest.mark.asyncio(loop_scope="session")
+class TestBatch:
+    async def test_waits(self):
+        print("out waits")
+        # only set by test_sets, so this passes only when both bodies run at once
+        await asyncio.wait_for(ready.wait(), 5)
+        print("out waits done")
+
+    async def test_fails(self):
+        print("out fails")
+        logging.getLogger("batch").warning("log fails")
+        await asyncio.sleep(0.1)
+        assert False, "boom"
+
+    async def test_sets(self):
+        await asyncio.sleep(0.2)
+        print("err sets", file=sys.stderr)
+        ready.set()
+"""
+
+REPORTS = """
+import os
+import json
+
+def pytest_runtest_logreport(report):
+    if os.environ.get("PYTEST_XDIST_WORKER"):
+        # the controller logs the worker's reports again
+        return
+    with open("reports.jsonl", "a") as f:
+        f.write(json.dumps({"test": report.nodeid.split("::")[-1], "when": report.when,
+                            "outcome": report.outcome, "sections": dict(report.sections)}) + "\\n")
+"""
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("xdist", [[], ["-n", "1"]], ids=["serial", "xdist"])
+def test_concurrent_batch_capture_and_reports(pytester, monkeypatch, xdist):
+    pytester.makepyfile(test_batch=BATCH)
+    pytester.makeconftest(REPORTS)
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.abspath(__file__)))
+    result = pytester.runpytest_subprocess("-p", "concurrent_runner", "--concurrency", "3", *xdist)
+    result.assert_outcomes(passed=2, failed=1)
+
+    reports = [json.loads(line) for line in (pytester.path / "reports.jsonl").read_text().splitlines()]
+    calls = {report["test"]: report for report in reports if report["when"] == "call"}
+    assert {test: report["outcome"] for test, report in calls.items()} == {
+        "test_waits": "passed", "test_fails": "failed", "test_sets": "passed"}
+    assert calls["test_waits"]["sections"]["Captured stdout call"] == "out waits\nout waits done\n"
+    assert calls["test_fails"]["sections"]["Captured stdout call"] == "out fails\n"
+    assert "log fails" in calls["test_fails"]["sections"]["Captured log call"]
+    assert calls["test_sets"]["sections"]["Captured stderr call"] == "err sets\n"
+    assert "Captured stdout call" not in calls["test_sets"]["sections"]
+    assert [report["when"] for report in reports].count("teardown") == 3
+
+
+@pytest.mark.unit
+def test_concurrency_refuses_untested_versions(pytester, monkeypatch):
+    pytester.makepyfile(
+        test_one="def test_one():\n    pass\n",
+        untested="import concurrent_runner\n"
+                 "concurrent_runner.TESTED_VERSIONS = {'pytest': ('0.1',), 'no-such-dist': ('1.0',)}\n",
+    )
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(pytester.path), os.path.dirname(os.path.abspath(__file__))]))
+    result = pytester.runpytest_subprocess("-p", "untested", "-p", "concurrent_runner", "--concurrency", "2", "test_one.py")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*--concurrency relies on internals of pytest * (tested: 0.1)*"])
+    # without --concurrency nothing is checked
+    result = pytester.runpytest_subprocess("-p", "untested", "-p", "concurrent_runner", "test_one.py")
+    result.assert_outcomes(passed=1)
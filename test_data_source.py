@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from data_source import DataSource
+
+
+@pytest.mark.unit
+def test_data_sources_index_records(tmp_path):
+    users = [{"username": f"user{i}", "password": "p,[w]\"d"} for i in range(3)]
+    (tmp_path / "users.jsonl").write_text("\n".join(json.dumps(user) for user in users) + "\n\n")
+    (tmp_path / "users.json").write_text(json.dumps([*users, 7, None], indent=4))
+    (tmp_path / "users.csv").write_text('username,password\r\nuser0,"multi\nline"\r\nuser1,"a,""b"""\r\n')
+    index_dir = str(tmp_path / "index")
+
+    jsonl = DataSource(str(tmp_path / "users.jsonl"), index_dir)
+    array = DataSource(str(tmp_path / "users.json"), index_dir)
+    table = DataSource(str(tmp_path / "users.csv"), index_dir)
+    cached = DataSource(str(tmp_path / "users.json"), index_dir)
+
+    assert [record.load() for record in jsonl.records()] == users
+    assert [record.load() for record in array.records()] == [*users, 7, None]
+    assert [record.load() for record in table.records()] == [
+        {"username": "user0", "password": "multi\nline"},
+        {"username": "user1", "password": 'a,"b"'},
+    ]
+    assert cached.offsets == array.offsets and cached.loaded == 0
+    assert len(list((tmp_path / "index").iterdir())) == 3
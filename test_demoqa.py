@@ -0,0 +1,326 @@
+import json
+
+import pytest
+
+import demoqa
+
+from demoqa import (
+    BlockPolicy,
+    LoadHistory,
+    FrameRing,
+    Loc,
+    LoginPage,
+    TextBoxPage,
+    DragPage,
+    BooksPage,
+    _check_balanced,
+    configure_launch,
+    launch_duplicates,
+    launch_profile,
+    get_action_timer,
+    timed_action,
+)
+
+
+@pytest.mark.unit
+def test_block_policy_match():
+    policy = BlockPolicy.from_names("ads,fonts") | BlockPolicy(url_patterns=(r"/track\?",))
+
+    assert policy.match("font", "https://demoqa.com/a.woff2") == "font"
+    assert policy.match("script", "https://pagead2.googlesyndication.com/ad.js") == "googlesyndication.com"
+    assert policy.match("script", "https://googlesyndication.com/ad.js") == "googlesyndication.com"
+    # a host merely ending in the domain's name is not a subdomain
+    assert policy.match("script", "https://notgooglesyndication.com/ad.js") is None
+    assert policy.match("xhr", "https://demoqa.com/track?id=1") == r"/track\?"
+    assert policy.match("document", "https://demoqa.com/books") is None
+    assert BlockPolicy().match("image", "https://demoqa.com/logo.png") is None
+    with pytest.raises(ValueError):
+        BlockPolicy.from_names("ads,popups")
+
+
+@pytest.mark.unit
+def test_load_history_timeouts(tmp_path):
+    path = tmp_path / "history.json"
+    live = LoadHistory.key("BooksPage", "https://demoqa.com", "chromium")
+    stub = LoadHistory.key("BooksPage", "http://127.0.0.1:8765", "chromium")
+    path.write_text(json.dumps({"BooksPage": [0.01] * 10, live: [2.0] * 4}))
+    history = LoadHistory(keep=6, min_samples=5)
+    history.load(str(path))
+
+    # keys without site and browser are dropped, too few samples keep the default
+    assert history.samples == {live: [2.0] * 4}
+    assert history.timeout_ms(live) == 60000
+    assert history.timeout_ms(live, 30000) == 30000
+    history.record(live, 4.0)
+    history.record(stub, 0.01)
+    history.save()
+    # p95 of [2, 2, 2, 2, 4] times 3
+    assert history.timeout_ms(live) == 12000
+    assert history.timeout_ms(stub) == 60000
+
+    history.merge({stub: [0.01] * 5, live: [30.0] * 5})
+    assert history.samples[live] == [4.0] + [30.0] * 5
+    assert history.timeout_ms(stub) == 5000
+    assert history.timeout_ms(live) == 60000
+
+    reloaded = LoadHistory(min_samples=5)
+    reloaded.load(str(path))
+    assert reloaded.samples == {live: [2.0] * 4 + [4.0], stub: [0.01]}
+
+
+@pytest.mark.unit
+def test_frame_ring_keeps_the_latest_frames_within_budget():
+    ring = FrameRing(max_bytes=10)
+    for timestamp, size in enumerate([4, 4, 4, 1]):
+        ring.push(float(timestamp), b"x" * size)
+
+    assert [timestamp for timestamp, _ in ring.frames] == [1.0, 2.0, 3.0]
+    assert ring.size == 9
+    # a frame bigger than the budget doesn't stay either
+    ring.push(4.0, b"x" * 11)
+    assert list(ring.frames) == [] and ring.size == 0
+
+
+class _Form:
+    session = None
+
+    @timed_action("name")
+    async def fill(self, name: str, value: str) -> None:
+        pass
+
+    @timed_action()
+    async def submit(self) -> None:
+        await self.fill("Full Name", "Aa")
+        await self.fill("Email", "Bb")
+
+    @timed_action()
+    async def broken(self) -> None:
+        raise ValueError("no form")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_action_timer_counts_nested_actions_once(monkeypatch):
+    timer = get_action_timer()
+    monkeypatch.setattr(timer, "enabled", True)
+    monkeypatch.setattr(timer, "records", [])
+    monkeypatch.setattr(timer, "timed", 0)
+    monkeypatch.setattr(timer, "seconds", 0.0)
+    form = _Form()
+    await form.submit()
+    with pytest.raises(ValueError):
+        await form.broken()
+
+    assert [(r["action"], r["locator"], r["nested"], r["failed"]) for r in timer.records] == [
+        ("fill", "Full Name", True, False),
+        ("fill", "Email", True, False),
+        ("submit", "", False, False),
+        ("broken", "", False, True),
+    ]
+    assert timer.stats()["actions timed"] == 4
+
+    records = [dict(r, ms=ms) for r, ms in zip(timer.records, [2.0, 3.0, 6.0, 1.0])]
+    report = timer.report(records, top=2)
+    assert report["actions"] == 4
+    assert [r["action"] for r in report["slowest"]] == ["submit", "fill"]
+    # the fills are inside submit's 6 ms, the class total doesn't add them again
+    assert report["per page class"] == {"_Form": {"calls": 2, "total ms": 7.0, "max ms": 6.0, "mean ms": 3.5}}
+    assert report["per action"]["_Form.fill"] == {"calls": 2, "total ms": 5.0, "max ms": 3.0, "mean ms": 2.5}
+
+
+@pytest.mark.unit
+def test_check_balanced():
+    _check_balanced("div[data-x='a)b'] > span:nth-child(2)")
+    _check_balanced(r"a[title=\"x\"]")
+    _check_balanced("//div[contains(text(), \"it's\")]")
+    for selector in ["div[x", "div)", "(//a])", "a[title='x]", "p:has(span"]:
+        with pytest.raises(ValueError):
+            _check_balanced(selector)
+
+
+@pytest.mark.unit
+def test_loc_is_checked_when_declared():
+    assert Loc("role", "button", name="Login").describe() == "role('button', name='Login')"
+    assert Loc("xpath", "(//table)", nth=0).describe() == "xpath('(//table)', nth=0)"
+    Loc("xpath", ".//td")
+    Loc("text", "Books", exact=True)
+    for args, kwargs, message in [
+        (("role", "buton"), {}, "Unknown ARIA role"),
+        (("id", "login"), {}, "Unknown locator kind"),
+        (("css", "  "), {}, "Empty css locator"),
+        (("css", "//button"), {}, "looks like XPath"),
+        (("css", "button[type=submit"), {}, "Unclosed"),
+        (("xpath", "button"), {}, "must start with"),
+        (("xpath", "//div[@id='a']]"), {}, "Unbalanced"),
+        (("css", "button"), {"name": "Login"}, "name= only applies to role"),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            Loc(*args, **kwargs)
+
+    assert LoginPage.login_button.attr == "login_button"
+    assert "login_button" in LoginPage.locators()
+
+
+class _Locator:
+    def __init__(self, chain: tuple) -> None:
+        self.chain = chain
+
+    def get_by_role(self, role, name=None, exact=None):
+        return _Locator(self.chain + (("role", role, name, exact),))
+
+    def locator(self, selector):
+        return _Locator(self.chain + (("css", selector),))
+
+    def nth(self, index):
+        return _Locator(self.chain + (("nth", index),))
+
+
+@pytest.mark.unit
+def test_page_objects_reuse_registered_locators():
+    text_box = TextBoxPage()
+    text_box.page = _Locator(("page",))
+
+    # by role and name, as text_box_interact and button_interact look them up
+    assert text_box.role_locator("textbox", text_box.fullname_ph) is text_box.name_box
+    assert text_box.role_locator("button", "Submit") is text_box.submit_button
+    adhoc = text_box.role_locator("textbox", "Type to search")
+    assert adhoc.chain == ("page", ("role", "textbox", "Type to search", None))
+    assert text_box.role_locator("textbox", "Type to search") is adhoc
+    # a new page gets new locators
+    text_box.page = _Locator(("next page",))
+    assert text_box.name_box.chain == ("next page", ("role", "textbox", text_box.fullname_ph, None))
+    assert text_box.role_locator("textbox", "Type to search") is not adhoc
+
+    drag = DragPage()
+    drag.page = _Locator(("page",))
+    assert drag.droppable.chain == ("page", ("role", "tabpanel", "Simple", None), ("css", "#droppable"))
+    assert DragPage.droppable.describe() == "role('tabpanel', name='Simple') >> css('#droppable')"
+    with pytest.raises(ValueError, match="within= takes a Loc"):
+        Loc("css", "#droppable", within="#simpleDropContainer")
+
+
+def _books_table(titles: list[str], sort: str | None = None, row_groups: int | None = None,
+                 pages: int | None = 1) -> dict:
+    # what TABLE_SNAPSHOT_SCRIPT returns for the books table
+    return BooksPage._table_dict({
+        "headers": [{"label": "Image", "sort": None}, {"label": "Title", "sort": sort},
+                    {"label": "Author", "sort": None}],
+        "rows": [{"Image": "", "Title": title, "Author": "someone"} for title in titles],
+        "rowGroups": len(titles) if row_groups is None else row_groups,
+        "page": 1,
+        "pages": pages,
+        "rowsPerPage": 10,
+    })
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_books_verify_methods_on_a_table():
+    books = BooksPage()
+    titles = ["Git Pocket Guide", "designing Evolvable Web APIs", "Speaking JavaScript"]
+
+    assert await books.verify_sort("Title", "ascending", _books_table(sorted(titles, key=str.lower), "ascending"))
+    assert await books.verify_sort("Title", "descending",
+                                   _books_table(sorted(titles, key=str.lower, reverse=True), "descending"))
+    # the header's order and the rows' order both count
+    assert not await books.verify_sort("Title", "ascending", _books_table(titles, "ascending"))
+    assert not await books.verify_sort("Title", "ascending", _books_table(sorted(titles, key=str.lower)))
+    assert not await books.verify_sort("Title", "sideways", _books_table(titles, "ascending"))
+
+    # a short last page is padded with empty row groups
+    padded = _books_table(titles, row_groups=5, pages=2)
+    assert await books.verify_num_rows(5, padded)
+    assert not await books.verify_num_rows(3, padded)
+    assert await books.verify_num_pages(2, padded)
+    assert not await books.verify_num_pages(1, padded)
+    with pytest.raises(RuntimeError):
+        await books.verify_num_pages(1, _books_table(titles, pages=None))
+
+    await books.verify_filter_by_title("Git Pocket Guide", _books_table(["Git Pocket Guide"], row_groups=10))
+    with pytest.raises(AssertionError, match="found 0"):
+        await books.verify_filter_by_title("Git Pocket Guide", _books_table([], row_groups=10))
+    with pytest.raises(AssertionError, match="found 3"):
+        await books.verify_filter_by_title("Git Pocket Guide", _books_table(titles))
+    with pytest.raises(AssertionError, match="'Speaking JavaScript'"):
+        await books.verify_filter_by_title("Git Pocket Guide", _books_table(["Speaking JavaScript"]))
+
+
+class _Table:
+    def __init__(self, snapshots: list[dict]) -> None:
+        self.snapshots = snapshots
+        self.reads = 0
+
+    def locator(self, selector):
+        return self
+
+    def nth(self, index):
+        return self
+
+    async def evaluate(self, script):
+        self.reads += 1
+        return self.snapshots[min(self.reads, len(self.snapshots)) - 1]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_books_verify_methods_wait_for_the_table():
+    raw = lambda titles: {"headers": [{"label": "Title", "sort": None}], "rows": [{"Title": t} for t in titles],
+                          "rowGroups": 10, "page": 1, "pages": 1, "rowsPerPage": 10}
+    books = BooksPage()
+    books.page = _Table([raw(["A", "Git Pocket Guide"]), raw(["A", "Git Pocket Guide"]), raw(["Git Pocket Guide"])])
+    # the filter re-renders the table after a while
+    await books.verify_filter_by_title("Git Pocket Guide")
+    assert books.page.reads == 3
+
+
+@pytest.fixture
+def no_installed_browsers(monkeypatch):
+    # neither Chrome nor Edge on this machine, launch settings restored afterwards
+    monkeypatch.setattr(demoqa.shutil, "which", lambda name: None)
+    monkeypatch.setattr(demoqa.os.path, "isfile", lambda path: False)
+    for name in ("CHROME", "MSEDGE", "CHROMIUM", "CHROMIUM_SHELL", "FIREFOX", "WEBKIT"):
+        monkeypatch.delenv(f"PLEASEWRIGHT_{name}_EXECUTABLE", raising=False)
+    monkeypatch.setattr(demoqa, "_profiles", dict(demoqa._profiles))
+    monkeypatch.setattr(demoqa, "_launch_mode", None)
+    return monkeypatch
+
+
+@pytest.mark.unit
+def test_launch_profiles_fall_back_to_bundled_browsers(no_installed_browsers):
+    chrome = launch_profile("chrome")
+    assert (chrome.name, chrome.mode) == ("chromium", "headless")
+    assert chrome.options()["channel"] == "chromium" and chrome.options()["headless"]
+    # both branded types end up on the same bundled Chromium: run it once
+    assert launch_duplicates(["chrome", "msedge", "firefox"]) == {"msedge": "chrome"}
+
+    no_installed_browsers.setenv("PLEASEWRIGHT_CHROME_EXECUTABLE", "/opt/chrome/chrome")
+    chrome = launch_profile("chrome")
+    assert chrome.name == "chrome"
+    assert chrome.options()["executable_path"] == "/opt/chrome/chrome"
+    assert "channel" not in chrome.options()
+    assert launch_duplicates(["chrome", "msedge", "firefox"]) == {}
+
+
+@pytest.mark.unit
+def test_launch_mode_selection(no_installed_browsers):
+    no_installed_browsers.setenv("PLEASEWRIGHT_CHROME_EXECUTABLE", "/opt/chrome/chrome")
+    configure_launch(mode="headed")
+    assert launch_profile("chrome").options()["headless"] is False
+    assert launch_profile("firefox").mode == "headed"
+
+    configure_launch(mode="shell")
+    # an installed Chrome has no headless shell, that's bundled Chromium's
+    chrome = launch_profile("chrome")
+    assert (chrome.name, chrome.mode) == ("chromium", "shell")
+    assert chrome.options()["headless"] and "channel" not in chrome.options()
+    assert chrome.describe() == "chromium: chromium shell, bundled"
+    assert launch_profile("firefox").mode == "headless"
+    assert launch_duplicates(["chrome", "msedge", "firefox"]) == {"msedge": "chrome"}
+
+    configure_launch({"chrome": "chromium-shell", "msedge": "chromium"}, mode=None)
+    assert launch_profile("chrome").name == "chromium-shell"
+    assert launch_profile("msedge").options()["channel"] == "chromium"
+    with pytest.raises(ValueError):
+        configure_launch({"chrome": "opera"})
+    with pytest.raises(ValueError):
+        configure_launch(mode="invisible")
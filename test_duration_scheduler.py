@@ -0,0 +1,114 @@
+import pytest
+
+from duration_scheduler import _DB_KEY, DurationDB, DurationScheduling
+
+
+class _Config:
+    def __init__(self, db: DurationDB) -> None:
+        self.stash = {_DB_KEY: db}
+
+    def getvalue(self, name):
+        return {"tx": ["2*popen"]}[name]
+
+    def getoption(self, name):
+        return {"maxschedchunk": None, "--browser-launch-cost": 3.0}[name]
+
+
+class _Node:
+    shutting_down = False
+
+
+def _browser(nodeid: str):
+    return nodeid.split("[")[1].rstrip("]") if "[" in nodeid else None
+
+
+def _scheduler(tmp_path, history: dict, collection: list[str]):
+    db = DurationDB(str(tmp_path / "durations.sqlite"))
+    db.save(history)
+    sched = DurationScheduling(_Config(db), group_of=_browser)
+    nodes = [_Node(), _Node()]
+    for node in nodes:
+        sched.add_node(node)
+    sched.collection = collection
+    sched.pending[:] = range(len(collection))
+    sched._predict()
+    return sched, nodes
+
+
+@pytest.mark.unit
+def test_plan_packs_longest_first_and_keeps_browsers_together(tmp_path):
+    collection = ["t.py::a[chromium]", "t.py::b[chromium]", "t.py::c[firefox]", "t.py::d", "t.py::e[firefox]"]
+    history = {
+        "t.py::a[chromium]": (10.0, "passed"),
+        "t.py::b[chromium]": (4.0, "passed"),
+        "t.py::c[firefox]": (8.0, "failed"),
+        "t.py::d": (3.0, "passed"),
+        # skipped last time, so it needs no browser
+        "t.py::e[firefox]": (0.5, "skipped"),
+    }
+    sched, (first, second) = _scheduler(tmp_path, history, collection)
+    assert sched.groups == ["chromium", "chromium", "firefox", None, None]
+    assert sched.unknown == 0
+
+    sched._plan()
+
+    assert sched.pending == []
+    # b would finish earlier on the second worker without the 3 s launch of a second chromium
+    assert sched.node2queue[first] == [0, 1]
+    assert sched.node2queue[second] == [2, 3, 4]
+    assert sched.node2groups[first] == {"chromium"}
+    assert sched.node2groups[second] == {"firefox", None}
+    assert sched.predicted_load == {first: 17.0, second: 14.5}
+
+
+@pytest.mark.unit
+def test_plan_groups_each_queue_by_browser(tmp_path):
+    collection = ["t.py::a[chromium]", "t.py::b[firefox]", "t.py::c[chromium]", "t.py::d[firefox]", "t.py::e[firefox]"]
+    history = {nodeid: (1.0, "passed") for nodeid in collection}
+    history["t.py::a[chromium]"] = (4.0, "passed")
+    sched, (first, second) = _scheduler(tmp_path, history, collection)
+    sched.launch_cost = 0.0
+    sched._plan()
+
+    assert sched.node2queue[first] == [0]
+    # planned as firefox, chromium, firefox, firefox; the browser with the most work goes first
+    assert sched.node2queue[second] == [1, 3, 4, 2]
+
+
+@pytest.mark.unit
+def test_predict_uses_the_mean_for_tests_without_history(tmp_path):
+    collection = ["t.py::a", "t.py::b", "t.py::c[chromium]", "t.py::new[webkit]"]
+    history = {
+        "t.py::a": (2.0, "passed"),
+        "t.py::b": (4.0, "passed"),
+        # skips do not count towards the mean
+        "t.py::c[chromium]": (0.1, "skipped"),
+    }
+    sched, _ = _scheduler(tmp_path, history, collection)
+
+    assert sched.predicted == [2.0, 4.0, 0.1, 3.0]
+    assert sched.groups == [None, None, None, "webkit"]
+    assert sched.unknown == 1
+
+
+@pytest.mark.unit
+def test_steal_prefers_a_browser_the_worker_already_has(tmp_path):
+    collection = ["t.py::a[chromium]", "t.py::b", "t.py::c[firefox]"]
+    history = {
+        "t.py::a[chromium]": (5.0, "passed"),
+        "t.py::b": (1.0, "passed"),
+        "t.py::c[firefox]": (1.0, "passed"),
+    }
+    sched, (first, second) = _scheduler(tmp_path, history, collection)
+    sched.pending.clear()
+    sched.node2queue[second] = [0, 1]
+    sched.node2groups[first] = {"chromium"}
+
+    # the chromium test over the shorter one at the end of the queue
+    assert sched._steal(first) == 0
+    # nothing matching left, so the shortest one
+    sched.node2queue[second] = [2, 1]
+    assert sched._steal(first) == 1
+    assert sched.node2groups[first] == {"chromium", None}
+    assert sched.stolen == 2
+    assert sched._steal(second) is None
@@ -7,6 +7,7 @@
 import pytest
 import logging
 import json
+import uuid
 import random
 import pytest_asyncio
 
@@ -22,6 +23,7 @@ logging.basicConfig(level=logging.INFO, format="%(funcName)s: %(message)s", forc
 logger = logging.getLogger(__name__)
 
 
+@pytest.mark.concurrent
 class TestDemoQA:
 
     @pytest_asyncio.fixture(scope="class", autouse=True)
@@ -55,12 +57,19 @@ class TestDemoQA:
 
     api_endpoint = "/Account/v1/User"
 
+    def load_iteration(self) -> None:
+        # loadgen.py: a user name nobody registered yet for every iteration
+        self.new_user = {
+            "userName": f"loaduser{uuid.uuid4().hex[:12]}",
+            "password": "Exploit99*"
+        }
+
     # Test 1
     @pytest.mark.asyncio
     @pytest.mark.skip_browser("firefox")
     @pytest.mark.skip_browser("msedge")
-    async def test_login_success(self):
-        async with LoginPage() as lp:
+    async def test_login_success(self, browser):
+        async with LoginPage(browser) as lp:
             await lp.login(lp.username, lp.password)
             await lp.expect_text_visible(lp.username)
 
@@ -68,16 +77,18 @@ class TestDemoQA:
     @pytest.mark.asyncio
     @pytest.mark.skip_browser("firefox")
     @pytest.mark.skip_browser("msedge")
-    async def test_sort_ascending_verify(self):
-        async with BooksPage() as bp:
+    @pytest.mark.prewarm("BooksPage")
+    async def test_sort_ascending_verify(self, browser):
+        async with BooksPage(browser) as bp:
             await bp.sort_by_title("ascending")
             assert await bp.verify_sort("Title", "ascending"), "Sort ascending verification failed"
 
     @pytest.mark.asyncio
     @pytest.mark.skip_browser("firefox")
     @pytest.mark.skip_browser("msedge")
-    async def test_sort_descending_verify(self):
-        async with BooksPage() as bp:
+    @pytest.mark.prewarm("BooksPage")
+    async def test_sort_descending_verify(self, browser):
+        async with BooksPage(browser) as bp:
             await bp.sort_by_title("descending")
             assert await bp.verify_sort("Title", "descending"), "Sort descending verification failed"
 
@@ -85,17 +96,20 @@ class TestDemoQA:
     @pytest.mark.asyncio
     @pytest.mark.skip_browser("firefox")
     @pytest.mark.skip_browser("msedge")
-    async def test_set_rows_per_page(self):
-        async with BooksPage() as bp:
+    @pytest.mark.prewarm("BooksPage")
+    async def test_set_rows_per_page(self, browser):
+        async with BooksPage(browser) as bp:
             await bp.set_row_per_page(5)
-            assert await bp.verify_num_pages(2), "Number of rows per page verification failed"
-            assert await bp.verify_num_rows(5), "Number of rows verification failed"
+            table = await bp.table_snapshot(until=lambda table: table["rows per page"] == 5)
+            assert await bp.verify_num_pages(2, table), "Number of rows per page verification failed"
+            assert await bp.verify_num_rows(5, table), "Number of rows verification failed"
 
     @pytest.mark.asyncio
     @pytest.mark.skip_browser("firefox")
     @pytest.mark.skip_browser("msedge")
-    async def test_page_jump(self):
-        async with BooksPage() as bp:
+    @pytest.mark.prewarm("BooksPage")
+    async def test_page_jump(self, browser):
+        async with BooksPage(browser) as bp:
             await bp.set_row_per_page(5)
             await bp.click_next_page_button()
             await bp.verify_current_page(2)
@@ -104,9 +118,10 @@ class TestDemoQA:
     @pytest.mark.asyncio
     @pytest.mark.skip_browser("firefox")
     @pytest.mark.skip_browser("msedge")
-    async def test_book_search(self):
+    @pytest.mark.prewarm("BooksPage")
+    async def test_book_search(self, browser):
         book = "Speaking JavaScript"
-        async with BooksPage() as bp:
+        async with BooksPage(browser) as bp:
             await bp.text_box_interact(name="Type to search", action="fill", value=book)
             await bp.verify_filter_by_title(book)
 
@@ -114,6 +129,7 @@ class TestDemoQA:
     @pytest.mark.asyncio
     @pytest.mark.skip_browser("firefox")
     @pytest.mark.skip_browser("msedge")
+    @pytest.mark.api
     async def test_create_user_api(self, api_request_context_final):
         res = await api_request_context_final.post(
             self.api_endpoint, data=self.new_user
@@ -135,6 +151,7 @@ class TestDemoQA:
     @pytest.mark.asyncio
     @pytest.mark.skip_browser("firefox")
     @pytest.mark.skip_browser("msedge")
+    @pytest.mark.api
     async def test_create_exist_user_api(self, api_request_context_final):
         res = await api_request_context_final.post(
             self.api_endpoint, data=self.exist_user
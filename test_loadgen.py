@@ -0,0 +1,47 @@
+import pytest
+
+from loadgen import LoadStats, collect, percentile
+
+
+@pytest.mark.unit
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 21)]
+
+    assert percentile([], 95) == 0.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile(values, 50) == 10.0
+    assert percentile(values, 95) == 19.0
+    assert percentile(values, 99) == 20.0
+    assert percentile(values, 100) == 20.0
+    assert percentile(values, 0) == 1.0
+    # the rank rounds up: 2.5 -> the 3rd of 5, 28.5 -> the 29th of 30
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    assert percentile([float(v) for v in range(1, 31)], 95) == 29.0
+
+
+@pytest.mark.unit
+def test_load_stats_summary_and_histogram():
+    assert LoadStats._summary([]) == {"min": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    assert LoadStats._summary([3.0, 1.0, 2.0, 10.0]) == {
+        "min": 1.0, "p50": 2.0, "p95": 10.0, "p99": 10.0, "max": 10.0, "mean": 4.0}
+
+    stats = LoadStats()
+    for ms in [0.5, 1.0, 1.5, 7.0, 6000.0]:
+        stats.record_request(200, ms / 1000)
+    histogram = stats._histogram()
+    assert list(histogram)[0] == "<=1" and list(histogram)[-1] == ">5000"
+    assert histogram["<=1"] == 2
+    assert histogram["<=2"] == 1
+    assert histogram["<=10"] == 1
+    assert histogram[">5000"] == 1
+    assert sum(histogram.values()) == 5
+
+
+@pytest.mark.unit
+def test_collect_checks_every_selector():
+    scenarios = collect(["test_w2.py"])
+    assert scenarios and all(scenario.clients for scenario in scenarios)
+    assert [s.name for s in collect([f"test_w2.py::{scenarios[0].cls.__name__}::{scenarios[0].name}"])] == [scenarios[0].name]
+    # test_w1.py has browser tests only, it must not hide behind test_w2.py's scenarios
+    with pytest.raises(ValueError, match="test_w1.py"):
+        collect(["test_w2.py", "test_w1.py"])
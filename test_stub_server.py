@@ -0,0 +1,68 @@
+import pytest
+
+from demoqa import LoginPage, BooksPage, TextBoxPage, Loc, DEMOQA_URL, FILL_FORM_SCRIPT, set_base_url, site_url
+
+
+@pytest.mark.api
+@pytest.mark.asyncio
+async def test_stub_serves_pages(browser_pool, stub_server):
+    playwright = await browser_pool.playwright()
+    request_context = await playwright.request.new_context(base_url=stub_server.url)
+    login = await request_context.get("/login")
+    login_html = await login.text()
+    books = await (await request_context.get("/BookStore/v1/Books")).json()
+    missing = await request_context.get("/no-such-page")
+    await request_context.dispose()
+
+    assert login.status == 200
+    assert login.headers["content-type"].startswith("text/html")
+    assert 'placeholder="UserName"' in login_html
+    assert "Speaking JavaScript" in [book["title"] for book in books["books"]]
+    assert missing.status == 404
+
+
+@pytest.mark.unit
+def test_site_url_follows_base_url():
+    set_base_url("http://127.0.0.1:8765/")
+    try:
+        assert site_url(LoginPage.url) == "http://127.0.0.1:8765/login"
+        assert site_url(BooksPage.url) == "http://127.0.0.1:8765/books"
+        assert site_url("https://the-internet.herokuapp.com/basic_auth") == "https://the-internet.herokuapp.com/basic_auth"
+    finally:
+        set_base_url(None)
+    assert site_url(LoginPage.url) == f"{DEMOQA_URL}/login"
+
+
+@pytest.fixture
+def stub_site(stub_server):
+    # page objects go to the stub for this test only
+    previous = site_url(DEMOQA_URL)
+    set_base_url(stub_server.url)
+    yield stub_server
+    set_base_url(previous)
+
+
+@pytest.mark.asyncio
+async def test_fill_form_and_expect_all_on_the_stub(browser, stub_site):
+    async with TextBoxPage(browser) as tb:
+        await tb.page.evaluate("""() => document.querySelector("#userForm").insertAdjacentHTML(
+            "beforeend", '<div role="textbox" aria-label="Notes"></div><div role="textbox" aria-label="Bio" contenteditable="true"></div>')""")
+        result = await tb.page.evaluate(FILL_FORM_SCRIPT, [["Full Name", "Aa"], ["Current Address", "Cc2#"],
+                                                           ["Notes", "x"], ["Bio", "b"]])
+        # a role=textbox without a value goes back to Playwright's fill instead of breaking the batch
+        assert [field["name"] for field in result["filled"]] == ["Full Name", "Current Address", "Bio"]
+        assert result["missing"] == ["Notes"]
+
+        report = await tb.fill_form({tb.fullname_ph: "Aa", tb.email_ph: "Bb1@test.com", tb.current_address_ph: "Cc2#"})
+        assert sorted(report["fields"]) == sorted([tb.fullname_ph, tb.email_ph, tb.current_address_ph])
+        assert report["fallback"] == []
+        await tb.text_box_interact(tb.email_ph, "expect_value", "Bb1@test.com")
+        await tb.submit_button.click()
+        await tb.expect_all(["Name:Aa", "Email:Bb1@test.com", Loc("css", "#currentAddress.mb-1"),
+                             tb.page.locator("#name")])
+        await tb.expect_all([Loc("css", "#permanentAddress.mb-1")], visible=False, timeout=500)
+        with pytest.raises(AssertionError) as failure:
+            await tb.expect_all(["Name:Aa", "Name:Zz", Loc("css", "#nothing")], timeout=500)
+        message = str(failure.value)
+        assert message.startswith("2 of 3 expectations unmet")
+        assert "Name:Zz" in message and "#nothing" in message and "Name:Aa'" not in message
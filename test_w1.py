@@ -12,34 +12,32 @@ from demoqa import (
     RadioButtonPage,
     MultiPage,
     CalendarPage,
+    Loc,
 )
 
+@pytest.mark.concurrent
 class TestDemoQA:
     @pytest.mark.asyncio
-    async def test_login_success(self):
-        async with LoginPage() as lp:
+    async def test_login_success(self, browser):
+        async with LoginPage(browser) as lp:
             await lp.login(lp.username, lp.password)
             await lp.expect_text_visible("oabgnol63")
 
     @pytest.mark.asyncio
-    async def test_input(self):
-        async with TextBoxPage() as tb:
+    async def test_input(self, browser):
+        async with TextBoxPage(browser) as tb:
             if not tb.page:
                 raise RuntimeError("Page not initialized")
             await tb.expect_title()
-            await tb.fill_name("Aa")
-            await tb.fill_email("Bb1@test.com")
-            await tb.fill_address("Cc2#")
+            await tb.fill_form({tb.fullname_ph: "Aa", tb.email_ph: "Bb1@test.com", tb.current_address_ph: "Cc2#"})
             await tb.page.locator("#permanentAddress").fill("Dd3$")
             await tb.button_interact(name="Submit", action="click")
-            await tb.expect_text_visible("Name:Aa")
-            await tb.expect_text_visible("Email:Bb1@test.com")
-            await tb.expect_text_visible("Current Address :Cc2#")
+            await tb.expect_all(["Name:Aa", "Email:Bb1@test.com", "Current Address :Cc2#"])
             # await tb.expect_text_visible("Permanent Address :Dd3$")
 
     @pytest.mark.asyncio
-    async def test_keyboard_input(self):
-        async with TextBoxPage() as tb:
+    async def test_keyboard_input(self, browser):
+        async with TextBoxPage(browser) as tb:
             if not tb.page:
                 raise RuntimeError("Page not initialized")
             await tb.expect_title()
@@ -50,41 +48,37 @@ class TestDemoQA:
             await tb.text_box_interact("Full Name", "expect_value", "")
 
     @pytest.mark.asyncio
-    async def test_drag_drop(self):
-        async with DragPage() as dp:
+    async def test_drag_drop(self, browser):
+        async with DragPage(browser) as dp:
             if not dp.page:
                 raise RuntimeError("Page not initialized")
             await dp.expect_title()
-            await dp.page.locator(dp.drag_id).drag_to(
-                dp.page.get_by_role("tabpanel", name=dp.simple_drop_name)
-                .locator(dp.drop_id))
+            await dp.draggable.drag_to(dp.droppable)
             await dp.expect_text_visible("Dropped!")
 
     @pytest.mark.asyncio
-    async def test_select(self):
-        async with SelectPage() as sp:
+    async def test_select(self, browser):
+        async with SelectPage(browser) as sp:
             if not sp.page:
                 raise RuntimeError("Page not initialized")
             await sp.expect_title()
-            await sp.page.locator(sp.group_menu["id"]).click()
+            await sp.group_menu_toggle.click()
             await sp.page.get_by_text(sp.group_menu["sel"][0], exact=True).click()
-            await sp.page.locator(sp.select_one["id"]).click()
+            await sp.select_one_toggle.click()
             await sp.page.get_by_text(sp.select_one["sel"][0], exact=True).click()
-            await sp.page.locator(sp.select_menu_container["id"]).nth(2).click()
+            await sp.select_menu_toggle.click()
             await sp.page.locator("#react-select-4-option-0").click()
             await sp.page.locator("#react-select-4-option-1").click()
             await sp.page.locator("#react-select-4-option-2").click()
             await sp.page.locator("#react-select-4-option-3").click()
-            await sp.page.locator(sp.inplace_select["id"]).select_option("volvo")
+            await sp.cars_select.select_option(sp.inplace_select["sel"][0])
             # await sp.page.pause()
-            await sp.expect_text_visible(sp.group_menu["sel"][0])
-            await sp.expect_text_visible(sp.select_one["sel"][0])
-            for value in sp.select_menu_container["values"]:
-                await expect(sp.page.get_by_text(value, exact=True).nth(1)).to_be_visible()
+            await sp.expect_all([sp.group_menu["sel"][0], sp.select_one["sel"][0]]
+                                + [Loc("text", value, exact=True, nth=1) for value in sp.select_menu_container["values"]])
 
     @pytest.mark.asyncio
-    async def test_alert(self):
-        async with AlertPage() as ap:
+    async def test_alert(self, browser):
+        async with AlertPage(browser) as ap:
             if not ap.page:
                 raise RuntimeError("Page not initialized")
             await ap.expect_title()
@@ -93,8 +87,8 @@ class TestDemoQA:
             await expect(ap.page.get_by_text("You entered Hello!")).to_be_visible()
 
     @pytest.mark.asyncio
-    async def test_frame(self):
-        async with FramePage() as fp:
+    async def test_frame(self, browser):
+        async with FramePage(browser) as fp:
             if not fp.page:
                 raise RuntimeError("Page not initialized")
             await fp.expect_title()
@@ -105,20 +99,18 @@ class TestDemoQA:
                 raise ValueError("Frame not found")
 
     @pytest.mark.asyncio
-    async def test_checkbox(self):
-        async with CheckBoxPage() as cb:
+    async def test_checkbox(self, browser):
+        async with CheckBoxPage(browser) as cb:
             if not cb.page:
                 raise RuntimeError("Page not initialized")
             await cb.expect_title()
             await cb.page.get_by_role('button', name='Toggle').click()
             await cb.page.locator("label").filter(has_text="Downloads").get_by_role("img").first.click()
-            await cb.expect_text_visible("downloads", exact=True)
-            await cb.expect_text_visible("wordFile", exact=True)
-            await cb.expect_text_visible("excelFile", exact=True)
+            await cb.expect_all(["downloads", "wordFile", "excelFile"], exact=True)
 
     @pytest.mark.asyncio
-    async def test_radiobutton(self):
-        async with RadioButtonPage() as rp:
+    async def test_radiobutton(self, browser):
+        async with RadioButtonPage(browser) as rp:
             if not rp.page:
                 raise RuntimeError("Page not initialized")
             await rp.expect_title()
@@ -126,8 +118,8 @@ class TestDemoQA:
             await rp.expect_text_visible("You have selected Yes", exact=True)
 
     @pytest.mark.asyncio
-    async def test_multipage(self):
-        async with MultiPage() as mp:
+    async def test_multipage(self, browser):
+        async with MultiPage(browser) as mp:
             if not mp.page:
                 raise RuntimeError("Page not initialized")
             await mp.expect_title()
@@ -140,10 +132,10 @@ class TestDemoQA:
                 raise ValueError("Popup page not found")
 
     @pytest.mark.asyncio
-    async def test_calendar(self):
+    async def test_calendar(self, browser):
         from enum import Enum
         from datetime import date
-        async with CalendarPage() as page:
+        async with CalendarPage(browser) as page:
             class Weekday(Enum):
                 MONDAY = 0
                 TUESDAY = 1
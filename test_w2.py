@@ -6,6 +6,7 @@ logger = logging.getLogger(__name__)
 
 from playwright.async_api import APIRequestContext
 
+@pytest.mark.api
 class TestAPIRequests:
     @pytest.mark.asyncio
     async def test_get(self, api_request_context: APIRequestContext) -> None:
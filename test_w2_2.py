@@ -2,15 +2,16 @@
 import pytest
 from playwright.async_api import expect
 from demoqa import (
-    get_browser,
     LoginPage,
     TextBoxPage
 )
 
+pytestmark = pytest.mark.concurrent
+
 @pytest.mark.asyncio
 @pytest.mark.smoke
-async def test_login_success():
-    async with LoginPage() as lp:
+async def test_login_success(browser):
+    async with LoginPage(browser) as lp:
         await lp.login(lp.username, lp.password)
         await lp.expect_text_visible("oabgnol63")
 
@@ -18,8 +19,8 @@ async def test_login_success():
 @pytest.mark.regression
 @pytest.mark.skip_browser("firefox")
 @pytest.mark.skip_browser("msedge")
-async def test_input():
-    async with TextBoxPage() as tb:
+async def test_input(browser):
+    async with TextBoxPage(browser) as tb:
         if not tb.page:
             raise RuntimeError("Page not initialized")
         await tb.expect_title()
@@ -35,8 +36,7 @@ async def test_input():
 @pytest.mark.asyncio
 @pytest.mark.skip_browser("firefox")
 @pytest.mark.skip_browser("msedge")
-async def test_http_auth():
-    browser = get_browser()
+async def test_http_auth(browser):
     context = await browser.new_context(http_credentials={"username": "admin", "password": "admin"})
     page = await context.new_page()
     await page.goto("https://the-internet.herokuapp.com/basic_auth")
@@ -46,7 +46,7 @@ async def test_http_auth():
 @pytest.mark.asyncio
 @pytest.mark.skip_browser("firefox")
 @pytest.mark.skip_browser("msedge")
-async def test_multi_login(test_data):
-    async with LoginPage() as lp:
+async def test_multi_login(browser, test_data):
+    async with LoginPage(browser) as lp:
         await lp.login(test_data['username'], test_data['password'])
         await lp.expect_text_visible(test_data['username'])
\ No newline at end of file